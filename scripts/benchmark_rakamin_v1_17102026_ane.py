@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite ETL rakamin di atas data sintetis generate_rakamin_jubelio.
+Mengukur waktu, throughput dan peak memory (tracemalloc) untuk extract,
+transform, summary, quality check dan load pada beberapa skala data,
+lalu membandingkannya dengan baseline di config/benchmark_baseline.json.
+
+    python scripts/benchmark_rakamin_v1_17102026_ane.py --scales 1e4,1e6
+    python scripts/benchmark_rakamin_v1_17102026_ane.py --scales 1e4 --update-baseline
+"""
+
+import argparse
+import gc
+import json
+import logging
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# ==== Base Path Config ====
+SCRIPTS_DIR = Path(__file__).parent
+ROOT_DIR = SCRIPTS_DIR.parent
+sys.path.append(str(ROOT_DIR))
+
+from scripts.extract import extract_from_folder
+from scripts.generate_rakamin_jubelio_v1_22092025_1118_ane import write_order_files
+from scripts.etl_rakamin_kalbe.transform_rakamin_kalbe_v1_24092025_2036_ane import transform_orders, create_sales_summary
+from scripts.etl_rakamin_kalbe.load_rakamin_kalbe_v1_24092025_2037_ane import load_to_sqlite, load_to_parquet
+from scripts.quality_rakamin_kalbe.data_quality_rakamin_kalbe_v1_24092025_ane import DataQualityChecker
+
+DEFAULT_SCALES = [10_000, 1_000_000, 10_000_000]
+BASELINE_FILE = ROOT_DIR / "config" / "benchmark_baseline.json"
+RESULTS_DIR = ROOT_DIR / "logs"
+ROWS_PER_FILE = 1_000_000
+SEGMENTS = ["Consumer", "Corporate", "Home Office"]
+
+
+def make_customers(seed=42):
+    """Dimensi customer untuk customer_id 1000..1999 yang dipakai generator"""
+    rng = np.random.default_rng(seed)
+    customer_ids = np.arange(1000, 2000)
+    return pd.DataFrame({
+        "customer_id": customer_ids,
+        "customer_name": [f"Customer {i}" for i in customer_ids],
+        "segment": rng.choice(SEGMENTS, size=len(customer_ids))
+    })
+
+
+def build_operations(raw_dir, work_dir, customers, extract_workers):
+    """
+    Daftar (nama, fungsi) berurutan; setiap fungsi menerima state dict dan
+    menyimpan outputnya di sana untuk operasi berikutnya.
+    """
+    checker = DataQualityChecker(cache_results=False)
+
+    def extract(state):
+        orders = extract_from_folder(raw_dir, max_workers=extract_workers)
+        # Generator memakai "price"; transform_orders menghitung total_amount dari unit_price
+        state["orders"] = orders.rename(columns={"price": "unit_price"})
+        return len(orders)
+
+    def transform(state):
+        state["fact"] = transform_orders(state["orders"], customers)
+        return len(state["fact"])
+
+    def summary(state):
+        # create_sales_summary mengelompokkan per customer_segment
+        fact = state["fact"].rename(columns={"segment": "customer_segment"})
+        create_sales_summary(fact)
+        return len(fact)
+
+    def quality(state):
+        checker.run_all_checks(state["fact"], "orders")
+        return len(state["fact"])
+
+    def sqlite(state):
+        if not load_to_sqlite(state["fact"], "fact_orders", str(work_dir / "benchmark.db")):
+            raise RuntimeError("load_to_sqlite gagal")
+        return len(state["fact"])
+
+    def parquet(state):
+        if not load_to_parquet(state["fact"], str(work_dir / "fact_orders.parquet")):
+            raise RuntimeError("load_to_parquet gagal")
+        return len(state["fact"])
+
+    return [
+        ("extract_from_folder", extract),
+        ("transform_orders", transform),
+        ("create_sales_summary", summary),
+        ("run_all_checks", quality),
+        ("load_to_sqlite", sqlite),
+        ("load_to_parquet", parquet),
+    ]
+
+
+def run_timing_pass(operations, repeat):
+    """Best-of-repeat wall time per operasi (tanpa tracemalloc supaya tidak bias)"""
+    results = {}
+    for _ in range(repeat):
+        state = {}
+        for name, func in operations:
+            gc.collect()
+            start = time.perf_counter()
+            rows = func(state)
+            seconds = time.perf_counter() - start
+            if name not in results or seconds < results[name]["seconds"]:
+                results[name] = {"seconds": round(seconds, 4), "rows": rows}
+    for metrics in results.values():
+        metrics["rows_per_sec"] = round(metrics["rows"] / metrics["seconds"], 1) if metrics["seconds"] > 0 else None
+    return results
+
+
+def run_memory_pass(operations, results):
+    """
+    Peak memory Python/numpy per operasi via tracemalloc, di pass terpisah.
+    Buffer internal pyarrow tidak terlihat oleh tracemalloc.
+    """
+    state = {}
+    for name, func in operations:
+        gc.collect()
+        tracemalloc.start()
+        try:
+            func(state)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        results[name]["peak_mb"] = round(peak / (1024 * 1024), 2)
+
+
+def run_scale(n_rows, repeat=1, measure_memory=True, extract_workers=1, seed=42):
+    with tempfile.TemporaryDirectory(prefix="rakamin_bench_") as tmp:
+        tmp = Path(tmp)
+        raw_dir = tmp / "raw"
+        start = time.perf_counter()
+        write_order_files(str(raw_dir), n_rows, min(n_rows, ROWS_PER_FILE), seed=seed)
+        print(f"  dataset {n_rows:,} rows dibuat dalam {time.perf_counter() - start:.1f}s", flush=True)
+
+        operations = build_operations(raw_dir, tmp, make_customers(seed), extract_workers)
+        results = run_timing_pass(operations, repeat)
+        if measure_memory:
+            run_memory_pass(operations, results)
+        return results
+
+
+def compare_with_baseline(results, baseline, threshold, memory_threshold):
+    """Return list regresi: waktu atau peak memory lebih dari threshold di atas baseline"""
+    regressions = []
+    for scale, operations in results.items():
+        for name, metrics in operations.items():
+            base = baseline.get(scale, {}).get(name)
+            if not base:
+                continue
+            ratio = metrics["seconds"] / base["seconds"] if base.get("seconds") else None
+            metrics["vs_baseline"] = round(ratio, 3) if ratio is not None else None
+            if ratio is not None and ratio > 1 + threshold:
+                regressions.append(f"{scale} {name}: {metrics['seconds']}s vs baseline {base['seconds']}s ({ratio:.2f}x)")
+            if metrics.get("peak_mb") and base.get("peak_mb"):
+                mem_ratio = metrics["peak_mb"] / base["peak_mb"]
+                if mem_ratio > 1 + memory_threshold:
+                    regressions.append(
+                        f"{scale} {name}: peak {metrics['peak_mb']} MB vs baseline {base['peak_mb']} MB ({mem_ratio:.2f}x)"
+                    )
+    return regressions
+
+
+def print_report(results):
+    rows = [
+        {"scale": scale, "operation": name, **metrics}
+        for scale, operations in results.items()
+        for name, metrics in operations.items()
+    ]
+    print("\n" + "=" * 60)
+    print("BENCHMARK RESULTS")
+    print("=" * 60)
+    print(pd.DataFrame(rows).to_string(index=False))
+
+
+def parse_scales(value):
+    return [int(float(v)) for v in value.split(",") if v.strip()]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark ETL rakamin pada data sintetis")
+    parser.add_argument("--scales", type=parse_scales, default=DEFAULT_SCALES,
+                        help="Jumlah rows, dipisah koma (default 1e4,1e6,1e7)")
+    parser.add_argument("--repeat", type=int, default=1, help="Ulangi timing pass, ambil yang tercepat")
+    parser.add_argument("--extract-workers", type=int, default=1)
+    parser.add_argument("--no-memory", action="store_true", help="Lewati pass tracemalloc")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_FILE)
+    parser.add_argument("--update-baseline", action="store_true", help="Simpan hasil run ini sebagai baseline")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="Toleransi waktu di atas baseline sebelum dianggap regresi (0.25 = 25%%)")
+    parser.add_argument("--memory-threshold", type=float, default=0.25)
+    args = parser.parse_args(argv)
+
+    # Log INFO per-file/per-load dari modul ETL terlalu ramai untuk benchmark
+    logging.basicConfig(level=logging.WARNING, format="%(asctime)s - %(levelname)s - %(message)s")
+
+    results = {}
+    for n_rows in args.scales:
+        print(f"Benchmark {n_rows:,} rows ...", flush=True)
+        results[str(n_rows)] = run_scale(n_rows, args.repeat, not args.no_memory, args.extract_workers)
+
+    baseline = {}
+    if args.baseline.exists():
+        with open(args.baseline, "r") as f:
+            baseline = json.load(f).get("results", {})
+    regressions = compare_with_baseline(results, baseline, args.threshold, args.memory_threshold)
+    print_report(results)
+
+    RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+    run_info = {
+        "generated_at": datetime.now().isoformat(),
+        "python": sys.version.split()[0],
+        "pandas": pd.__version__,
+        "repeat": args.repeat,
+        "results": results
+    }
+    results_file = RESULTS_DIR / f"benchmark_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    with open(results_file, "w") as f:
+        json.dump(run_info, f, indent=2)
+    print(f"\nHasil disimpan ke {results_file}")
+
+    if args.update_baseline:
+        # Scale yang tidak diukur di run ini tetap memakai baseline lama
+        run_info["results"] = {**baseline, **results}
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        with open(args.baseline, "w") as f:
+            json.dump(run_info, f, indent=2)
+        print(f"Baseline diperbarui: {args.baseline}")
+        return 0
+
+    if regressions:
+        print("\n❌ Regresi terhadap baseline:")
+        for line in regressions:
+            print(f"  - {line}")
+        return 1
+    if baseline:
+        print("\n✅ Tidak ada regresi terhadap baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
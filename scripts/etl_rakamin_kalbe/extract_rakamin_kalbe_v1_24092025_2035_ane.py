@@ -1,7 +1,12 @@
 import sqlite3
 import pandas as pd
 import logging
+import json
 import os
+import queue
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
 from pathlib import Path
 
 # Base path configuration
@@ -9,36 +14,292 @@ BASE_DIR = Path(__file__).parent.parent.parent  # Root project directory
 DATA_DIR = BASE_DIR / "data"
 DB_DEV_DIR = DATA_DIR / "database"
 DB_DIR = DB_DEV_DIR / "dev"
+WATERMARK_FILE = DB_DIR / "extract_watermarks.json"
+
+# Alias untuk rowid supaya tidak bentrok dengan kolom asli tabel
+ROWID_ALIAS = "_etl_rowid"
+
+# Operator filter yang didukung (format sama dengan filters di pd.read_parquet)
+FILTER_OPERATORS = {
+    "=": "=", "==": "=", "!=": "!=",
+    "<": "<", "<=": "<=", ">": ">", ">=": ">=",
+    "in": "IN", "not in": "NOT IN"
+}
 
 def get_db_path(db_name):
     """Get absolute path untuk database"""
     return DB_DIR / db_name
 
-def extract_data(db_name, table_name):
+def quote_identifier(name):
+    """Quote nama tabel/kolom SQLite"""
+    return '"' + str(name).replace('"', '""') + '"'
+
+def _to_sql_param(value):
+    """Numpy scalar -> Python scalar supaya bisa di-bind sqlite3"""
+    return value.item() if hasattr(value, "item") and not isinstance(value, (list, tuple)) else value
+
+def build_where_clause(filters):
+    """
+    Ubah filters [(kolom, operator, value), ...] jadi klausa WHERE + params.
+    Semua filter digabung dengan AND.
+    """
+    clauses, params = [], []
+    for column, op, value in filters or []:
+        sql_op = FILTER_OPERATORS.get(str(op).lower())
+        if sql_op is None:
+            raise ValueError(f"Operator filter tidak didukung: {op}")
+        if sql_op in ("IN", "NOT IN"):
+            values = [_to_sql_param(v) for v in value]
+            placeholders = ", ".join("?" * len(values))
+            clauses.append(f"{quote_identifier(column)} {sql_op} ({placeholders})")
+            params.extend(values)
+        else:
+            clauses.append(f"{quote_identifier(column)} {sql_op} ?")
+            params.append(_to_sql_param(value))
+    return " AND ".join(clauses), params
+
+def build_select(table_name, columns=None, filters=None):
+    """
+    Buat query SELECT dengan projection (columns) dan predicate (filters)
+    yang langsung dieksekusi di SQLite, bukan di pandas.
+    """
+    select_list = ", ".join(quote_identifier(c) for c in columns) if columns else "*"
+    query = f"SELECT {select_list} FROM {quote_identifier(table_name)}"
+    where, params = build_where_clause(filters)
+    if where:
+        query += f" WHERE {where}"
+    return query, params
+
+class SQLiteReadPool:
     """
-    Ekstrak data dari tabel SQLite ke DataFrame
+    Pool koneksi read-only ke satu database SQLite.
+    Koneksi dibuka saat pool dibuat (URI mode=ro) dengan pragma
+    cache_size/mmap_size yang lebih besar, lalu dipinjam bergantian oleh
+    thread extractor sampai pool di-close.
     """
+    def __init__(self, db_name, size=4, cache_size_kb=65536, mmap_size=268435456):
+        self.db_path = Path(get_db_path(db_name)).resolve()
+        self._pool = queue.Queue()
+        self._connections = []
+        uri = f"{self.db_path.as_uri()}?mode=ro"
+        try:
+            for _ in range(size):
+                conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+                conn.execute(f"PRAGMA cache_size = -{int(cache_size_kb)}")
+                conn.execute(f"PRAGMA mmap_size = {int(mmap_size)}")
+                conn.execute("PRAGMA query_only = ON")
+                self._connections.append(conn)
+                self._pool.put(conn)
+        except Exception:
+            self.close()
+            raise
+
+    @contextmanager
+    def connection(self):
+        """Pinjam satu koneksi; dikembalikan ke pool setelah selesai"""
+        conn = self._pool.get()
+        try:
+            yield conn
+        finally:
+            self._pool.put(conn)
+
+    def close(self):
+        for conn in self._connections:
+            conn.close()
+        self._connections = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+def _read_sql(db_name, query, params, conn=None):
+    """Jalankan query; pakai conn dari pool kalau ada, kalau tidak buka koneksi baru"""
+    if conn is not None:
+        return pd.read_sql_query(query, conn, params=params)
+    conn = sqlite3.connect(get_db_path(db_name))
     try:
-        db_path = get_db_path(db_name)
-        conn = sqlite3.connect(db_path)
-        query = f"SELECT * FROM {table_name}"
-        df = pd.read_sql_query(query, conn)
+        return pd.read_sql_query(query, conn, params=params)
+    finally:
         conn.close()
-        
+
+def extract_data(db_name, table_name, columns=None, filters=None, conn=None):
+    """
+    Ekstrak data dari tabel SQLite ke DataFrame.
+    columns membatasi kolom yang dibaca, filters [(kolom, op, value), ...]
+    jadi klausa WHERE. conn opsional (misalnya dari SQLiteReadPool).
+    """
+    try:
+        query, params = build_select(table_name, columns, filters)
+        df = _read_sql(db_name, query, params, conn)
+
         logging.info(f"Berhasil ekstrak {len(df)} rows dari {table_name}")
         return df
     except Exception as e:
         logging.error(f"Error ekstrak data dari {db_name}.{table_name}: {e}")
         return None
 
-def extract_multiple_tables(db_name, table_list):
+def load_watermarks(watermark_file=WATERMARK_FILE):
+    """Load watermark per tabel dari file JSON"""
+    watermark_file = Path(watermark_file)
+    if not watermark_file.exists():
+        return {}
+    with open(watermark_file, "r") as f:
+        return json.load(f)
+
+def save_watermarks(watermarks, watermark_file=WATERMARK_FILE):
+    """Simpan watermark secara atomic (tulis ke file tmp lalu replace)"""
+    watermark_file = Path(watermark_file)
+    watermark_file.parent.mkdir(parents=True, exist_ok=True)
+    tmp_file = watermark_file.with_suffix(watermark_file.suffix + ".tmp")
+    with open(tmp_file, "w") as f:
+        json.dump(watermarks, f, indent=2)
+    os.replace(tmp_file, watermark_file)
+
+def get_watermark_key(db_name, table_name):
+    """Key watermark: nama file database + nama tabel"""
+    return f"{Path(db_name).name}.{table_name}"
+
+def commit_watermarks(dataframes, watermark_file=WATERMARK_FILE):
     """
-    Ekstrak multiple tables sekaligus
+    Simpan watermark dari hasil extract_incremental(commit=False).
+    Dipanggil setelah data berhasil diproses supaya rows tidak hilang
+    kalau pipeline gagal di tengah jalan.
     """
-    dataframes = {}
-    for table in table_list:
-        df = extract_data(db_name, table)
-        if df is not None:
-            dataframes[table] = df
-    
-    return dataframes
\ No newline at end of file
+    watermarks = load_watermarks(watermark_file)
+    for df in dataframes:
+        info = df.attrs.get("watermark")
+        if info and info["value"] is not None:
+            watermarks[info["key"]] = {
+                "column": info["column"],
+                "value": info["value"],
+                "updated_at": datetime.now().isoformat()
+            }
+    save_watermarks(watermarks, watermark_file)
+
+def extract_incremental(db_name, table_name, watermark_column="rowid",
+                        watermark_file=WATERMARK_FILE, commit=False,
+                        columns=None, filters=None, conn=None):
+    """
+    Ekstrak hanya rows baru sejak watermark terakhir tabel ini.
+    Run pertama (belum ada watermark) mengambil seluruh tabel.
+    Filter-nya strict (watermark_column > watermark), jadi watermark_column
+    harus naik ketat di setiap commit: rowid di tabel append-only atau key
+    autoincrement. Kolom updated-at TIDAK aman: row yang di-commit belakangan
+    dengan timestamp sama dengan watermark tersimpan terlewat selamanya.
+    Watermark baru hanya disimpan di df.attrs["watermark"]; panggil
+    commit_watermarks([df]) setelah load berhasil, supaya rows tidak hilang
+    kalau transform/load gagal. commit=True langsung menyimpannya.
+    columns/filters/conn sama seperti di extract_data.
+    """
+    try:
+        key = get_watermark_key(db_name, table_name)
+        stored = load_watermarks(watermark_file).get(key)
+
+        last_value = None
+        if stored and stored["column"] == watermark_column:
+            last_value = stored["value"]
+        elif stored:
+            logging.warning(
+                f"Watermark {key} pakai kolom {stored['column']}, bukan {watermark_column}; full extract"
+            )
+
+        # Kolom watermark selalu ikut dibaca, lalu di-drop kalau tidak diminta
+        drop_columns = []
+        if watermark_column == "rowid":
+            column_sql = "rowid"
+            result_column = ROWID_ALIAS
+            drop_columns.append(ROWID_ALIAS)
+        else:
+            column_sql = quote_identifier(watermark_column)
+            result_column = watermark_column
+            if columns and watermark_column not in columns:
+                columns = list(columns) + [watermark_column]
+                drop_columns.append(watermark_column)
+
+        query, params = build_select(table_name, columns, filters)
+        if watermark_column == "rowid":
+            query = query.replace("SELECT ", f"SELECT rowid AS {ROWID_ALIAS}, ", 1)
+        if last_value is not None:
+            query += " AND " if filters else " WHERE "
+            query += f"{column_sql} > ?"
+            params.append(last_value)
+        query += f" ORDER BY {column_sql}"
+
+        df = _read_sql(db_name, query, params, conn)
+
+        new_value = last_value
+        if len(df) > 0:
+            new_value = df[result_column].max()
+            new_value = new_value.item() if hasattr(new_value, "item") else new_value
+        df = df.drop(columns=drop_columns)
+
+        df.attrs["watermark"] = {"key": key, "column": watermark_column, "value": new_value}
+        if commit and len(df) > 0:
+            commit_watermarks([df], watermark_file)
+
+        logging.info(
+            f"Berhasil ekstrak {len(df)} rows baru dari {table_name} "
+            f"({watermark_column} > {last_value})"
+        )
+        return df
+    except Exception as e:
+        logging.error(f"Error ekstrak incremental dari {db_name}.{table_name}: {e}")
+        return None
+
+def extract_multiple_tables(db_name, table_list, incremental=False, watermark_columns=None,
+                            watermark_file=WATERMARK_FILE, columns=None, filters=None,
+                            max_workers=1):
+    """
+    Ekstrak multiple tables sekaligus.
+    Dengan incremental=True hanya rows baru yang diambil; watermark_columns
+    (dict tabel -> kolom) default ke rowid. Watermark tidak disimpan di sini:
+    tiap DataFrame membawa watermark pending di df.attrs["watermark"], dan
+    pemanggil menjalankan commit_watermarks(dataframes.values()) setelah
+    load berhasil.
+    columns dan filters berupa dict tabel -> columns/filters.
+    Dengan max_workers > 1 tabel diekstrak paralel lewat SQLiteReadPool
+    yang dibuka untuk satu panggilan ini. Kalau pool gagal dibuka, ekstrak
+    jalan sequential. Tabel yang gagal di-skip, sama seperti jalur sequential.
+    Hasil tetap dict tabel -> DataFrame dengan urutan table_list.
+    """
+    watermark_columns = watermark_columns or {}
+    columns = columns or {}
+    filters = filters or {}
+
+    def extract_table(table, conn=None):
+        if incremental:
+            return extract_incremental(
+                db_name, table,
+                watermark_column=watermark_columns.get(table, "rowid"),
+                watermark_file=watermark_file,
+                columns=columns.get(table),
+                filters=filters.get(table),
+                conn=conn
+            )
+        return extract_data(db_name, table, columns.get(table), filters.get(table), conn=conn)
+
+    pool = None
+    workers = min(max_workers, len(table_list))
+    if workers > 1:
+        try:
+            pool = SQLiteReadPool(db_name, size=workers)
+        except Exception as e:
+            logging.warning(f"Pool read-only ke {db_name} gagal dibuka, ekstrak sequential: {e}")
+
+    if pool is None:
+        results = [extract_table(table) for table in table_list]
+    else:
+        def extract_pooled(table):
+            try:
+                with pool.connection() as conn:
+                    return extract_table(table, conn)
+            except Exception as e:
+                logging.error(f"Error ekstrak {db_name}.{table}: {e}")
+                return None
+
+        with pool, ThreadPoolExecutor(workers) as executor:
+            results = list(executor.map(extract_pooled, table_list))
+
+    return {table: df for table, df in zip(table_list, results) if df is not None}
@@ -3,6 +3,9 @@ import sqlite3
 from sqlalchemy import create_engine
 import logging
 import os
+import time
+import uuid
+from datetime import datetime
 from pathlib import Path
 
 # Base path configuration
@@ -12,6 +15,9 @@ DB_DEV_DIR = DATA_DIR / "database"
 DB_DIR = DB_DEV_DIR / "dev"
 PROCESSED_DIR = DATA_DIR / "processed"
 
+# Kolom audit yang selalu berubah tiap run; tidak dihitung sebagai perubahan saat merge
+AUDIT_COLUMNS = ["processed_at"]
+
 def get_db_path(db_name):
     """Get absolute path untuk database"""
     return DB_DIR / db_name
@@ -20,29 +26,435 @@ def get_processed_path(filename):
     """Get absolute path untuk processed data"""
     return PROCESSED_DIR / filename
 
-def load_to_sqlite(df, table_name, db_name, if_exists='replace'):
+def quote_identifier(name):
+    """Quote nama tabel/kolom SQLite"""
+    return '"' + str(name).replace('"', '""') + '"'
+
+def _sqlite_rows(df):
+    """
+    Ubah DataFrame jadi tuple Python yang bisa langsung di-bind sqlite3.
+    Konversi per kolom (tolist), bukan per row. Datetime jadi string
+    dengan format sama seperti to_sql, NaN/NaT jadi NULL.
+    """
+    columns = []
+    for col in df.columns:
+        series = df[col]
+        if pd.api.types.is_datetime64_any_dtype(series):
+            text = series.dt.strftime("%Y-%m-%d %H:%M:%S")
+            micro = series.dt.microsecond
+            if (micro > 0).any():
+                text = text.where(micro == 0, series.dt.strftime("%Y-%m-%d %H:%M:%S.%f"))
+            series = text
+        if series.isna().any():
+            columns.append(series.astype(object).where(series.notna(), None).tolist())
+        else:
+            columns.append(series.tolist())
+    return zip(*columns)
+
+def _table_exists(conn, table_name):
+    row = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table_name,)
+    ).fetchone()
+    return row is not None
+
+def _bulk_insert(conn, df, table_name, batch_size, schema=None):
+    """INSERT ... VALUES dengan executemany per batch"""
+    target = quote_identifier(table_name)
+    if schema:
+        target = f"{schema}.{target}"
+    columns = ", ".join(quote_identifier(c) for c in df.columns)
+    placeholders = ", ".join("?" * len(df.columns))
+    insert_sql = f"INSERT INTO {target} ({columns}) VALUES ({placeholders})"
+    for start in range(0, len(df), batch_size):
+        conn.executemany(insert_sql, _sqlite_rows(df.iloc[start:start + batch_size]))
+
+def _bulk_load_sqlite(df, table_name, db_path, if_exists, batch_size, index_columns):
     """
-    Load DataFrame ke SQLite database
+    Bulk load: satu transaksi, executemany per batch, WAL + synchronous=OFF
+    selama load, dan index dibuat setelah semua rows masuk.
     """
+    conn = sqlite3.connect(db_path, isolation_level=None)
     try:
-        db_path = get_db_path(db_name)
-        conn = sqlite3.connect(db_path)
-        df.to_sql(table_name, conn, if_exists=if_exists, index=False)
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA synchronous = OFF")
+
+        exists = _table_exists(conn, table_name)
+        if exists and if_exists == 'fail':
+            raise ValueError(f"Table '{table_name}' already exists.")
+
+        conn.execute("BEGIN")
+        deferred_indexes = []
+        if exists and if_exists == 'replace':
+            conn.execute(f"DROP TABLE {quote_identifier(table_name)}")
+            exists = False
+        if not exists:
+            conn.execute(pd.io.sql.get_schema(df, table_name, con=conn))
+        elif len(df) >= batch_size:
+            # Append besar: drop index dulu, dibuat ulang setelah insert selesai
+            deferred_indexes = conn.execute(
+                "SELECT name, sql FROM sqlite_master WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL",
+                (table_name,)
+            ).fetchall()
+            for name, _ in deferred_indexes:
+                conn.execute(f"DROP INDEX {quote_identifier(name)}")
+
+        _bulk_insert(conn, df, table_name, batch_size)
+
+        for _, sql in deferred_indexes:
+            conn.execute(sql)
+        for cols in index_columns or []:
+            cols = [cols] if isinstance(cols, str) else list(cols)
+            index_name = f"ix_{table_name}_{'_'.join(cols)}"
+            conn.execute(
+                f"CREATE INDEX IF NOT EXISTS {quote_identifier(index_name)} ON "
+                f"{quote_identifier(table_name)} ({', '.join(quote_identifier(c) for c in cols)})"
+            )
+        conn.execute("COMMIT")
+
+        # Kembalikan durability normal dan flush WAL ke file database
+        conn.execute("PRAGMA synchronous = FULL")
+        conn.execute("PRAGMA wal_checkpoint(FULL)")
+    except Exception:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+
+def _latest_per_key(df, table_name, primary_key, order_by):
+    """Satu row per key: row dengan order_by terbesar (atau row terakhir kalau order_by None)"""
+    if order_by is not None:
+        order = df[order_by]
+        if not pd.api.types.is_numeric_dtype(order) and not pd.api.types.is_datetime64_any_dtype(order):
+            order = pd.to_datetime(order, errors='coerce')
+        # Stable sort, NULL paling awal: untuk nilai sama urutan row tetap menentukan
+        positions = order.reset_index(drop=True).sort_values(kind='mergesort', na_position='first').index
+        df = df.iloc[positions.to_numpy()]
+    duplicated = df.duplicated(subset=primary_key, keep='last')
+    if duplicated.any():
+        latest = f"{order_by} terbaru" if order_by is not None else "row terakhir"
+        logging.warning(f"Merge {table_name}: {int(duplicated.sum())} duplicate key, ambil {latest}")
+        df = df[~duplicated]
+    return df
+
+def _merge_load_sqlite(df, table_name, db_path, primary_key, batch_size, order_by=None,
+                       exclude_columns=None):
+    """
+    Upsert lewat staging table: data di-bulk insert ke TEMP table dulu
+    (tidak mengunci warehouse), lalu satu INSERT ... ON CONFLICT DO UPDATE
+    yang hanya menulis rows yang berubah. Dengan WAL, reader tetap bisa
+    query tabel target selama load.
+    Kolom di exclude_columns (default AUDIT_COLUMNS) tetap ikut di-update,
+    tapi tidak dihitung sebagai perubahan. Duplicate key di df diselesaikan
+    dengan order_by (mis. updated_at terbaru).
+    """
+    missing = [c for c in primary_key if c not in df.columns]
+    if missing:
+        raise ValueError(f"Primary key column(s) not in DataFrame: {missing}")
+
+    null_keys = df[primary_key].isna().any(axis=1)
+    if null_keys.any():
+        logging.warning(f"Merge {table_name}: {int(null_keys.sum())} rows dengan primary key NULL di-skip")
+        df = df[~null_keys]
+    df = _latest_per_key(df, table_name, primary_key, order_by)
+    excluded = set(AUDIT_COLUMNS if exclude_columns is None else exclude_columns)
+
+    target = quote_identifier(table_name)
+    stage_name = f"_stg_{table_name}"
+    stage = f"temp.{quote_identifier(stage_name)}"
+    columns = [quote_identifier(c) for c in df.columns]
+    keys = [quote_identifier(c) for c in primary_key]
+
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        conn.execute("PRAGMA journal_mode = WAL")
+
+        # 1. Staging
+        conn.execute(f"DROP TABLE IF EXISTS {stage}")
+        stage_ddl = pd.io.sql.get_schema(df, stage_name, con=conn)
+        conn.execute(stage_ddl.replace("CREATE TABLE", "CREATE TEMP TABLE", 1))
+        conn.execute("BEGIN")
+        _bulk_insert(conn, df, stage_name, batch_size, schema="temp")
+        conn.execute("COMMIT")
+
+        # 2. Merge ke target dalam satu transaksi pendek
+        conn.execute("BEGIN IMMEDIATE")
+        if not _table_exists(conn, table_name):
+            conn.execute(pd.io.sql.get_schema(df, table_name, con=conn))
+        else:
+            existing = {row[1] for row in conn.execute(f"PRAGMA table_info({target})")}
+            for col in df.columns:
+                if col not in existing:
+                    conn.execute(f"ALTER TABLE {target} ADD COLUMN {quote_identifier(col)}")
+            # Tabel lama hasil mode replace bisa berisi banyak row per key (mis. semua versi history)
+            duplicate = conn.execute(
+                f"SELECT {', '.join(keys)} FROM {target} GROUP BY {', '.join(keys)} HAVING COUNT(*) > 1 LIMIT 1"
+            ).fetchone()
+            if duplicate is not None:
+                raise ValueError(
+                    f"Tabel {table_name} sudah berisi duplicate {primary_key} (mis. {duplicate}); "
+                    f"dedupe atau drop tabel lama sebelum memakai if_exists='merge'"
+                )
+        index_name = quote_identifier(f"ux_{table_name}_{'_'.join(primary_key)}")
+        conn.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS {index_name} ON {target} ({', '.join(keys)})")
+
+        value_columns = [c for c in columns if c not in keys]
+        compare_columns = [quote_identifier(c) for c in df.columns
+                           if c not in primary_key and c not in excluded]
+        if value_columns and compare_columns:
+            assignments = ", ".join(f"{c} = excluded.{c}" for c in value_columns)
+            changed = " OR ".join(f"{target}.{c} IS NOT excluded.{c}" for c in compare_columns)
+            conflict = f"DO UPDATE SET {assignments} WHERE {changed}"
+        else:
+            conflict = "DO NOTHING"
+
+        before = conn.total_changes
+        conn.execute(
+            f"INSERT INTO {target} ({', '.join(columns)}) "
+            f"SELECT {', '.join(columns)} FROM {stage} WHERE true "
+            f"ON CONFLICT ({', '.join(keys)}) {conflict}"
+        )
+        written = conn.total_changes - before
+        conn.execute("COMMIT")
+        conn.execute(f"DROP TABLE IF EXISTS {stage}")
+
+        logging.info(f"Merge {table_name}: {written} rows inserted/updated, {len(df) - written} unchanged")
+    except Exception:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        raise
+    finally:
         conn.close()
-        logging.info(f"Berhasil load {len(df)} rows ke {db_name}.{table_name}")
+
+def load_to_sqlite(df, table_name, db_name, if_exists='replace', bulk=False,
+                   batch_size=50000, index_columns=None, primary_key=None, order_by=None,
+                   exclude_columns=None):
+    """
+    Load DataFrame ke SQLite database.
+    bulk=True memakai jalur bulk load (lihat _bulk_load_sqlite) untuk tabel besar;
+    index_columns (list kolom, atau list of list untuk composite) dibuat setelah load.
+    if_exists='merge' melakukan upsert berdasarkan primary_key (list kolom);
+    order_by dan exclude_columns dijelaskan di _merge_load_sqlite.
+    """
+    try:
+        db_path = get_db_path(db_name)
+        start = time.perf_counter()
+        mode = 'merge' if if_exists == 'merge' else 'bulk' if bulk else 'to_sql'
+        if if_exists == 'merge':
+            if not primary_key:
+                raise ValueError("if_exists='merge' membutuhkan primary_key")
+            primary_key = [primary_key] if isinstance(primary_key, str) else list(primary_key)
+            _merge_load_sqlite(df, table_name, db_path, primary_key, batch_size, order_by, exclude_columns)
+        elif bulk:
+            _bulk_load_sqlite(df, table_name, db_path, if_exists, batch_size, index_columns)
+        else:
+            conn = sqlite3.connect(db_path)
+            df.to_sql(table_name, conn, if_exists=if_exists, index=False)
+            conn.close()
+        elapsed = time.perf_counter() - start
+        rows_per_sec = len(df) / elapsed if elapsed > 0 else float("inf")
+        logging.info(
+            f"Berhasil load {len(df)} rows ke {db_name}.{table_name} "
+            f"({mode}, {elapsed:.2f}s, {rows_per_sec:,.0f} rows/s)"
+        )
         return True
     except Exception as e:
         logging.error(f"Error load data ke {db_name}.{table_name}: {e}")
         return False
 
-def load_to_parquet(df, filename):
+def _require_scd2_table(conn, table_name):
+    columns = {row[1] for row in conn.execute(f"PRAGMA table_info({quote_identifier(table_name)})")}
+    missing = {"row_hash", "valid_from", "valid_to", "is_current"} - columns
+    if missing:
+        raise ValueError(
+            f"Tabel {table_name} bukan dimensi SCD2 (tidak ada kolom {sorted(missing)}); "
+            f"rename/drop tabel lama sebelum memakai mode scd2"
+        )
+    return columns
+
+def read_scd2_current(table_name, db_name, key, keys=None, columns=("row_hash", "valid_from")):
+    """
+    Baca versi current (is_current = 1) dimensi SCD2: hanya key + columns.
+    keys membatasi ke key tertentu (lewat TEMP table), jadi biaya baca
+    sebanding dengan jumlah key yang diminta. Tabel belum ada = kosong.
+    """
+    columns = [c for c in columns if c != key]
+    empty = pd.DataFrame(columns=[key] + columns)
+    db_path = get_db_path(db_name)
+    if not Path(db_path).exists():
+        return empty
+
+    conn = sqlite3.connect(db_path)
+    try:
+        if not _table_exists(conn, table_name):
+            return empty
+        available = _require_scd2_table(conn, table_name)
+        columns = [c for c in columns if c in available]
+        select_list = ", ".join(f"t.{quote_identifier(c)}" for c in [key] + columns)
+        query = f"SELECT {select_list} FROM {quote_identifier(table_name)} t WHERE t.is_current = 1"
+        if keys is not None:
+            conn.execute("CREATE TEMP TABLE _scd2_keys (k PRIMARY KEY) WITHOUT ROWID")
+            conn.executemany(
+                "INSERT OR IGNORE INTO _scd2_keys (k) VALUES (?)",
+                ((k,) for k in pd.Series(keys).dropna().tolist())
+            )
+            query += f" AND t.{quote_identifier(key)} IN (SELECT k FROM temp._scd2_keys)"
+        return pd.read_sql_query(query, conn)
+    finally:
+        conn.close()
+
+def load_scd2_dimension(new_versions, expirations, table_name, db_name, key, batch_size=50000):
     """
-    Save DataFrame ke Parquet format
+    Load incremental dimensi SCD Type 2 dalam satu transaksi:
+    versi current yang digantikan di-expire (valid_to, is_current = 0),
+    lalu versi baru di-insert. Tabel dan index (key, is_current) dibuat
+    kalau belum ada.
+    """
+    try:
+        db_path = get_db_path(db_name)
+        start = time.perf_counter()
+        target = quote_identifier(table_name)
+        quoted_key = quote_identifier(key)
+
+        conn = sqlite3.connect(db_path, isolation_level=None)
+        try:
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("BEGIN IMMEDIATE")
+            if not _table_exists(conn, table_name):
+                conn.execute(pd.io.sql.get_schema(new_versions, table_name, con=conn))
+            else:
+                existing = _require_scd2_table(conn, table_name)
+                for col in new_versions.columns:
+                    if col not in existing:
+                        conn.execute(f"ALTER TABLE {target} ADD COLUMN {quote_identifier(col)}")
+            index_name = quote_identifier(f"ix_{table_name}_{key}_is_current")
+            conn.execute(f"CREATE INDEX IF NOT EXISTS {index_name} ON {target} ({quoted_key}, is_current)")
+
+            if expirations is not None and len(expirations) > 0:
+                conn.executemany(
+                    f"UPDATE {target} SET valid_to = ?, is_current = 0 WHERE {quoted_key} = ? AND is_current = 1",
+                    _sqlite_rows(expirations[["valid_to", key]])
+                )
+            _bulk_insert(conn, new_versions, table_name, batch_size)
+            conn.execute("COMMIT")
+        except Exception:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+        elapsed = time.perf_counter() - start
+        logging.info(
+            f"Berhasil load SCD2 {db_name}.{table_name}: {len(new_versions)} versi baru, "
+            f"{0 if expirations is None else len(expirations)} di-expire ({elapsed:.2f}s)"
+        )
+        return True
+    except Exception as e:
+        logging.error(f"Error load SCD2 ke {db_name}.{table_name}: {e}")
+        return False
+
+def _write_partitioned_parquet(df, dataset_dir, partition_cols, row_group_size, compression,
+                               existing_partitions):
+    """
+    Tulis dataset Parquet Hive-style (dataset_dir/kolom=value/part-*.parquet).
+    Nama file unik per run, jadi file lama tidak pernah ditimpa.
+    """
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    behavior = {
+        "append": "overwrite_or_ignore",   # tambah file baru, file lama tetap
+        "overwrite": "delete_matching"     # ganti partisi yang ada di batch ini saja
+    }
+    if existing_partitions not in behavior:
+        raise ValueError(f"existing_partitions harus 'append' atau 'overwrite', bukan {existing_partitions}")
+
+    run_id = f"{datetime.now().strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:8]}"
+    parquet_format = ds.ParquetFileFormat()
+    write_options = {}
+    if row_group_size:
+        write_options = {"max_rows_per_group": row_group_size, "min_rows_per_group": row_group_size}
+
+    ds.write_dataset(
+        pa.Table.from_pandas(df, preserve_index=False),
+        dataset_dir,
+        format=parquet_format,
+        partitioning=partition_cols,
+        partitioning_flavor="hive",
+        basename_template=f"part-{run_id}-{{i}}.parquet",
+        existing_data_behavior=behavior[existing_partitions],
+        file_options=parquet_format.make_write_options(compression=compression),
+        **write_options
+    )
+
+def _existing_days(dataset_dir, day_column):
+    """Kumpulkan value partisi {day_column}=YYYY-MM-DD yang sudah ada di dataset_dir."""
+    dataset_dir = Path(dataset_dir)
+    if not dataset_dir.is_dir():
+        return set()
+    prefix = f"{day_column}="
+    return {p.name[len(prefix):] for p in dataset_dir.rglob(f"{prefix}*") if p.is_dir()}
+
+def _retire_legacy_parquet(file_path, dataset_dir):
+    """
+    Output lama berupa satu file processed/{nama}.parquet sudah tidak diupdate
+    sejak output jadi dataset direktori. Rename ke .parquet.migrated supaya
+    reader lama gagal jelas, bukan diam-diam baca data basi.
+    """
+    if file_path.is_file():
+        legacy = file_path.with_name(file_path.name + ".migrated")
+        file_path.rename(legacy)
+        logging.warning(f"{file_path} sekarang dataset partisi di {dataset_dir}/; "
+                        f"file lama dipindah ke {legacy}, arahkan reader ke direktori dataset")
+
+def load_to_parquet(df, filename, partition_cols=None, partition_by_date=None,
+                    row_group_size=None, compression="snappy", existing_partitions="append"):
+    """
+    Save DataFrame ke Parquet format.
+    Dengan partition_cols dan/atau partition_by_date (nama kolom tanggal,
+    dipartisi per hari lewat kolom {kolom}_day) output jadi dataset Hive-style
+    di direktori processed/{nama file tanpa .parquet}/, bukan file
+    {nama}.parquet lagi (file lama dengan nama itu di-rename ke .migrated).
+
+    existing_partitions:
+    - "append": tambah file baru, partisi lama tidak disentuh
+    - "overwrite": ganti semua partisi yang ada di df ini
+    - "incremental" (butuh partition_by_date): hanya tulis hari yang belum
+      ada atau >= hari terakhir yang sudah ada; hari yang sudah tertutup
+      dianggap final dan dilewati. Pakai "overwrite" untuk backfill.
     """
     try:
         file_path = get_processed_path(filename)
-        df.to_parquet(file_path, index=False)
-        logging.info(f"Berhasil save ke {file_path}")
+        partition_cols = list(partition_cols or [])
+        if existing_partitions == "incremental" and not partition_by_date:
+            raise ValueError("existing_partitions='incremental' butuh partition_by_date")
+        if partition_by_date:
+            day_column = f"{partition_by_date}_day"
+            df = df.assign(**{day_column: pd.to_datetime(df[partition_by_date]).dt.strftime("%Y-%m-%d")})
+            partition_cols.append(day_column)
+
+        if partition_cols:
+            dataset_dir = file_path.with_suffix("")
+            _retire_legacy_parquet(file_path, dataset_dir)
+            if existing_partitions == "incremental":
+                existing = _existing_days(dataset_dir, day_column)
+                if existing:
+                    last_day = max(existing)
+                    keep = ~df[day_column].isin(existing) | (df[day_column] >= last_day)
+                    skipped = df.loc[~keep, day_column].nunique()
+                    df = df[keep]
+                    logging.info(f"{skipped} partisi {day_column} < {last_day} sudah ada, dilewati")
+                existing_partitions = "overwrite"
+                if df.empty:
+                    logging.info(f"Tidak ada partisi baru untuk {dataset_dir}")
+                    return True
+            _write_partitioned_parquet(df, dataset_dir, partition_cols, row_group_size,
+                                       compression, existing_partitions)
+            logging.info(f"Berhasil save {len(df)} rows ke {dataset_dir} (partisi: {', '.join(partition_cols)})")
+        else:
+            df.to_parquet(file_path, index=False, compression=compression, row_group_size=row_group_size)
+            logging.info(f"Berhasil save ke {file_path}")
         return True
     except Exception as e:
         logging.error(f"Error save parquet: {e}")
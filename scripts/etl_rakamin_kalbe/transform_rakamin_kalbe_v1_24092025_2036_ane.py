@@ -20,37 +20,172 @@ def clean_customer_data(df_customers):
         df_clean['customer_name'] = df_clean['customer_name'].str.title().str.strip()
     
     # Handle missing values
-    df_clean.fillna({
+    fill_values = {
         'email': 'unknown@email.com',
         'phone': '0000000000'
-    }, inplace=True)
+    }
+    for col, value in fill_values.items():
+        # Kolom category (hasil optimize_dtypes) harus punya kategori default-nya dulu
+        if col in df_clean.columns and isinstance(df_clean[col].dtype, pd.CategoricalDtype) \
+                and value not in df_clean[col].cat.categories:
+            df_clean[col] = df_clean[col].cat.add_categories([value])
+    df_clean.fillna(fill_values, inplace=True)
     
     # Add timestamp
     df_clean['processed_at'] = datetime.now()
     
     return df_clean
 
-def transform_orders(df_orders, df_customers):
+def _widen_numeric(series):
+    """int/float kecil -> int64/float64"""
+    if series.dtype.kind in 'iu':
+        return series.astype('int64')
+    if series.dtype.kind == 'f':
+        return series.astype('float64')
+    return series
+
+def optimize_dtypes(df, category_ratio=0.5, arrow_strings=False, exclude=None, name=""):
     """
-    Transformasi data orders dengan join customer
+    Kecilkan memory DataFrame tanpa mengubah nilainya:
+    - integer di-downcast ke tipe signed terkecil yang muat
+    - float di-downcast ke float32 hanya kalau tidak ada presisi yang hilang
+    - kolom string dengan rasio unique <= category_ratio jadi category;
+      sisanya jadi string[pyarrow] kalau arrow_strings=True
     """
-    # Merge dengan customer data
-    df_transformed = pd.merge(
-        df_orders, 
-        df_customers[['customer_id', 'customer_name', 'segment']], 
-        on='customer_id', 
-        how='left'
+    exclude = set(exclude or [])
+    before = df.memory_usage(deep=True).sum()
+    optimized = df.copy()
+
+    for col in df.columns:
+        series = df[col]
+        if col in exclude or isinstance(series.dtype, pd.CategoricalDtype) or series.dtype.kind == 'b':
+            continue
+
+        if series.dtype.kind in 'iu':
+            optimized[col] = pd.to_numeric(series, downcast='integer')
+        elif series.dtype.kind == 'f':
+            as_float32 = series.astype('float32')
+            if np.array_equal(as_float32.to_numpy(dtype='float64'), series.to_numpy(), equal_nan=True):
+                optimized[col] = as_float32
+        elif pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series):
+            try:
+                unique_count = series.nunique(dropna=True)
+            except TypeError:
+                continue  # isi kolom tidak hashable (list/dict)
+            if len(series) > 0 and unique_count / len(series) <= category_ratio:
+                optimized[col] = series.astype('category')
+            elif arrow_strings and pd.api.types.infer_dtype(series, skipna=True) == 'string':
+                optimized[col] = series.astype('string[pyarrow]')
+
+    after = optimized.memory_usage(deep=True).sum()
+    label = f" {name}" if name else ""
+    logging.info(
+        f"Optimize dtypes{label}: {before / 1024 ** 2:.2f} MB -> {after / 1024 ** 2:.2f} MB "
+        f"({(1 - after / before) * 100 if before else 0:.1f}% lebih kecil)"
     )
-    
+    return optimized
+
+# Kolom dimensi customer yang ikut di-join ke fact orders
+CUSTOMER_JOIN_COLUMNS = ['customer_name', 'segment']
+
+def build_customer_snapshot(df_customers, snapshot_column=None, as_of=None, columns=None):
+    """
+    Satu row per customer_id dari customer_data_history: versi terakhir
+    berdasarkan snapshot_column (default updated_at kalau ada, kalau tidak
+    urutan row), opsional hanya versi dengan snapshot_column <= as_of.
+    Hasilnya di-index customer_id (unique) supaya join ke orders tidak
+    menggandakan rows. Cukup dibuat sekali per run lalu dipakai ulang.
+    """
+    columns = [c for c in (columns or CUSTOMER_JOIN_COLUMNS) if c in df_customers.columns]
+    if snapshot_column is None and 'updated_at' in df_customers.columns:
+        snapshot_column = 'updated_at'
+
+    history = df_customers[df_customers['customer_id'].notna()]
+    if snapshot_column is not None:
+        history = history.assign(**{snapshot_column: pd.to_datetime(history[snapshot_column], errors='coerce')})
+        if as_of is not None:
+            history = history[history[snapshot_column] <= pd.Timestamp(as_of)]
+        # Stable sort: versi dengan timestamp sama tetap pakai urutan row
+        history = history.sort_values(snapshot_column, kind='mergesort', na_position='first')
+
+    snapshot = history.drop_duplicates('customer_id', keep='last').set_index('customer_id')[columns]
+    logging.info(f"Customer snapshot: {len(snapshot)} customers dari {len(df_customers)} history rows")
+    return snapshot
+
+def _is_customer_snapshot(df_customers):
+    return df_customers.index.name == 'customer_id' and df_customers.index.is_unique
+
+def _join_customers_as_of(df_orders, df_customers, as_of_column, snapshot_column):
+    """
+    Versi customer yang berlaku saat order (merge_asof backward per customer).
+    Order sebelum versi pertama customer (atau tanpa tanggal) memakai versi
+    pertama customer tersebut.
+    """
+    columns = [c for c in CUSTOMER_JOIN_COLUMNS if c in df_customers.columns]
+    history = df_customers.loc[df_customers['customer_id'].notna(), ['customer_id', snapshot_column] + columns]
+    history = history.assign(**{
+        snapshot_column: pd.to_datetime(history[snapshot_column], errors='coerce').astype('datetime64[ns]')
+    })
+    history = history[history[snapshot_column].notna()].sort_values(snapshot_column, kind='mergesort')
+
+    # Default: versi paling awal tiap customer
+    first_version = history.drop_duplicates('customer_id', keep='first').set_index('customer_id')[columns]
+    lookup = df_orders[['customer_id']].join(first_version, on='customer_id')[columns].reset_index(drop=True)
+
+    left = pd.DataFrame({
+        'customer_id': df_orders['customer_id'].to_numpy(),
+        as_of_column: df_orders[as_of_column].astype('datetime64[ns]').to_numpy(),
+        '_row': np.arange(len(df_orders))
+    })
+    left = left[left[as_of_column].notna() & left['customer_id'].notna()]
+    if left['customer_id'].dtype.kind in 'iu' and history['customer_id'].dtype.kind in 'iu':
+        # dtype key harus sama (optimize_dtypes bisa membuat int16 vs int32)
+        left['customer_id'] = left['customer_id'].astype('int64')
+        history = history.assign(customer_id=history['customer_id'].astype('int64'))
+    matched = pd.merge_asof(
+        left.sort_values(as_of_column, kind='mergesort'), history,
+        left_on=as_of_column, right_on=snapshot_column,
+        by='customer_id', direction='backward'
+    )
+    matched = matched[matched[snapshot_column].notna()]
+    for col in columns:
+        lookup.loc[matched['_row'].to_numpy(), col] = matched[col].to_numpy()
+
+    lookup.index = df_orders.index
+    return df_orders.join(lookup)
+
+def transform_orders(df_orders, df_customers, as_of_column=None, snapshot_column='updated_at'):
+    """
+    Transformasi data orders dengan join customer.
+    df_customers boleh berupa customer_data_history (snapshot dibuat di sini)
+    atau hasil build_customer_snapshot. Join lewat index customer_id yang
+    unique, jadi jumlah rows fact = jumlah orders.
+    as_of_column (mis. 'order_date'): pakai versi customer yang berlaku saat
+    order, butuh history lengkap dengan snapshot_column.
+    """
+    df_transformed = df_orders.copy()
+
     # Convert date columns
     date_columns = ['order_date', 'ship_date']
     for col in date_columns:
         if col in df_transformed.columns:
             df_transformed[col] = pd.to_datetime(df_transformed[col], errors='coerce')
+
+    # Join dengan customer data
+    if as_of_column is not None:
+        if _is_customer_snapshot(df_customers) or snapshot_column not in df_customers.columns:
+            raise ValueError(f"Join as-of butuh customer history dengan kolom {snapshot_column}")
+        df_transformed = _join_customers_as_of(df_transformed, df_customers, as_of_column, snapshot_column)
+    else:
+        snapshot = df_customers if _is_customer_snapshot(df_customers) else build_customer_snapshot(df_customers)
+        df_transformed = df_transformed.join(snapshot, on='customer_id')
     
     # Calculate derived metrics
     if all(col in df_transformed.columns for col in ['quantity', 'unit_price']):
-        df_transformed['total_amount'] = df_transformed['quantity'] * df_transformed['unit_price']
+        # Widen dulu supaya dtype kecil dari optimize_dtypes tidak overflow saat dikali
+        df_transformed['total_amount'] = (
+            _widen_numeric(df_transformed['quantity']) * _widen_numeric(df_transformed['unit_price'])
+        )
     
     # Filter valid records
     df_transformed = df_transformed[df_transformed['order_date'].notna()]
@@ -58,6 +193,80 @@ def transform_orders(df_orders, df_customers):
     logging.info(f"Orders transformed: {len(df_transformed)} records")
     return df_transformed
 
+# Atribut customer yang dilacak SCD Type 2 (perubahan = versi baru)
+CUSTOMER_TRACKED_COLUMNS = ['customer_name', 'email', 'phone', 'segment', 'city']
+
+def compute_row_hash(df, columns):
+    """
+    Hash 64-bit per row dari kolom atribut, sebagai int64 supaya muat di
+    INTEGER SQLite. Nilai dinormalisasi ke object dulu supaya dtype
+    (category, str, object) tidak mengubah hash.
+    """
+    values = df[columns].astype(object)
+    values = values.where(values.notna(), None)
+    hashes = pd.util.hash_pandas_object(values, index=False).to_numpy(dtype=np.uint64)
+    return pd.Series(hashes.view(np.int64), index=df.index)
+
+def build_scd2_changes(df_incoming, current, key='customer_id', tracked_columns=None,
+                       snapshot_column='updated_at', loaded_at=None):
+    """
+    Bandingkan batch history (biasanya hasil extract incremental) dengan
+    versi current di warehouse (current: hasil read_scd2_current dengan
+    kolom key, row_hash dan valid_from; boleh juga sudah di-index key) dan
+    return (new_versions, expirations).
+    Row batch yang tidak lebih baru dari valid_from versi current sudah
+    pernah diproses dan dilewati, jadi batch yang sama aman di-load ulang.
+    new_versions: hanya row yang atributnya berubah, plus row_hash,
+    valid_from (snapshot_column, atau loaded_at), valid_to dan is_current.
+    expirations: key + valid_to untuk versi current warehouse yang digantikan.
+    Biayanya sebanding dengan ukuran batch, bukan jumlah customer.
+    """
+    tracked = [c for c in (tracked_columns or CUSTOMER_TRACKED_COLUMNS) if c in df_incoming.columns]
+    if key in current.columns:
+        current = current.set_index(key)
+    elif current.index.name != key:
+        raise ValueError(f"current harus punya kolom atau index {key}")
+    if not current.index.is_unique:
+        raise ValueError(f"current berisi lebih dari satu versi current per {key}")
+    loaded_at = pd.Timestamp(loaded_at or datetime.now()).floor('s')
+
+    incoming = df_incoming[df_incoming[key].notna()].copy()
+    if snapshot_column in incoming.columns:
+        valid_from = pd.to_datetime(incoming[snapshot_column], errors='coerce').fillna(loaded_at)
+    else:
+        valid_from = pd.Series(loaded_at, index=incoming.index)
+    incoming['valid_from'] = valid_from
+
+    current_from = pd.to_datetime(current['valid_from'], errors='coerce') if 'valid_from' in current.columns \
+        else pd.Series(pd.NaT, index=current.index)
+    already_loaded = incoming['valid_from'] <= current_from.reindex(incoming[key]).to_numpy()
+    incoming = incoming[~already_loaded]
+
+    incoming['row_hash'] = compute_row_hash(incoming, tracked)
+    incoming = incoming.sort_values([key, 'valid_from'], kind='mergesort')
+
+    # Hash pembanding: versi sebelumnya di batch, atau versi current di warehouse
+    row_hash = incoming['row_hash'].astype('Int64')
+    previous = row_hash.groupby(incoming[key], sort=False).shift()
+    is_first = incoming.groupby(key, sort=False).cumcount() == 0
+    # .array (bukan to_numpy) supaya hash int64 tidak jadi float dan kehilangan presisi
+    previous[is_first] = current['row_hash'].astype('Int64').reindex(incoming.loc[is_first, key]).array
+    changed = (row_hash != previous).fillna(True).astype(bool)
+
+    new_versions = incoming[changed].copy()
+    new_versions['valid_to'] = new_versions.groupby(key, sort=False)['valid_from'].shift(-1)
+    new_versions['is_current'] = new_versions['valid_to'].isna().astype('int64')
+
+    first_new = new_versions.drop_duplicates(key, keep='first')
+    expired = first_new[first_new[key].isin(current.index)]
+    expirations = pd.DataFrame({key: expired[key].to_numpy(), 'valid_to': expired['valid_from'].to_numpy()})
+
+    logging.info(
+        f"SCD2: {len(incoming)} rows masuk, {len(new_versions)} versi baru, "
+        f"{len(expirations)} versi lama di-expire"
+    )
+    return new_versions.reset_index(drop=True), expirations
+
 def create_sales_summary(df_orders):
     """
     Buat summary sales aggregasi
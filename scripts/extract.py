@@ -1,54 +1,161 @@
 # scripts/extract.py
 import pandas as pd
+import numpy as np
+import hashlib
+import json
 import logging
+import operator
+import os
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 from pathlib import Path
 
 logger = logging.getLogger(__name__)
 
-def read_csv_file(file_path):
+DEFAULT_CHUNK_ROWS = 100_000
+
+# Filters use the same [(column, op, value), ...] format as pd.read_parquet
+FILTER_OPERATORS = {
+    "=": operator.eq, "==": operator.eq, "!=": operator.ne,
+    "<": operator.lt, "<=": operator.le, ">": operator.gt, ">=": operator.ge,
+}
+
+def apply_filters(df, filters):
+    """Apply [(column, op, value), ...] filters in memory, AND-ed together"""
+    if not filters:
+        return df
+    mask = np.ones(len(df), dtype=bool)
+    for column, op, value in filters:
+        op = str(op).lower()
+        if op == "in":
+            matched = df[column].isin(value)
+        elif op == "not in":
+            matched = ~df[column].isin(value)
+        elif op in FILTER_OPERATORS:
+            matched = FILTER_OPERATORS[op](df[column], value)
+        else:
+            raise ValueError(f"Unsupported filter operator: {op}")
+        mask &= matched.fillna(False).to_numpy(dtype=bool)
+    return df[mask]
+
+def _columns_to_read(columns, filters):
+    """Projected columns plus any filter column that must be read to evaluate filters"""
+    if columns is None:
+        return None
+    extra = [c for c, _, _ in filters or [] if c not in columns]
+    return list(columns) + list(dict.fromkeys(extra))
+
+def read_csv_file(file_path, columns=None):
     """Read CSV file into a DataFrame"""
     try:
-        df = pd.read_csv(file_path)
+        df = pd.read_csv(file_path, usecols=columns)
+        if columns is not None:
+            # usecols returns columns in file order, not in the requested order
+            df = df[list(columns)]
         logger.info(f"Successfully read CSV: {file_path}")
         return df
     except Exception as e:
         logger.error(f"Failed to read CSV {file_path}: {str(e)}")
         raise
 
-def read_excel_file(file_path, sheet_name=0):
+def read_excel_file(file_path, sheet_name=0, columns=None):
     """Read Excel file into a DataFrame"""
     try:
-        df = pd.read_excel(file_path, sheet_name=sheet_name)
+        df = pd.read_excel(file_path, sheet_name=sheet_name, usecols=columns)
+        if columns is not None:
+            df = df[list(columns)]
         logger.info(f"Successfully read Excel: {file_path}")
         return df
     except Exception as e:
         logger.error(f"Failed to read Excel {file_path}: {str(e)}")
         raise
 
-def read_json_file(file_path):
-    """Read JSON file into a DataFrame"""
+def read_json_file(file_path, lines=False, columns=None):
+    """Read JSON (or NDJSON when lines=True) file into a DataFrame"""
     try:
-        df = pd.read_json(file_path)
+        df = pd.read_json(file_path, lines=lines)
+        if columns is not None:
+            df = df[columns]
         logger.info(f"Successfully read JSON: {file_path}")
         return df
     except Exception as e:
         logger.error(f"Failed to read JSON {file_path}: {str(e)}")
         raise
 
-def read_parquet_file(file_path):
-    """Read Parquet file into a DataFrame"""
+def read_parquet_file(file_path, columns=None, filters=None):
+    """
+    Read Parquet file into a DataFrame.
+    columns and filters are pushed down to pyarrow, so unread columns are
+    never decoded and row groups whose statistics fail the filters are skipped.
+    """
     try:
-        df = pd.read_parquet(file_path)
+        df = pd.read_parquet(file_path, columns=columns, filters=filters)
         logger.info(f"Successfully read Parquet: {file_path}")
         return df
     except Exception as e:
         logger.error(f"Failed to read Parquet {file_path}: {str(e)}")
         raise
 
-def extract_data(file_path):
+def iter_csv_file(file_path, chunk_rows=DEFAULT_CHUNK_ROWS, columns=None):
+    """Yield a CSV file as DataFrames of at most chunk_rows rows"""
+    try:
+        with pd.read_csv(file_path, chunksize=chunk_rows, usecols=columns) as reader:
+            for chunk in reader:
+                # usecols returns columns in file order, not in the requested order
+                yield chunk if columns is None else chunk[list(columns)]
+        logger.info(f"Successfully streamed CSV: {file_path}")
+    except Exception as e:
+        logger.error(f"Failed to stream CSV {file_path}: {str(e)}")
+        raise
+
+def iter_json_file(file_path, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """Yield a newline-delimited JSON file as DataFrames of at most chunk_rows rows"""
+    try:
+        with pd.read_json(file_path, lines=True, chunksize=chunk_rows) as reader:
+            for chunk in reader:
+                yield chunk
+        logger.info(f"Successfully streamed NDJSON: {file_path}")
+    except Exception as e:
+        logger.error(f"Failed to stream NDJSON {file_path}: {str(e)}")
+        raise
+
+def iter_parquet_file(file_path, chunk_rows=DEFAULT_CHUNK_ROWS, columns=None, filters=None):
+    """
+    Yield a Parquet file one row group at a time.
+    Row groups larger than chunk_rows are split into smaller batches.
+    With filters, row groups are pruned by their statistics and the
+    remaining rows are filtered by pyarrow before reaching pandas.
+    """
+    import pyarrow.parquet as pq
+
+    try:
+        if filters:
+            import pyarrow.dataset as ds
+
+            dataset = ds.dataset(file_path, format="parquet")
+            batches = dataset.to_batches(
+                columns=columns, filter=pq.filters_to_expression(filters), batch_size=chunk_rows
+            )
+            for batch in batches:
+                if batch.num_rows:
+                    yield batch.to_pandas()
+        else:
+            parquet_file = pq.ParquetFile(file_path)
+            for i in range(parquet_file.num_row_groups):
+                for batch in parquet_file.iter_batches(batch_size=chunk_rows, row_groups=[i], columns=columns):
+                    yield batch.to_pandas()
+        logger.info(f"Successfully streamed Parquet: {file_path}")
+    except Exception as e:
+        logger.error(f"Failed to stream Parquet {file_path}: {str(e)}")
+        raise
+
+def extract_data(file_path, columns=None, filters=None):
     """
     Main function to extract data from a single file,
     supporting multiple formats.
+
+    columns limits the columns returned and filters ([(column, op, value), ...])
+    limits the rows. Both are pushed down for Parquet; CSV/Excel only parse
+    the needed columns and filter in memory.
     """
     file_path = Path(file_path)
 
@@ -57,46 +164,251 @@ def extract_data(file_path):
         raise FileNotFoundError(f"File not found: {file_path}")
 
     suffix = file_path.suffix.lower()
+    if suffix == '.parquet':
+        return read_parquet_file(file_path, columns=columns, filters=filters)
+
+    read_columns = _columns_to_read(columns, filters)
     if suffix == '.csv':
-        return read_csv_file(file_path)
+        df = read_csv_file(file_path, columns=read_columns)
     elif suffix in ['.xlsx', '.xls']:
-        return read_excel_file(file_path)
+        df = read_excel_file(file_path, columns=read_columns)
     elif suffix == '.json':
-        return read_json_file(file_path)
-    elif suffix == '.parquet':
-        return read_parquet_file(file_path)
+        df = read_json_file(file_path, columns=read_columns)
+    elif suffix in ['.jsonl', '.ndjson']:
+        df = read_json_file(file_path, lines=True, columns=read_columns)
     else:
         logger.error(f"Unsupported file format: {suffix}")
         raise ValueError(f"Unsupported file format: {suffix}")
 
-def extract_from_folder(folder_path, recursive=True):
+    df = apply_filters(df, filters)
+    if columns is not None and len(read_columns) > len(columns):
+        df = df[list(columns)]
+    return df
+
+def iter_extract(file_path, chunk_rows=DEFAULT_CHUNK_ROWS, columns=None, filters=None):
     """
-    Extract all supported files within a folder (recursively if True).
-    Returns a single concatenated DataFrame.
+    Streaming counterpart of extract_data.
+    Yields DataFrames of at most chunk_rows rows so memory stays flat
+    regardless of file size. CSV, NDJSON (.jsonl/.ndjson) and Parquet are
+    read incrementally; formats that cannot be streamed (Excel, plain JSON)
+    are read once and sliced. columns/filters behave as in extract_data,
+    so filtered chunks may be smaller than chunk_rows.
     """
-    folder_path = Path(folder_path)
-    if not folder_path.exists() or not folder_path.is_dir():
-        raise NotADirectoryError(f"Not a valid folder: {folder_path}")
+    file_path = Path(file_path)
+
+    if not file_path.exists():
+        logger.error(f"File not found: {file_path}")
+        raise FileNotFoundError(f"File not found: {file_path}")
+    if chunk_rows <= 0:
+        raise ValueError(f"chunk_rows must be positive, got {chunk_rows}")
+
+    suffix = file_path.suffix.lower()
+    if suffix == '.parquet':
+        yield from iter_parquet_file(file_path, chunk_rows, columns=columns, filters=filters)
+        return
+    if suffix in ['.xlsx', '.xls', '.json']:
+        logger.warning(f"{suffix} cannot be streamed, reading {file_path} fully before chunking")
+        df = extract_data(file_path, columns=columns, filters=filters)
+        for start in range(0, len(df), chunk_rows):
+            yield df.iloc[start:start + chunk_rows]
+        return
+
+    read_columns = _columns_to_read(columns, filters)
+    if suffix == '.csv':
+        chunks = iter_csv_file(file_path, chunk_rows, columns=read_columns)
+    elif suffix in ['.jsonl', '.ndjson']:
+        chunks = iter_json_file(file_path, chunk_rows)
+    else:
+        logger.error(f"Unsupported file format: {suffix}")
+        raise ValueError(f"Unsupported file format: {suffix}")
+
+    for chunk in chunks:
+        chunk = apply_filters(chunk, filters)
+        if filters and chunk.empty:
+            continue
+        if read_columns is not None:
+            chunk = chunk[list(columns)]
+        yield chunk
 
-    all_dfs = []
-    patterns = ["*.csv", "*.xlsx", "*.xls", "*.json", "*.parquet"]
+SUPPORTED_PATTERNS = ["*.csv", "*.xlsx", "*.xls", "*.json", "*.parquet"]
+# Opt-in: folders that never ingested NDJSON keep their old file set
+NDJSON_PATTERNS = ["*.jsonl", "*.ndjson"]
 
+def list_supported_files(folder_path, recursive=True, include_ndjson=False):
+    """
+    List supported files within a folder in a deterministic order
+    (pattern order first, then sorted path within each pattern).
+    .jsonl/.ndjson files are only listed with include_ndjson=True.
+    """
+    folder_path = Path(folder_path)
+    patterns = SUPPORTED_PATTERNS + (NDJSON_PATTERNS if include_ndjson else [])
+    files = []
     for pattern in patterns:
-        files = folder_path.rglob(pattern) if recursive else folder_path.glob(pattern)
+        matched = folder_path.rglob(pattern) if recursive else folder_path.glob(pattern)
+        files.extend(sorted(matched))
+    return files
+
+def _iter_file_frames(files, max_workers=1, executor="thread"):
+    """
+    Yield (file, DataFrame) for every readable file, in input order.
+    Unreadable files are logged and skipped.
+    """
+    if max_workers is None or max_workers <= 1:
         for f in files:
             try:
-                df = extract_data(f)
-                df["source_file"] = f.name  # add a column to track origin
-                all_dfs.append(df)
+                yield f, extract_data(f)
             except Exception as e:
                 logger.warning(f"Skipping file {f}: {e}")
+        return
 
-    if all_dfs:
-        return pd.concat(all_dfs, ignore_index=True)
-    else:
+    pool_cls = ProcessPoolExecutor if executor == "process" else ThreadPoolExecutor
+    with pool_cls(max_workers=max_workers) as pool:
+        futures = [pool.submit(extract_data, f) for f in files]
+        for f, future in zip(files, futures):
+            try:
+                yield f, future.result()
+            except Exception as e:
+                logger.warning(f"Skipping file {f}: {e}")
+
+def _concat_with_source(file_frames):
+    """
+    Concatenate (file, DataFrame) pairs and add a source_file column
+    to track origin. source_file is built once after the concat instead
+    of being inserted into every frame beforehand. pd.concat still
+    materialises the list of all frames, so peak memory is the same as
+    concatenating a list. source_file stays a plain object column, the
+    same dtype callers got when it was inserted per frame.
+    """
+    names, lengths = [], []
+
+    def frames():
+        for f, df in file_frames:
+            names.append(f.name)
+            lengths.append(len(df))
+            yield df
+
+    try:
+        combined = pd.concat(frames(), ignore_index=True)
+    except ValueError:
+        if names:
+            raise
+        # pd.concat raises on an empty iterable
         logger.warning("No files were successfully read.")
         return pd.DataFrame()
 
+    combined["source_file"] = np.repeat(np.array(names, dtype=object), lengths)
+    return combined
+
+def file_content_hash(file_path, block_size=1 << 20):
+    """Return the SHA-256 hex digest of a file's content"""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def load_manifest(manifest_path):
+    """Load a folder extraction manifest, or an empty one if missing"""
+    manifest_path = Path(manifest_path)
+    if not manifest_path.exists():
+        return {"files": {}}
+    with open(manifest_path, "r") as f:
+        return json.load(f)
+
+def save_manifest(manifest_path, manifest):
+    """Write the manifest atomically so a crash never leaves it half-written"""
+    manifest_path = Path(manifest_path)
+    manifest_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = manifest_path.with_suffix(manifest_path.suffix + ".tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, manifest_path)
+
+def select_changed_files(files, folder_path, manifest, full_rescan=False):
+    """
+    Compare files against the manifest.
+    Returns (changed_files, entries) where entries maps each file's
+    manifest key to its fresh {size, mtime_ns, sha256} record.
+    Size and mtime are checked first; the content hash is only computed
+    when they differ, so unchanged files cost a stat() call.
+    """
+    known = manifest.get("files", {})
+    changed, entries = [], {}
+
+    for f in files:
+        key = f.relative_to(folder_path).as_posix()
+        stat = f.stat()
+        previous = known.get(key)
+
+        if (not full_rescan and previous
+                and previous["size"] == stat.st_size
+                and previous["mtime_ns"] == stat.st_mtime_ns):
+            entries[key] = previous
+            continue
+
+        entry = {
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "sha256": file_content_hash(f),
+        }
+        entries[key] = entry
+        if full_rescan or not previous or previous["sha256"] != entry["sha256"]:
+            changed.append(f)
+
+    return changed, entries
+
+def extract_from_folder(folder_path, recursive=True, max_workers=1, executor="thread",
+                        manifest_path=None, full_rescan=False, include_ndjson=False):
+    """
+    Extract all supported files within a folder (recursively if True).
+    Returns a single concatenated DataFrame.
+
+    With max_workers > 1 files are read on a thread (or process, with
+    executor="process") pool. Output order is the same as the serial
+    path regardless of which file finishes first.
+
+    With manifest_path set, only files that are new or whose content
+    changed since the last run are read, and the manifest is updated
+    afterwards. full_rescan=True reads every file again and rebuilds
+    the manifest.
+
+    include_ndjson=True also ingests .jsonl/.ndjson files, which older
+    versions ignored.
+    """
+    folder_path = Path(folder_path)
+    if not folder_path.exists() or not folder_path.is_dir():
+        raise NotADirectoryError(f"Not a valid folder: {folder_path}")
+    if executor not in ("thread", "process"):
+        raise ValueError(f"Unsupported executor: {executor}")
+
+    files = list_supported_files(folder_path, recursive=recursive, include_ndjson=include_ndjson)
+    if manifest_path is None:
+        return _concat_with_source(_iter_file_frames(files, max_workers, executor))
+
+    manifest = load_manifest(manifest_path)
+    changed, entries = select_changed_files(files, folder_path, manifest, full_rescan)
+    logger.info(f"Manifest: {len(changed)} of {len(files)} files new or changed in {folder_path}")
+    if not changed:
+        manifest["files"] = entries
+        save_manifest(manifest_path, manifest)
+        return pd.DataFrame()
+
+    read_ok = set()
+    def track(file_frames):
+        for f, df in file_frames:
+            read_ok.add(f)
+            yield f, df
+
+    combined = _concat_with_source(track(_iter_file_frames(changed, max_workers, executor)))
+
+    # Files that failed to read stay out of the manifest so the next run retries them
+    for f in changed:
+        if f not in read_ok:
+            entries.pop(f.relative_to(folder_path).as_posix(), None)
+    manifest["files"] = entries
+    save_manifest(manifest_path, manifest)
+    return combined
+
 # Example usage
 if __name__ == "__main__":
     try:
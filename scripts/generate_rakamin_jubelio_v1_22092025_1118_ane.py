@@ -16,15 +16,24 @@ ROWS_PER_FILE = 20    # rows per file
 
 np.random.seed(42)
 
-def generate_orders(n_rows: int):
-    """Generate synthetic order data with shipping labels."""
-    order_ids = np.arange(1, n_rows + 1)
-    customer_ids = np.random.randint(1000, 2000, size=n_rows)
-    items = np.random.choice(["Laptop", "Phone", "Tablet", "Headphones", "Camera"], size=n_rows)
-    quantities = np.random.randint(1, 5, size=n_rows)
-    prices = np.round(np.random.uniform(50, 2000, size=n_rows), 2)
+def generate_orders(n_rows: int, start_id: int = 1, rng=None):
+    """
+    Generate synthetic order data with shipping labels.
+    rng: numpy Generator for reproducible, independent chunks; defaults to the
+    global np.random state seeded above.
+    """
+    if rng is None:
+        rng = np.random
+        integers = np.random.randint
+    else:
+        integers = rng.integers
+    order_ids = np.arange(start_id, start_id + n_rows)
+    customer_ids = integers(1000, 2000, size=n_rows)
+    items = rng.choice(["Laptop", "Phone", "Tablet", "Headphones", "Camera"], size=n_rows)
+    quantities = integers(1, 5, size=n_rows)
+    prices = np.round(rng.uniform(50, 2000, size=n_rows), 2)
     total = quantities * prices
-    labels = np.random.choice(["STANDARD", "EXPRESS", "ECONOMY", "PICKUP"], size=n_rows)
+    labels = rng.choice(["STANDARD", "EXPRESS", "ECONOMY", "PICKUP"], size=n_rows)
 
     df = pd.DataFrame({
         "order_id": order_ids,
@@ -38,7 +47,22 @@ def generate_orders(n_rows: int):
     })
     return df
 
-def main():
+def write_order_files(raw_dir, total_rows, rows_per_file, seed=42, prefix="orders"):
+    """
+    Write total_rows synthetic orders as CSV files of at most rows_per_file rows.
+    Files are generated one at a time, so memory stays bounded by rows_per_file.
+    """
+    os.makedirs(raw_dir, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    files = []
+    for i, start in enumerate(range(0, total_rows, rows_per_file), start=1):
+        n_rows = min(rows_per_file, total_rows - start)
+        file_path = os.path.join(raw_dir, f"{prefix}_v{i:04d}.csv")
+        generate_orders(n_rows, start_id=start + 1, rng=rng).to_csv(file_path, index=False)
+        files.append(file_path)
+    return files
+
+def main(n_files=N_FILES, rows_per_file=ROWS_PER_FILE):
     os.makedirs(RAW_DIR, exist_ok=True)
     os.makedirs(PROCESSED_DIR, exist_ok=True)
     os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
@@ -47,8 +71,8 @@ def main():
 
     # Generate multiple raw files
     raw_files = []
-    for i in range(1, N_FILES + 1):
-        df = generate_orders(ROWS_PER_FILE)
+    for i in range(1, n_files + 1):
+        df = generate_orders(rows_per_file)
         file_path = os.path.join(RAW_DIR, f"orders_{today_str}_v{i}.csv")
         df.to_csv(file_path, index=False)
         raw_files.append(file_path)
@@ -75,4 +99,9 @@ def main():
     print(f"Exported shipping labels summary: {export_labels_path}")
 
 if __name__ == "__main__":
-    main()
+    import argparse
+    parser = argparse.ArgumentParser(description="Generate synthetic orders")
+    parser.add_argument("--files", type=int, default=N_FILES, help="number of raw files")
+    parser.add_argument("--rows-per-file", type=int, default=ROWS_PER_FILE, help="rows per file")
+    args = parser.parse_args()
+    main(args.files, args.rows_per_file)
@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+"""
+Synthetic generator untuk source database rakamin_kalbe.db.
+Tabel yang dibuat sama dengan yang diekstrak GovernedETLPipeline:
+orders, sales, customer_data_history, category_db. Data referentially
+consistent (orders -> customer & category, sales -> orders).
+
+Data dibuat per chunk di worker process; setiap chunk punya seed sendiri
+(default_rng([seed, tabel, chunk])) sehingga hasilnya identik berapapun
+jumlah worker-nya. Semua write (SQLite / file) dilakukan di main process.
+
+    python scripts/generate_rakamin_kalbe_v1_17102026_ane.py --customers 100000 --orders 10000000 --workers 4
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Base path configuration
+BASE_DIR = Path(__file__).parent.parent
+DB_PATH = BASE_DIR / "data" / "database" / "rakamin_kalbe.db"
+
+DEFAULT_SEED = 42
+DEFAULT_CHUNK_ROWS = 250_000
+
+# Id tetap per tabel untuk seed chunk (jangan diubah supaya output tetap reproducible)
+TABLE_IDS = {"customer_data_history": 1, "orders": 2, "category_db": 3}
+
+FIRST_NAMES = np.array([
+    "andi", "budi", "citra", "dewi", "eko", "fitri", "gilang", "hana", "indra", "joko",
+    "kartika", "lukman", "maya", "nanda", "oki", "putri", "rizky", "sari", "tono", "wulan"
+])
+LAST_NAMES = np.array([
+    "pratama", "saputra", "wijaya", "kusuma", "santoso", "hidayat", "nugroho", "lestari",
+    "permata", "siregar", "simanjuntak", "halim", "gunawan", "setiawan", "rahman"
+])
+EMAIL_DOMAINS = np.array(["gmail.com", "yahoo.co.id", "outlook.com", "kalbe.co.id"])
+CITIES = np.array(["Jakarta", "Bandung", "Surabaya", "Medan", "Semarang", "Makassar", "Denpasar", "Yogyakarta"])
+SEGMENTS = np.array(["Consumer", "Corporate", "Home Office"])
+ORDER_STATUSES = np.array(["completed", "shipped", "pending", "cancelled"])
+ORDER_STATUS_WEIGHTS = [0.70, 0.15, 0.10, 0.05]
+PAYMENT_METHODS = np.array(["transfer", "ewallet", "credit_card", "cod"])
+
+CATEGORIES = [
+    # category_id, category_name, parent_category, min_price, max_price
+    (1, "Obat Bebas", "Pharmaceuticals", 3_000, 50_000),
+    (2, "Obat Resep", "Pharmaceuticals", 10_000, 250_000),
+    (3, "Vitamin & Suplemen", "Consumer Health", 20_000, 300_000),
+    (4, "Nutrisi Dewasa", "Nutritionals", 50_000, 400_000),
+    (5, "Nutrisi Anak", "Nutritionals", 40_000, 350_000),
+    (6, "Minuman Kesehatan", "Consumer Health", 5_000, 30_000),
+    (7, "Alat Kesehatan", "Medical Devices", 25_000, 1_500_000),
+    (8, "Perawatan Tubuh", "Consumer Health", 10_000, 150_000),
+]
+
+
+def chunk_rng(seed, table, chunk_index):
+    """Generator per (seed, tabel, chunk): independen dari jumlah worker"""
+    return np.random.default_rng([seed, TABLE_IDS[table], chunk_index])
+
+
+def build_category_db():
+    return pd.DataFrame(
+        [c[:3] for c in CATEGORIES],
+        columns=["category_id", "category_name", "parent_category"]
+    )
+
+
+def generate_customer_chunk(seed, chunk_index, start_id, n_customers, max_versions, start_date, days):
+    """
+    customer_data_history untuk customer_id [start_id, start_id + n_customers).
+    Setiap customer punya 1..max_versions versi; versi berikutnya punya
+    updated_at lebih baru dan email/phone/segment/city yang bisa berubah.
+    """
+    rng = chunk_rng(seed, "customer_data_history", chunk_index)
+    customer_ids = np.arange(start_id, start_id + n_customers)
+    first = FIRST_NAMES[rng.integers(0, len(FIRST_NAMES), n_customers)]
+    last = LAST_NAMES[rng.integers(0, len(LAST_NAMES), n_customers)]
+    versions = rng.integers(1, max_versions + 1, n_customers)
+
+    # Satu row per versi
+    ids = np.repeat(customer_ids, versions)
+    n_rows = len(ids)
+    first, last = np.repeat(first, versions), np.repeat(last, versions)
+    version_no = np.arange(n_rows) - np.repeat(np.cumsum(versions) - versions, versions) + 1
+
+    # Versi pertama di paruh awal window, versi berikutnya maju 1..60 hari
+    first_seen = np.repeat(rng.integers(0, max(days // 2, 1) * 86_400, n_customers), versions)
+    offsets = np.where(version_no > 1, rng.integers(86_400, 60 * 86_400, n_rows), 0)
+    offsets = pd.Series(offsets).groupby(ids).cumsum().to_numpy()
+    updated_at = pd.Timestamp(start_date) + pd.to_timedelta(first_seen + offsets, unit="s")
+
+    names = pd.Series(first).str.title() + " " + pd.Series(last).str.title()
+    emails = (
+        pd.Series(first) + "." + pd.Series(last) + ids.astype(str)
+        + np.where(version_no > 1, "v" + version_no.astype(str), "")
+        + "@" + EMAIL_DOMAINS[rng.integers(0, len(EMAIL_DOMAINS), n_rows)]
+    )
+    phones = pd.Series("08" + rng.integers(10**9, 10**10, n_rows).astype(str))
+    # Sebagian kecil email/phone kosong supaya clean_customer_data ada kerjaan
+    emails[rng.random(n_rows) < 0.02] = None
+    phones[rng.random(n_rows) < 0.05] = None
+
+    return pd.DataFrame({
+        "customer_id": ids,
+        "version": version_no,
+        "customer_name": names,
+        "email": emails,
+        "phone": phones,
+        "segment": SEGMENTS[rng.integers(0, len(SEGMENTS), n_rows)],
+        "city": CITIES[rng.integers(0, len(CITIES), n_rows)],
+        "updated_at": updated_at
+    })
+
+
+def generate_order_chunk(seed, chunk_index, start_id, n_orders, n_customers, start_date, days):
+    """
+    orders [start_id, start_id + n_orders) dan sales-nya.
+    Order completed/shipped punya tepat satu row sales (sale_id = order_id).
+    """
+    rng = chunk_rng(seed, "orders", chunk_index)
+    order_ids = np.arange(start_id, start_id + n_orders)
+    customer_ids = rng.integers(1, n_customers + 1, n_orders)
+    category_index = rng.integers(0, len(CATEGORIES), n_orders)
+    min_price = np.array([c[3] for c in CATEGORIES])[category_index]
+    max_price = np.array([c[4] for c in CATEGORIES])[category_index]
+    unit_price = (rng.uniform(min_price, max_price) // 500 * 500).astype(np.int64)
+    quantity = rng.integers(1, 11, n_orders)
+    status = ORDER_STATUSES[rng.choice(len(ORDER_STATUSES), n_orders, p=ORDER_STATUS_WEIGHTS)]
+
+    order_date = pd.Timestamp(start_date) + pd.to_timedelta(rng.integers(0, days * 86_400, n_orders), unit="s")
+    shipped = np.isin(status, ["completed", "shipped"])
+    ship_date = pd.Series(order_date + pd.to_timedelta(rng.integers(0, 7, n_orders), unit="D"))
+    ship_date[~shipped] = pd.NaT
+
+    orders = pd.DataFrame({
+        "order_id": order_ids,
+        "customer_id": customer_ids,
+        "category_id": np.array([c[0] for c in CATEGORIES])[category_index],
+        "order_date": order_date,
+        "ship_date": ship_date,
+        "quantity": quantity,
+        "unit_price": unit_price,
+        "amount": quantity * unit_price,
+        "status": status
+    })
+
+    paid = orders[shipped]
+    sales = pd.DataFrame({
+        "sale_id": paid["order_id"].to_numpy(),
+        "order_id": paid["order_id"].to_numpy(),
+        "customer_id": paid["customer_id"].to_numpy(),
+        "sale_date": (paid["order_date"] + pd.to_timedelta(rng.integers(0, 3, len(paid)), unit="D")).to_numpy(),
+        "amount": paid["amount"].to_numpy(),
+        "payment_method": PAYMENT_METHODS[rng.integers(0, len(PAYMENT_METHODS), len(paid))]
+    })
+    return {"orders": orders, "sales": sales}
+
+
+def chunk_ranges(total, chunk_rows):
+    """[(chunk_index, start_id, n_rows)], id mulai dari 1"""
+    return [(i, start + 1, min(chunk_rows, total - start)) for i, start in enumerate(range(0, total, chunk_rows))]
+
+
+def iter_chunks(func, tasks, max_workers):
+    """
+    Jalankan func(*task) untuk setiap task dan yield hasilnya sesuai urutan task.
+    Dengan max_workers > 1 chunk dibuat di worker process; jumlah chunk yang
+    sedang dikerjakan/menunggu dibatasi supaya memory tetap terkendali
+    walaupun writer lebih lambat dari generator.
+    """
+    if max_workers <= 1:
+        for task in tasks:
+            yield func(*task)
+        return
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        in_flight = deque()
+        for task in tasks:
+            in_flight.append(executor.submit(func, *task))
+            if len(in_flight) >= max_workers * 2:
+                yield in_flight.popleft().result()
+        while in_flight:
+            yield in_flight.popleft().result()
+
+
+class ChunkWriter:
+    """Tulis chunk ke SQLite dan/atau file per tabel (part-00000.csv/.parquet)"""
+    def __init__(self, db_path=None, files_dir=None, file_format="parquet", replace=True):
+        self.files_dir = Path(files_dir) if files_dir else None
+        self.file_format = file_format
+        self.parts = {}
+        self.rows = {}
+        self.conn = None
+        if db_path:
+            db_path = Path(db_path)
+            db_path.parent.mkdir(parents=True, exist_ok=True)
+            if replace and db_path.exists():
+                db_path.unlink()
+            self.conn = sqlite3.connect(db_path)
+            # Database hasil generate bisa dibuat ulang, jadi durability tidak perlu
+            self.conn.execute("PRAGMA journal_mode = OFF")
+            self.conn.execute("PRAGMA synchronous = OFF")
+        if self.files_dir and replace:
+            for table in ["orders", "sales", "customer_data_history", "category_db"]:
+                for old in (self.files_dir / table).glob("part-*"):
+                    old.unlink()
+
+    def write(self, table, df):
+        self.rows[table] = self.rows.get(table, 0) + len(df)
+        if self.conn is not None:
+            df.to_sql(table, self.conn, if_exists="append", index=False)
+        if self.files_dir:
+            part = self.parts.get(table, 0)
+            self.parts[table] = part + 1
+            table_dir = self.files_dir / table
+            table_dir.mkdir(parents=True, exist_ok=True)
+            path = table_dir / f"part-{part:05d}.{self.file_format}"
+            if self.file_format == "csv":
+                df.to_csv(path, index=False)
+            else:
+                df.to_parquet(path, index=False)
+
+    def close(self):
+        if self.conn is not None:
+            # Index dibuat sekali di akhir, jauh lebih cepat daripada per insert
+            for table, column in [("orders", "customer_id"), ("sales", "order_id"),
+                                  ("customer_data_history", "customer_id")]:
+                if table in self.rows:
+                    self.conn.execute(f"CREATE INDEX IF NOT EXISTS ix_{table}_{column} ON {table} ({column})")
+            self.conn.commit()
+            self.conn.close()
+            self.conn = None
+
+
+def generate_rakamin_kalbe(n_customers, n_orders, db_path=DB_PATH, files_dir=None, file_format="parquet",
+                           chunk_rows=DEFAULT_CHUNK_ROWS, max_workers=1, seed=DEFAULT_SEED,
+                           max_versions=3, start_date="2024-01-01", days=365):
+    """Generate semua tabel; return dict tabel -> jumlah rows"""
+    if n_customers < 1:
+        raise ValueError("n_customers minimal 1")
+    if not db_path and not files_dir:
+        raise ValueError("Isi db_path dan/atau files_dir")
+
+    writer = ChunkWriter(db_path, files_dir, file_format)
+    try:
+        writer.write("category_db", build_category_db())
+
+        customer_tasks = [
+            (seed, index, start_id, n, max_versions, start_date, days)
+            for index, start_id, n in chunk_ranges(n_customers, chunk_rows)
+        ]
+        for df in iter_chunks(generate_customer_chunk, customer_tasks, max_workers):
+            writer.write("customer_data_history", df)
+
+        order_tasks = [
+            (seed, index, start_id, n, n_customers, start_date, days)
+            for index, start_id, n in chunk_ranges(n_orders, chunk_rows)
+        ]
+        for i, frames in enumerate(iter_chunks(generate_order_chunk, order_tasks, max_workers), start=1):
+            writer.write("orders", frames["orders"])
+            writer.write("sales", frames["sales"])
+            print(f"  orders chunk {i}/{len(order_tasks)}", flush=True)
+    finally:
+        writer.close()
+    return writer.rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate source data rakamin_kalbe (SQLite dan/atau file)")
+    parser.add_argument("--customers", type=int, default=10_000)
+    parser.add_argument("--orders", type=int, default=100_000)
+    parser.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--max-versions", type=int, default=3, help="Maksimum versi per customer di history")
+    parser.add_argument("--start-date", default="2024-01-01")
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--db", type=Path, default=DB_PATH, help="Path SQLite output")
+    parser.add_argument("--no-db", action="store_true", help="Jangan tulis SQLite")
+    parser.add_argument("--files-dir", type=Path, help="Tulis juga file per tabel ke folder ini")
+    parser.add_argument("--format", choices=["csv", "parquet"], default="parquet")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    rows = generate_rakamin_kalbe(
+        args.customers, args.orders,
+        db_path=None if args.no_db else args.db,
+        files_dir=args.files_dir,
+        file_format=args.format,
+        chunk_rows=args.chunk_rows,
+        max_workers=args.workers,
+        seed=args.seed,
+        max_versions=args.max_versions,
+        start_date=args.start_date,
+        days=args.days
+    )
+    print(f"Generated in {time.perf_counter() - start:.1f}s: {rows}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,7 +1,10 @@
+import json
 import pandas as pd
 import sqlite3
 from pathlib import Path
 
+from scripts.quality_rakamin_kalbe.streaming_quality_rakamin_kalbe_v1_17102026_ane import HyperLogLog, hash_values
+
 # Base path configuration
 BASE_DIR = Path(__file__).parent.parent.parent
 DATA_DIR = BASE_DIR / "data"
@@ -9,38 +12,159 @@ DB_DEV_DIR = DATA_DIR / "database"
 DB_DIR = DB_DEV_DIR / "dev"
 DOCS_DIR = BASE_DIR / "docs"
 
+def profile_columns(df, sample_rows=None, approx_distinct=False, hll_precision=14):
+    """
+    Statistik semua kolom dalam satu pass per jenis statistik.
+    null_count selalu exact (isna().sum() atas seluruh frame).
+    unique_count: exact (nunique), HyperLogLog kalau approx_distinct=True,
+    atau dihitung dari sample_rows baris kalau tabelnya lebih besar dari itu
+    (kolom yang di sample semuanya unik dianggap key, di-scale ke total rows).
+    Kolom lain di mode sample hanya punya distinct count sample, bukan angka
+    full-table; namanya dicatat di attrs["sampled_columns"].
+    """
+    total_rows = len(df)
+    null_counts = df.isna().sum()
+    sampled_columns = []
+
+    if approx_distinct:
+        unique_counts = {}
+        for column in df.columns:
+            hll = HyperLogLog(hll_precision)
+            hll.add_hashes(hash_values(df[column]))
+            unique_counts[column] = min(hll.estimate(), total_rows - int(null_counts[column]))
+        unique_counts = pd.Series(unique_counts, dtype="int64")
+        method = "hll"
+    elif sample_rows and total_rows > sample_rows:
+        sample = df.sample(n=sample_rows, random_state=0)
+        sample_unique = sample.nunique()
+        sample_non_null = sample.notna().sum()
+        key_like = (sample_unique == sample_non_null) & (sample_non_null > 0)
+        unique_counts = sample_unique.where(~key_like, total_rows - null_counts)
+        sampled_columns = [str(column) for column in key_like.index[~key_like]]
+        method = "sample"
+    else:
+        unique_counts = df.nunique()
+        method = "exact"
+
+    first_row = df.iloc[0] if total_rows > 0 else None
+    profile = pd.DataFrame({
+        "column_name": df.columns,
+        "data_type": [str(dtype) for dtype in df.dtypes],
+        "sample_data": [str(first_row[c]) if first_row is not None else "NULL" for c in df.columns],
+        "null_count": null_counts.reindex(df.columns).astype("int64").to_numpy(),
+        "unique_count": unique_counts.reindex(df.columns).astype("int64").to_numpy(),
+    })
+    profile.attrs["method"] = method
+    profile.attrs["sampled_columns"] = sampled_columns
+    return profile
+
 class DataCatalog:
     def __init__(self, catalog_db_name="metadata_catalog.db"):
         self.catalog_db_path = DB_DIR / catalog_db_name
         self.docs_dir = DOCS_DIR
 
-    def generate_data_dictionary(self, df, table_name, description=""):
+    def generate_data_dictionary(self, df, table_name, description="", sample_rows=None, approx_distinct=False):
         """Generate data dictionary untuk sebuah tabel"""
-        data_dict = []
-        
-        for column in df.columns:
-            data_dict.append({
-                "table_name": table_name,
-                "column_name": column,
-                "data_type": str(df[column].dtype),
-                "sample_data": str(df[column].iloc[0]) if len(df) > 0 else "NULL",
-                "null_count": df[column].isnull().sum(),
-                "unique_count": df[column].nunique(),
-                "description": description,
-                "generated_at": pd.Timestamp.now()
-            })
-        
-        return pd.DataFrame(data_dict)
-
-    def update_catalog(self, df, table_name, source_system, description=""):
-        """Update data catalog dengan metadata terbaru"""
-        data_dict_df = self.generate_data_dictionary(df, table_name, description)
-        
-        # Save to CSV catalog di folder docs
-        catalog_path = self.docs_dir / f"data_catalog_{pd.Timestamp.now().strftime('%Y%m%d')}.csv"
-        data_dict_df.to_csv(catalog_path, index=False)
-        
-        # Update database catalog
+        data_dict = profile_columns(df, sample_rows=sample_rows, approx_distinct=approx_distinct)
+        data_dict.insert(0, "table_name", table_name)
+        data_dict["description"] = description
+        data_dict["generated_at"] = pd.Timestamp.now()
+        return data_dict
+
+    def _init_snapshot_table(self, conn):
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS catalog_snapshots (
+                table_name TEXT PRIMARY KEY,
+                source_system TEXT,
+                schema_signature TEXT,
+                row_count INTEGER,
+                column_stats TEXT,
+                profile_method TEXT,
+                updated_at TIMESTAMP
+            )
+        ''')
+
+    @staticmethod
+    def _is_material_change(previous, schema_signature, row_count, column_stats, tolerance):
+        """
+        Schema berubah, atau row count / null / distinct bergeser lebih dari tolerance.
+        Distinct count None (hasil sample) tidak dibandingkan.
+        """
+        if previous is None:
+            return True
+        old_signature, old_rows, old_stats = previous
+        if old_signature != schema_signature:
+            return True
+        if abs(row_count - old_rows) > tolerance * max(old_rows, 1):
+            return True
+        old_stats = json.loads(old_stats)
+        for column, (null_count, unique_count) in column_stats.items():
+            old_null, old_unique = old_stats.get(column, (0, 0))
+            if abs(null_count - old_null) > tolerance * max(row_count, 1):
+                return True
+            if unique_count is None or old_unique is None:
+                continue
+            if abs(unique_count - old_unique) > tolerance * max(old_unique, 1):
+                return True
+        return False
+
+    def update_catalog(self, df, table_name, source_system, description="", force=False,
+                       sample_rows=None, approx_distinct=False, change_tolerance=0.05):
+        """
+        Update data catalog dengan metadata terbaru.
+        Catalog hanya ditulis kalau schema atau statistik tabel berubah secara
+        material (lihat change_tolerance) dibanding snapshot terakhir, atau force=True.
+        Return True kalau catalog ditulis.
+        """
+        data_dict_df = self.generate_data_dictionary(
+            df, table_name, description, sample_rows=sample_rows, approx_distinct=approx_distinct
+        )
+        schema_signature = json.dumps(list(zip(data_dict_df["column_name"].astype(str), data_dict_df["data_type"])))
+        # Distinct count dari sample tidak sebanding dengan angka full-table,
+        # jadi disimpan None dan dilewati saat deteksi perubahan
+        sampled_columns = set(data_dict_df.attrs.get("sampled_columns", []))
+        column_stats = {
+            str(column): (int(nulls), None if str(column) in sampled_columns else int(uniques))
+            for column, nulls, uniques in zip(
+                data_dict_df["column_name"], data_dict_df["null_count"], data_dict_df["unique_count"]
+            )
+        }
+
         conn = sqlite3.connect(self.catalog_db_path)
-        data_dict_df.to_sql("data_dictionary", conn, if_exists="append", index=False)
-        conn.close()
+        try:
+            self._init_snapshot_table(conn)
+            previous = conn.execute(
+                "SELECT schema_signature, row_count, column_stats FROM catalog_snapshots WHERE table_name = ?",
+                (table_name,)
+            ).fetchone()
+            if not force and not self._is_material_change(
+                previous, schema_signature, len(df), column_stats, change_tolerance
+            ):
+                return False
+
+            # Save to CSV catalog di folder docs
+            catalog_path = self.docs_dir / f"data_catalog_{pd.Timestamp.now().strftime('%Y%m%d')}.csv"
+            data_dict_df.to_csv(catalog_path, index=False)
+
+            # Update database catalog
+            data_dict_df.to_sql("data_dictionary", conn, if_exists="append", index=False)
+            with conn:
+                conn.execute(
+                    '''
+                    INSERT INTO catalog_snapshots
+                        (table_name, source_system, schema_signature, row_count, column_stats, profile_method, updated_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT (table_name) DO UPDATE SET
+                        source_system = excluded.source_system,
+                        schema_signature = excluded.schema_signature,
+                        row_count = excluded.row_count,
+                        column_stats = excluded.column_stats,
+                        profile_method = excluded.profile_method,
+                        updated_at = excluded.updated_at
+                    ''',
+                    (table_name, source_system, schema_signature, len(df), json.dumps(column_stats),
+                     data_dict_df.attrs.get("method", "exact"), pd.Timestamp.now().isoformat())
+                )
+            return True
+        finally:
+            conn.close()
@@ -1,4 +1,7 @@
 import json
+import logging
+import os
+import threading
 from datetime import datetime
 from pathlib import Path
 
@@ -7,9 +10,44 @@ BASE_DIR = Path(__file__).parent.parent.parent
 LOGS_DIR = BASE_DIR / "logs"
 
 class LineageTracker:
-    def __init__(self, lineage_file="data_lineage.json"):
+    """
+    Lineage log append-only (JSONL, satu entry per baris).
+    Entry di-buffer di memory dan ditulis per batch; close() menulis sisa
+    buffer dan fsync, dipanggil di akhir pipeline. Kalau metadata_manager
+    diisi, setiap flush juga masuk ke graph lineage di metadata DB; gagal
+    tulis ke DB hanya di-log dan entry-nya dicoba lagi di flush berikutnya.
+    """
+    def __init__(self, lineage_file="data_lineage.jsonl", legacy_file="data_lineage.json", buffer_size=50,
+                 metadata_manager=None):
+        self.metadata_manager = metadata_manager
         self.lineage_file = LOGS_DIR / lineage_file
+        self.legacy_file = LOGS_DIR / legacy_file
         self.lineage_file.parent.mkdir(exist_ok=True)
+        self.buffer_size = buffer_size
+        self._buffer = []
+        # Entry yang sudah di JSONL tapi belum berhasil masuk metadata DB
+        self._db_backlog = []
+        self._lock = threading.Lock()
+        self.migrate_legacy_file()
+
+    def migrate_legacy_file(self):
+        """Pindahkan data_lineage.json format lama ke JSONL, sekali saja"""
+        if not self.legacy_file.exists() or self.legacy_file == self.lineage_file:
+            return
+
+        if not self.lineage_file.exists():
+            with open(self.legacy_file, "r") as f:
+                entries = json.load(f).get("lineage_entries", [])
+            tmp_file = self.lineage_file.with_suffix(self.lineage_file.suffix + ".tmp")
+            with open(tmp_file, "w") as f:
+                f.writelines(json.dumps(entry) + "\n" for entry in entries)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_file, self.lineage_file)
+            print(f"Lineage migrated: {len(entries)} entries → {self.lineage_file.name}")
+
+        # JSONL sudah ada berarti migrasi sudah selesai, tinggal tandai file lama
+        self.legacy_file.rename(self.legacy_file.with_suffix(".json.migrated"))
 
     def log_transformation(self, source_table, target_table, transformation_type, records_in, records_out, sql_query=None):
         """Log setiap transformasi yang dilakukan"""
@@ -25,17 +63,49 @@ class LineageTracker:
             "pipeline_version": "rakamin_v1_22092025"
         }
 
-        # Load existing lineage
-        if self.lineage_file.exists():
-            with open(self.lineage_file, "r") as f:
-                data = json.load(f)
-        else:
-            data = {"lineage_entries": []}
+        with self._lock:
+            self._buffer.append(lineage_entry)
+            should_flush = len(self._buffer) >= self.buffer_size
+        if should_flush:
+            self.flush()
 
-        data["lineage_entries"].append(lineage_entry)
+        print(f"Lineage logged: {source_table} → {target_table}")
 
-        # Save updated lineage
-        with open(self.lineage_file, "w") as f:
-            json.dump(data, f, indent=2)
+    def flush(self, fsync=False):
+        """Tulis buffer ke akhir file JSONL, lalu ke metadata DB (di luar lock)"""
+        with self._lock:
+            entries, self._buffer = self._buffer, []
+            if entries or fsync:
+                with open(self.lineage_file, "a") as f:
+                    f.writelines(json.dumps(entry, default=str) + "\n" for entry in entries)
+                    if fsync:
+                        f.flush()
+                        os.fsync(f.fileno())
+            if self.metadata_manager is None:
+                return
+            entries, self._db_backlog = self._db_backlog + entries, []
+        if not entries:
+            return
 
-        print(f"Lineage logged: {source_table} → {target_table}")
+        try:
+            self.metadata_manager.record_lineage(entries)
+        except Exception as e:
+            # Jangan sampai menimpa error pipeline yang sebenarnya (close() dipanggil di finally)
+            logging.error(f"Error simpan {len(entries)} entry lineage ke metadata DB: {e}")
+            with self._lock:
+                self._db_backlog = entries + self._db_backlog
+
+    def close(self):
+        """Flush + fsync, dipanggil di akhir pipeline"""
+        self.flush(fsync=True)
+
+    def read_entries(self):
+        """Semua entry lineage: yang sudah di file lalu yang masih di buffer"""
+        if self.lineage_file.exists():
+            with open(self.lineage_file, "r") as f:
+                for line in f:
+                    if line.strip():
+                        yield json.loads(line)
+        with self._lock:
+            pending = list(self._buffer)
+        yield from pending
@@ -1,6 +1,7 @@
 import pandas as pd
 import sqlite3
 import json
+import uuid
 from datetime import datetime
 from pathlib import Path
 
@@ -10,10 +11,43 @@ DATA_DIR = BASE_DIR / "data"
 DB_DEV_DIR = DATA_DIR / "database"
 DB_DIR = DB_DEV_DIR / "dev"
 
+# Kolom data_assets yang diisi dari asset dict (created_date/last_updated default waktu register)
+ASSET_COLUMNS = [
+    "asset_id", "asset_name", "asset_type", "source_system", "owner",
+    "sensitivity_level", "data_classification", "retention_days"
+]
+ASSET_TIMESTAMPS = ["created_date", "last_updated"]
+
+# Cache in-process: db path -> {asset_id: tuple nilai ASSET_COLUMNS + ASSET_TIMESTAMPS} yang sudah tersimpan
+_KNOWN_ASSETS = {}
+
+# Label tabel di LineageTracker pipeline rakamin -> asset_id di data_assets
+RAKAMIN_LINEAGE_ASSETS = {
+    "rakamin_kalbe.db.orders": "rakamin_orders_raw",
+    "warehouse.dim_customers": "dim_customers_clean",
+    "warehouse.fact_orders": "fact_orders"
+}
+
+def _timestamp_text(value):
+    """datetime/Timestamp -> text 'YYYY-MM-DD HH:MM:SS' seperti default register; lainnya apa adanya"""
+    if isinstance(value, datetime):
+        return value.isoformat(sep=" ")
+    return value
+
 class MetadataManager:
-    def __init__(self, db_name="metadata_catalog.db"):
+    def __init__(self, db_name="metadata_catalog.db", asset_aliases=None):
+        """
+        asset_aliases: dict label lineage (mis. "warehouse.fact_orders") ->
+        asset_id, supaya node graph lineage memakai asset_id yang sama
+        dengan data_assets. Label tanpa alias disimpan apa adanya.
+        """
         self.db_path = DB_DIR / db_name
+        self.asset_aliases = dict(asset_aliases or {})
         self.init_metadata_db()
+
+    def resolve_asset_id(self, label):
+        """asset_id untuk label lineage (label itu sendiri kalau tidak ada alias)"""
+        return self.asset_aliases.get(label, label)
     
     def init_metadata_db(self):
         """Initialize metadata database dengan struktur tabel"""
@@ -50,25 +84,168 @@ class MetadataManager:
                 FOREIGN KEY (target_asset_id) REFERENCES data_assets (asset_id)
             )
         ''')
+        cursor.execute("CREATE INDEX IF NOT EXISTS ix_data_lineage_source ON data_lineage (source_asset_id)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS ix_data_lineage_target ON data_lineage (target_asset_id)")
+
+        # Graph lineage: satu row per edge (bukan per run), supaya traversal
+        # tetap cepat walaupun history data_lineage sudah bertahun-tahun
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS lineage_edges (
+                source_asset_id TEXT NOT NULL,
+                target_asset_id TEXT NOT NULL,
+                first_seen TIMESTAMP,
+                last_seen TIMESTAMP,
+                run_count INTEGER DEFAULT 0,
+                PRIMARY KEY (source_asset_id, target_asset_id)
+            ) WITHOUT ROWID
+        ''')
+        cursor.execute("CREATE INDEX IF NOT EXISTS ix_lineage_edges_target ON lineage_edges (target_asset_id, source_asset_id)")
         
         conn.commit()
         conn.close()
     
     def register_data_asset(self, asset_data: dict):
         """Register new data asset ke metadata db"""
+        return self.register_assets([asset_data])
+
+    def register_assets(self, assets):
+        """
+        Register/update banyak asset dalam satu koneksi dan satu transaksi.
+        Idempotent: asset yang sudah ada di-update (created_date tetap),
+        dan asset yang identik dengan yang sudah diregister di proses ini
+        dilewati tanpa menyentuh database. created_date/last_updated dari
+        caller dipakai apa adanya (juga menimpa created_date asset yang sudah
+        ada); kalau tidak diisi, default waktu register.
+        Return jumlah asset yang ditulis.
+        """
+        known = _KNOWN_ASSETS.setdefault(str(self.db_path), {})
+        pending = {}
+        for asset in assets:
+            unknown = set(asset) - set(ASSET_COLUMNS) - set(ASSET_TIMESTAMPS)
+            if unknown:
+                raise ValueError(f"Kolom asset tidak dikenal: {sorted(unknown)}")
+            values = tuple(asset.get(column) for column in ASSET_COLUMNS)
+            values += tuple(_timestamp_text(asset.get(column)) for column in ASSET_TIMESTAMPS)
+            if known.get(values[0]) != values:
+                pending[values[0]] = values
+        if not pending:
+            return 0
+
+        now = datetime.now().isoformat(sep=" ")
+        update_columns = ASSET_COLUMNS[1:]
+        changed = " OR ".join(f"{c} IS NOT excluded.{c}" for c in update_columns)
+        query = f'''
+            INSERT INTO data_assets ({", ".join(ASSET_COLUMNS)}, created_date, last_updated)
+            VALUES ({", ".join(f":{c}" for c in ASSET_COLUMNS)},
+                    COALESCE(:created_date, :now), COALESCE(:last_updated, :now))
+            ON CONFLICT (asset_id) DO UPDATE SET
+                {", ".join(f"{c} = excluded.{c}" for c in update_columns)},
+                created_date = COALESCE(:created_date, created_date),
+                last_updated = excluded.last_updated
+            WHERE {changed}
+                OR (:created_date IS NOT NULL AND :created_date IS NOT created_date)
+                OR (:last_updated IS NOT NULL AND :last_updated IS NOT last_updated)
+        '''
+        rows = [dict(zip(ASSET_COLUMNS + ASSET_TIMESTAMPS, values), now=now) for values in pending.values()]
         conn = sqlite3.connect(self.db_path)
-        asset_data['created_date'] = datetime.now()
-        asset_data['last_updated'] = datetime.now()
-        
-        df = pd.DataFrame([asset_data])
-        df.to_sql('data_assets', conn, if_exists='append', index=False)
+        try:
+            with conn:
+                conn.executemany(query, rows)
+        finally:
+            conn.close()
+
+        known.update(pending)
+        for values in pending.values():
+            print(f"Registered asset: {values[1]}")
+        return len(pending)
+
+    def record_lineage(self, entries):
+        """
+        Simpan batch entry lineage (format LineageTracker) ke data_lineage
+        dan update lineage_edges dalam satu transaksi.
+        Source gabungan seperti "staging.orders + staging.customer_data_history"
+        dipecah jadi satu edge per source. Label dipetakan ke asset_id lewat
+        asset_aliases.
+        """
+        runs, edges = [], []
+        for entry in entries:
+            executed_at = entry.get("timestamp") or datetime.now().isoformat()
+            logic = entry.get("transformation_type")
+            if entry.get("sql_query"):
+                logic = f"{logic}: {entry['sql_query']}"
+            target = self.resolve_asset_id(entry["target"])
+            for source in str(entry["source"]).split(" + "):
+                source = self.resolve_asset_id(source.strip())
+                runs.append((
+                    uuid.uuid4().hex, source, target, logic, executed_at,
+                    entry.get("records_output"), entry.get("status", "success")
+                ))
+                edges.append((source, target, executed_at, executed_at))
+        if not runs:
+            return 0
+
+        conn = sqlite3.connect(self.db_path)
+        try:
+            # with conn hanya commit/rollback, close tetap lewat finally
+            with conn:
+                conn.executemany(
+                    "INSERT INTO data_lineage (lineage_id, source_asset_id, target_asset_id, transformation_logic, "
+                    "executed_at, records_processed, status) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    runs
+                )
+                conn.executemany(
+                    '''
+                    INSERT INTO lineage_edges (source_asset_id, target_asset_id, first_seen, last_seen, run_count)
+                    VALUES (?, ?, ?, ?, 1)
+                    ON CONFLICT (source_asset_id, target_asset_id) DO UPDATE SET
+                        first_seen = MIN(first_seen, excluded.first_seen),
+                        last_seen = MAX(last_seen, excluded.last_seen),
+                        run_count = run_count + 1
+                    ''',
+                    edges
+                )
+        finally:
+            conn.close()
+        return len(runs)
+
+    def _traverse_lineage(self, asset_id, direction, max_depth):
+        asset_id = self.resolve_asset_id(asset_id)
+        if direction == "downstream":
+            start_col, next_col = "source_asset_id", "target_asset_id"
+        else:
+            start_col, next_col = "target_asset_id", "source_asset_id"
+
+        # UNION + batas depth supaya siklus di graph tidak bikin loop tak hingga
+        query = f'''
+            WITH RECURSIVE walk(asset_id, depth) AS (
+                SELECT {next_col}, 1 FROM lineage_edges WHERE {start_col} = ?
+                UNION
+                SELECT e.{next_col}, w.depth + 1
+                FROM lineage_edges e JOIN walk w ON e.{start_col} = w.asset_id
+                WHERE w.depth < ?
+            )
+            SELECT w.asset_id, MIN(w.depth) AS depth, a.asset_name, a.owner
+            FROM walk w LEFT JOIN data_assets a ON a.asset_id = w.asset_id
+            WHERE w.asset_id != ?
+            GROUP BY w.asset_id
+            ORDER BY depth, w.asset_id
+        '''
+        conn = sqlite3.connect(self.db_path)
+        df = pd.read_sql_query(query, conn, params=(asset_id, max_depth, asset_id))
         conn.close()
-        
-        print(f"Registered asset: {asset_data['asset_name']}")
+        return df
+
+    def get_downstream(self, asset_id, max_depth=100):
+        """Semua asset yang (langsung/tidak langsung) bergantung pada asset_id"""
+        return self._traverse_lineage(asset_id, "downstream", max_depth)
 
-def register_rakamin_assets(db_name="metadata_catalog.db"):
+    def get_upstream(self, asset_id, max_depth=100):
+        """Semua asset sumber dari asset_id"""
+        return self._traverse_lineage(asset_id, "upstream", max_depth)
+
+def register_rakamin_assets(db_name="metadata_catalog.db", manager=None):
     """Register sample Rakamin assets"""
-    manager = MetadataManager(db_name)
+    manager = manager or MetadataManager(db_name)
     
     assets = [
         {
@@ -90,8 +267,17 @@ def register_rakamin_assets(db_name="metadata_catalog.db"):
             'sensitivity_level': 'restricted',
             'data_classification': 'PII',
             'retention_days': 730
+        },
+        {
+            'asset_id': 'fact_orders',
+            'asset_name': 'Orders Fact',
+            'asset_type': 'table',
+            'source_system': 'ETL Pipeline',
+            'owner': 'analytics_team',
+            'sensitivity_level': 'restricted',
+            'data_classification': 'PII',
+            'retention_days': 730
         }
     ]
     
-    for asset in assets:
-        manager.register_data_asset(asset)
+    manager.register_assets(assets)
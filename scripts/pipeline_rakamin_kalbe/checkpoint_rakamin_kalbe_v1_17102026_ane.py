@@ -0,0 +1,131 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+# Base path configuration
+BASE_DIR = Path(__file__).parent.parent.parent
+CHECKPOINT_DIR = BASE_DIR / "data" / "checkpoints"
+
+MANIFEST_FILE = "manifest.json"
+
+
+def _json_default(value):
+    """numpy scalar / Timestamp -> tipe yang bisa di-serialize json"""
+    if hasattr(value, "item"):
+        return value.item()
+    return str(value)
+
+
+def file_fingerprint(path):
+    """Fingerprint murah untuk file input (size + mtime_ns); file -wal ikut dihitung"""
+    path = Path(path)
+    parts = []
+    for candidate in (path, path.with_name(path.name + "-wal")):
+        if candidate.exists():
+            stat = candidate.stat()
+            parts.append([candidate.name, stat.st_size, stat.st_mtime_ns])
+    return parts
+
+
+def code_version(paths):
+    """Hash isi file source code / config; berubah kalau logic atau rules berubah"""
+    digest = hashlib.sha256()
+    for path in sorted(str(p) for p in paths):
+        digest.update(path.encode())
+        try:
+            digest.update(Path(path).read_bytes())
+        except FileNotFoundError:
+            digest.update(b"<missing>")
+    return digest.hexdigest()
+
+
+def stage_key(stage, *parts):
+    """Key content-addressed satu stage: hash dari nama stage + semua input-nya"""
+    payload = json.dumps([stage, *parts], sort_keys=True, default=_json_default)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class StageCheckpointStore:
+    """
+    Simpan output stage pipeline (dict nama -> DataFrame) sebagai Parquet
+    di checkpoint_dir/<stage>/<key>/, plus manifest.json untuk metadata
+    (mis. hasil quality check stage tersebut).
+    Checkpoint ditulis ke folder tmp lalu di-rename, jadi checkpoint yang
+    setengah jadi (pipeline crash saat menulis) tidak pernah terbaca.
+    """
+    def __init__(self, checkpoint_dir=CHECKPOINT_DIR, keep=2):
+        self.checkpoint_dir = Path(checkpoint_dir)
+        self.keep = keep
+
+    def _stage_dir(self, stage):
+        return self.checkpoint_dir / stage
+
+    def load(self, stage, key):
+        """Return (frames, meta) kalau checkpoint ada, None kalau tidak"""
+        path = self._stage_dir(stage) / key
+        manifest_path = path / MANIFEST_FILE
+        if not manifest_path.exists():
+            return None
+        try:
+            with open(manifest_path, "r") as f:
+                manifest = json.load(f)
+            frames = {
+                name: pd.read_parquet(path / f"{index}.parquet") if present else None
+                for index, (name, present) in enumerate(manifest["frames"])
+            }
+        except Exception as e:
+            logging.warning(f"Checkpoint {stage}/{key[:12]} tidak bisa dibaca, dihitung ulang: {e}")
+            return None
+        return frames, manifest.get("meta", {})
+
+    def save(self, stage, key, frames, meta=None):
+        """Simpan checkpoint; gagal simpan hanya di-log, tidak menggagalkan pipeline"""
+        stage_dir = self._stage_dir(stage)
+        final_path = stage_dir / key
+        tmp_path = stage_dir / f".tmp-{key}-{uuid.uuid4().hex[:8]}"
+        try:
+            tmp_path.mkdir(parents=True)
+            manifest_frames = []
+            for index, (name, df) in enumerate(frames.items()):
+                if df is not None:
+                    df.to_parquet(tmp_path / f"{index}.parquet", index=True)
+                manifest_frames.append([name, df is not None])
+            with open(tmp_path / MANIFEST_FILE, "w") as f:
+                json.dump({
+                    "stage": stage,
+                    "key": key,
+                    "created_at": datetime.now().isoformat(),
+                    "frames": manifest_frames,
+                    "meta": meta or {}
+                }, f, default=_json_default)
+            if final_path.exists():
+                shutil.rmtree(final_path)
+            os.replace(tmp_path, final_path)
+        except Exception as e:
+            logging.warning(f"Checkpoint {stage} tidak disimpan: {e}")
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            return False
+
+        self.prune(stage)
+        return True
+
+    def prune(self, stage):
+        """Hapus checkpoint lama; hanya `keep` checkpoint terbaru per stage yang disimpan"""
+        stage_dir = self._stage_dir(stage)
+        checkpoints = sorted(
+            (p for p in stage_dir.iterdir() if p.is_dir() and not p.name.startswith(".tmp-")),
+            key=lambda p: p.stat().st_mtime_ns,
+            reverse=True
+        )
+        for old in checkpoints[self.keep:]:
+            shutil.rmtree(old, ignore_errors=True)
+
+    def clear(self):
+        shutil.rmtree(self.checkpoint_dir, ignore_errors=True)
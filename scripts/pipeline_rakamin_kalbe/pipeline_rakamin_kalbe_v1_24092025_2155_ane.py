@@ -4,11 +4,14 @@ Enhanced ETL Pipeline dengan Data Governance & Quality
 Path-aware version
 """
 
+import inspect
 import logging
 import sys
 from datetime import datetime
 from pathlib import Path
 
+import pandas as pd
+
 # ==== Base Path Config ====
 CURRENT_DIR = Path(__file__).parent
 SCRIPTS_DIR = CURRENT_DIR.parent
@@ -19,12 +22,33 @@ sys.path.append(str(SCRIPTS_DIR))
 sys.path.append(str(ROOT_DIR))
 
 # ==== Import ETL Modules ====
-from scripts.etl_rakamin_kalbe.extract_rakamin_kalbe_v1_24092025_2035_ane import extract_multiple_tables
-from scripts.etl_rakamin_kalbe.transform_rakamin_kalbe_v1_24092025_2036_ane import clean_customer_data, transform_orders, create_sales_summary
-from scripts.etl_rakamin_kalbe.load_rakamin_kalbe_v1_24092025_2037_ane import load_to_sqlite, load_to_parquet
+from scripts.etl_rakamin_kalbe.extract_rakamin_kalbe_v1_24092025_2035_ane import (
+    commit_watermarks,
+    extract_incremental,
+    extract_multiple_tables
+)
+from scripts.etl_rakamin_kalbe.transform_rakamin_kalbe_v1_24092025_2036_ane import (
+    CUSTOMER_JOIN_COLUMNS,
+    build_customer_snapshot,
+    build_scd2_changes,
+    clean_customer_data,
+    create_sales_summary,
+    optimize_dtypes,
+    transform_orders
+)
+from scripts.etl_rakamin_kalbe.load_rakamin_kalbe_v1_24092025_2037_ane import (
+    load_scd2_dimension,
+    load_to_parquet,
+    load_to_sqlite,
+    read_scd2_current
+)
 
 # ==== Governance & Lineage ====
-from scripts.governance_rakamin_kalbe.metadata_manager_rakamin_kalbe_v1_24092025_2104_ane import MetadataManager, register_rakamin_assets
+from scripts.governance_rakamin_kalbe.metadata_manager_rakamin_kalbe_v1_24092025_2104_ane import (
+    RAKAMIN_LINEAGE_ASSETS,
+    MetadataManager,
+    register_rakamin_assets
+)
 from scripts.governance_rakamin_kalbe.data_catalog_rakamin_kalbe_v1_24092025_ane import DataCatalog
 from scripts.governance_rakamin_kalbe.linear_tracker_rakamin_kalbe_v1_24092025_ane import LineageTracker
 
@@ -32,19 +56,87 @@ from scripts.governance_rakamin_kalbe.linear_tracker_rakamin_kalbe_v1_24092025_a
 from scripts.quality_rakamin_kalbe.data_quality_rakamin_kalbe_v1_24092025_ane import DataQualityChecker
 from scripts.quality_rakamin_kalbe.quality_dashboard_rakamin_kalbe_v1_24092025_ane import QualityDashboard
 
+# ==== Scheduling ====
+from scripts.pipeline_rakamin_kalbe.scheduler_rakamin_kalbe_v1_17102026_ane import DAGScheduler, TaskDAG
+from scripts.pipeline_rakamin_kalbe.checkpoint_rakamin_kalbe_v1_17102026_ane import (
+    StageCheckpointStore,
+    code_version,
+    file_fingerprint,
+    stage_key
+)
+from scripts.pipeline_rakamin_kalbe.profiler_rakamin_kalbe_v1_17102026_ane import StageProfiler, count_rows
 
 
 class GovernedETLPipeline:
-    def __init__(self):
+    EXTRACT_TABLES = ["orders", "sales", "customer_data_history", "category_db"]
+
+    # Primary key per tabel warehouse untuk load_mode="merge". dim_customers
+    # berisi semua versi history (sama seperti load replace), jadi key-nya per versi
+    MERGE_KEYS = {
+        "dim_customers": ["customer_id", "updated_at"],
+        "fact_orders": ["order_id"]
+    }
+
+    # Label quality check per stage -> key rules di config/quality_rules.json.
+    # dim_customers berisi semua versi history customer, jadi memakai rules
+    # customer_data_history (tanpa uniqueness customer_id/email)
+    QUALITY_RULE_TABLES = {
+        "customers_raw": "customer_data_history",
+        "customers_clean": "customer_data_history",
+        "final_dim_customers": "customer_data_history",
+        "fact_orders": "orders",
+        "final_fact_orders": "orders"
+    }
+
+    # Kolom tanggal untuk output Parquet yang dipartisi per hari
+    PARQUET_DATE_PARTITIONS = {
+        "fact_orders": "order_date"
+    }
+
+    def __init__(self, extract_workers=4, load_mode="replace", merge_keys=None,
+                 dtype_optimization=False, max_workers=1, checkpoint=False, checkpoint_dir=None,
+                 cprofile=False, prometheus=False, customer_join="latest", dim_mode="replace"):
         self.root_dir = ROOT_DIR
+        self.extract_workers = extract_workers
+        self.max_workers = max_workers
+        # "latest": snapshot customer terbaru; "as_of": versi customer saat order_date
+        if customer_join not in ("latest", "as_of"):
+            raise ValueError(f"customer_join harus 'latest' atau 'as_of', bukan {customer_join}")
+        self.customer_join = customer_join
+        # "replace": dim_customers ditulis ulang tiap run; "scd2": hanya versi baru
+        # dari rows customer_data_history sejak watermark terakhir (SCD Type 2)
+        if dim_mode not in ("replace", "scd2"):
+            raise ValueError(f"dim_mode harus 'replace' atau 'scd2', bukan {dim_mode}")
+        if dim_mode == "scd2" and customer_join == "as_of":
+            raise ValueError("customer_join='as_of' butuh history customer lengkap, tidak bisa dengan dim_mode='scd2'")
+        self.dim_mode = dim_mode
+        self._scd2_batch = self._scd2_expirations = None
+        self.dtype_optimization = dtype_optimization
+        if load_mode not in ("replace", "merge"):
+            raise ValueError(f"load_mode harus 'replace' atau 'merge', bukan {load_mode}")
+        self.load_mode = load_mode
+        self.merge_keys = merge_keys or self.MERGE_KEYS
         self.setup_directories()
         self.setup_logging()
 
-        self.metadata_manager = MetadataManager()
+        self.metadata_manager = MetadataManager(asset_aliases=RAKAMIN_LINEAGE_ASSETS)
         self.data_catalog = DataCatalog()
-        self.lineage_tracker = LineageTracker()
+        self.lineage_tracker = LineageTracker(metadata_manager=self.metadata_manager)
         self.quality_checker = DataQualityChecker()
         self.quality_results = []
+        # Metrics per stage ke logs/pipeline_metrics.jsonl (+ opsional .prom / cProfile)
+        self.profiler = StageProfiler(
+            metrics_file=self.root_dir / "logs" / "pipeline_metrics.jsonl",
+            prometheus_file=self.root_dir / "logs" / "pipeline_metrics.prom" if prometheus else None,
+            cprofile=cprofile
+        )
+        # Checkpoint stage extract/transform/QC; load tidak di-checkpoint (side effect)
+        self.checkpoint_store = None
+        if checkpoint and dim_mode == "scd2":
+            # Output stage scd2 bergantung pada isi warehouse & watermark, bukan hanya input file
+            logging.warning("Checkpoint tidak dipakai dengan dim_mode='scd2'")
+        elif checkpoint:
+            self.checkpoint_store = StageCheckpointStore(checkpoint_dir or self.root_dir / "data" / "checkpoints")
 
     def setup_directories(self):
         """Setup semua folder penting (data, logs, reports, config)."""
@@ -78,31 +170,164 @@ class GovernedETLPipeline:
         DB_TARGET = self.root_dir / "data" / "database" / "rakamin_kalbe_warehouse.db"
 
         try:
-            # 1. Governance init
-            self.initialize_governance()
-
-            # 2. Extract
-            raw_data = self.extract_phase(DB_SOURCE)
-
-            # 3. Transform
-            transformed_data = self.transform_phase(raw_data)
-
-            # 4. Load
-            self.load_phase(transformed_data, DB_TARGET)
-
-            # 5. Reports
-            self.reporting_phase()
+            with self.profiler.stage("pipeline", profile=False):
+                dag = self.build_dag(DB_SOURCE, DB_TARGET)
+                DAGScheduler(max_workers=self.max_workers).run(dag)
 
             logging.info("✅ Governed ETL Pipeline Completed Successfully")
 
         except Exception as e:
             logging.error(f"❌ Pipeline failed: {e}")
             raise
+        finally:
+            # Tulis sisa buffer lineage + fsync, termasuk saat pipeline gagal
+            self.lineage_tracker.close()
+            self.profiler.write()
+            for m in self.profiler.slowest():
+                logging.info(
+                    f"⏱️ {m.name}: {m.wall_seconds:.2f}s wall, {m.process_cpu_seconds:.2f}s cpu proses, "
+                    f"peak RSS {m.peak_rss_mb} MB, rows {m.rows_in} → {m.rows_out}"
+                )
+
+    def build_dag(self, db_source, db_target):
+        """
+        Pipeline sebagai DAG task. Urutan add_task = urutan sequential lama
+        (governance, extract, transform, load per tabel, reporting), jadi
+        max_workers=1 menghasilkan eksekusi yang sama persis.
+        Write ke warehouse SQLite dan ke catalog di-chain antar tabel
+        karena SQLite hanya mengizinkan satu writer.
+        """
+        dag = TaskDAG()
+        keys = self.checkpoint_keys(db_source)
+
+        # 1. Governance init
+        self._add_task(dag, "governance", lambda _: self.initialize_governance())
+
+        # 2. Extract (+ 2b. optional dtype optimization)
+        self._add_task(dag, "extract", lambda _: self._checkpointed(
+            "extract", keys, lambda: self.extract_phase(db_source)))
+        raw_task = "extract"
+        if self.dtype_optimization:
+            self._add_task(dag, "optimize", lambda r: self._checkpointed(
+                "optimize", keys, lambda: self.optimize_phase(r["extract"])), deps=["extract"])
+            raw_task = "optimize"
+
+        # 3. Transform: branch customers dan orders independen
+        self._add_task(dag, "transform_dim_customers", lambda r: self._checkpointed(
+            "transform_dim_customers", keys, lambda: self.transform_customers(r[raw_task], db_target),
+            qc_tables=["customers_raw", "customers_clean"]), deps=[raw_task])
+        if self.dim_mode == "scd2":
+            # Lookup memakai versi baru hasil transform_dim_customers (sudah di-clean)
+            self._add_task(dag, "customer_snapshot", lambda r: self.build_customer_lookup(
+                r[raw_task], db_target, new_versions=r["transform_dim_customers"]),
+                deps=[raw_task, "transform_dim_customers"])
+        else:
+            self._add_task(dag, "customer_snapshot", lambda r: self.build_customer_lookup(r[raw_task], db_target),
+                           deps=[raw_task])
+        self._add_task(dag, "transform_fact_orders", lambda r: self._checkpointed(
+            "transform_fact_orders", keys, lambda: self.transform_orders(r[raw_task], r["customer_snapshot"]),
+            qc_tables=["fact_orders"]), deps=[raw_task, "customer_snapshot"])
+
+        # 4. Load per tabel: final QC -> sqlite/parquet/catalog -> lineage
+        previous_sqlite = previous_catalog = None
+        load_tasks = []
+        for table in ["dim_customers", "fact_orders"]:
+            qc = f"qc_{table}"
+            self._add_task(dag, qc, lambda r, t=table: self._checkpointed(
+                f"qc_{t}", keys, lambda: self.quality_gate(r[f"transform_{t}"], t),
+                qc_tables=[f"final_{t}"]), deps=[f"transform_{table}"])
+
+            sqlite_deps = [qc] + ([previous_sqlite] if previous_sqlite else [])
+            self._add_task(dag, f"sqlite_{table}", lambda r, t=table: self.load_table_sqlite(r[f"qc_{t}"], t, db_target),
+                         deps=sqlite_deps)
+            self._add_task(dag, f"parquet_{table}", lambda r, t=table: self.load_table_parquet(r[f"qc_{t}"], t),
+                         deps=[qc])
+            catalog_deps = [qc] + ([previous_catalog] if previous_catalog else [])
+            self._add_task(dag, f"catalog_{table}", lambda r, t=table: self.update_table_catalog(r[f"qc_{t}"], t),
+                         deps=catalog_deps)
+            self._add_task(dag, f"lineage_{table}", lambda r, t=table: self.log_table_load(r[f"qc_{t}"], t),
+                         deps=[qc, f"sqlite_{table}", f"parquet_{table}", f"catalog_{table}"])
+
+            previous_sqlite, previous_catalog = f"sqlite_{table}", f"catalog_{table}"
+            load_tasks.append(f"lineage_{table}")
+
+        # 5. Reports
+        self._add_task(dag, "reporting", lambda _: self.reporting_phase(), deps=["governance"] + load_tasks)
+        return dag
+
+    def _add_task(self, dag, name, func, deps=()):
+        """Tambah task ke DAG; setiap task diukur oleh StageProfiler"""
+        def run(inputs):
+            with self.profiler.stage(name, rows_in=count_rows(list(inputs.values()))) as stage:
+                output = func(inputs)
+                stage.rows_out = count_rows(output)
+                return output
+        return dag.add_task(name, run, deps)
+
+    def run_quality_check(self, df, table_name):
+        """run_all_checks + simpan hasil, diukur sebagai stage quality.<table>"""
+        with self.profiler.stage(f"quality.{table_name}", rows_in=len(df)) as stage:
+            result = self.quality_checker.run_all_checks(
+                df, table_name, rules_table=self.QUALITY_RULE_TABLES.get(table_name)
+            )
+            stage.rows_out = len(df)
+        self.quality_results.append(result)
+        return result
+
+    def checkpoint_keys(self, db_source):
+        """
+        Key checkpoint per stage. Setiap key = hash(key stage upstream + versi
+        code/config), dan stage pertama memakai fingerprint file database
+        sumber, jadi perubahan input atau code membatalkan stage tersebut
+        beserta semua stage sesudahnya.
+        """
+        version = code_version([
+            inspect.getfile(extract_multiple_tables),
+            inspect.getfile(clean_customer_data),
+            inspect.getfile(DataQualityChecker),
+            __file__,
+            self.quality_checker.rules_config
+        ])
+        keys = {"extract": stage_key("extract", file_fingerprint(db_source), self.EXTRACT_TABLES, version)}
+        raw_key = keys["extract"]
+        if self.dtype_optimization:
+            keys["optimize"] = raw_key = stage_key("optimize", raw_key, version)
+        for table in ["dim_customers", "fact_orders"]:
+            keys[f"transform_{table}"] = stage_key(f"transform_{table}", raw_key, version, self.customer_join)
+            keys[f"qc_{table}"] = stage_key(f"qc_{table}", keys[f"transform_{table}"], version)
+        return keys
+
+    def _checkpointed(self, stage, keys, compute, qc_tables=()):
+        """
+        Jalankan compute(), atau pakai checkpoint kalau key stage ini sudah ada.
+        Hasil quality check stage (qc_tables) ikut disimpan dan dipulihkan
+        supaya laporan QC tetap lengkap walaupun stage di-skip.
+        """
+        if self.checkpoint_store is None:
+            return compute()
+
+        key = keys[stage]
+        cached = self.checkpoint_store.load(stage, key)
+        if cached is not None:
+            frames, meta = cached
+            self.quality_results.extend(meta.get("quality_results", []))
+            logging.info(f"♻️ Stage {stage} di-skip, pakai checkpoint {key[:12]}")
+            return frames if meta.get("is_dict") else frames["output"]
+
+        output = compute()
+        is_dict = isinstance(output, dict)
+        quality_results = [r for r in self.quality_results if r["table_name"] in qc_tables]
+        self.checkpoint_store.save(
+            stage, key,
+            output if is_dict else {"output": output},
+            meta={"is_dict": is_dict, "quality_results": quality_results}
+        )
+        return output
 
     def initialize_governance(self):
         """Register metadata & log eksekusi pipeline"""
         logging.info("📊 Initializing Data Governance")
-        register_rakamin_assets()
+        register_rakamin_assets(manager=self.metadata_manager)
         self.lineage_tracker.log_transformation(
             source_table="rakamin_kalbe.db",
             target_table="etl_pipeline",
@@ -114,8 +339,16 @@ class GovernedETLPipeline:
     def extract_phase(self, db_source):
         """Extract phase + lineage"""
         logging.info("🔍 Extraction Phase Started")
-        tables = ["orders", "sales", "customer_data_history", "category_db"]
-        raw_data = extract_multiple_tables(str(db_source), tables)
+        tables = self.EXTRACT_TABLES
+        if self.dim_mode == "scd2":
+            tables = [t for t in tables if t != "customer_data_history"]
+        raw_data = extract_multiple_tables(str(db_source), tables, max_workers=self.extract_workers)
+        if self.dim_mode == "scd2":
+            # Hanya history baru sejak watermark; watermark di-commit setelah load dim_customers berhasil
+            history = extract_incremental(str(db_source), "customer_data_history", commit=False)
+            if history is None:
+                raise RuntimeError("Extract incremental customer_data_history gagal")
+            raw_data["customer_data_history"] = self._scd2_batch = history
 
         for t, df in raw_data.items():
             self.lineage_tracker.log_transformation(
@@ -127,78 +360,172 @@ class GovernedETLPipeline:
             )
         return raw_data
 
-    def transform_phase(self, raw_data):
-        """Transform phase dengan quality checks"""
-        logging.info("🔄 Transformation Phase Started")
-        transformed_data = {}
-
-        # Customers
-        if "customer_data_history" in raw_data:
-            df_customers = raw_data["customer_data_history"]
-
-            # QC sebelum
-            self.quality_results.append(
-                self.quality_checker.run_all_checks(df_customers, "customers_raw")
-            )
-
+    def optimize_phase(self, raw_data):
+        """Downcast numeric & category untuk kolom low-cardinality"""
+        logging.info("🗜️ Dtype Optimization Phase Started")
+        return {t: optimize_dtypes(df, name=t) for t, df in raw_data.items()}
+
+    def transform_customers(self, raw_data, db_target=None):
+        """
+        Transform customers dengan quality checks; None kalau tabel sumber tidak ada.
+        Mode scd2 mengembalikan hanya versi baru (lihat build_scd2_changes).
+        """
+        if "customer_data_history" not in raw_data:
+            return None
+        logging.info("🔄 Transformation dim_customers Started")
+        df_customers = raw_data["customer_data_history"]
+
+        # QC sebelum
+        self.run_quality_check(df_customers, "customers_raw")
+
+        with self.profiler.stage("transform.clean_customer_data", rows_in=len(df_customers)) as stage:
             df_customers_clean = clean_customer_data(df_customers)
+            stage.rows_out = len(df_customers_clean)
 
-            # QC sesudah
-            self.quality_results.append(
-                self.quality_checker.run_all_checks(df_customers_clean, "customers_clean")
-            )
-
-            transformed_data["dim_customers"] = df_customers_clean
+        # QC sesudah
+        self.run_quality_check(df_customers_clean, "customers_clean")
 
-            self.lineage_tracker.log_transformation(
-                source_table="staging.customer_data_history",
-                target_table="transformed.dim_customers",
-                transformation_type="cleaning",
-                records_in=len(df_customers),
-                records_out=len(df_customers_clean)
-            )
-
-        # Orders
-        if "orders" in raw_data and "customer_data_history" in raw_data:
-            df_orders = transform_orders(raw_data["orders"], raw_data["customer_data_history"])
-
-            self.quality_results.append(
-                self.quality_checker.run_all_checks(df_orders, "fact_orders")
-            )
+        if self.dim_mode == "scd2":
+            return self.build_scd2_versions(df_customers, df_customers_clean, db_target)
 
-            transformed_data["fact_orders"] = df_orders
+        self.lineage_tracker.log_transformation(
+            source_table="staging.customer_data_history",
+            target_table="transformed.dim_customers",
+            transformation_type="cleaning",
+            records_in=len(df_customers),
+            records_out=len(df_customers_clean)
+        )
+        return df_customers_clean
+
+    def build_scd2_versions(self, df_customers, df_customers_clean, db_target):
+        """Bandingkan hash batch dengan versi current warehouse; hanya customer di batch yang dibaca"""
+        with self.profiler.stage("transform.build_scd2_changes", rows_in=len(df_customers_clean)) as stage:
+            current = read_scd2_current(
+                "dim_customers", str(db_target), "customer_id",
+                keys=df_customers_clean["customer_id"].unique()
+            ).set_index("customer_id")
+            new_versions, self._scd2_expirations = build_scd2_changes(df_customers_clean, current)
+            stage.rows_out = len(new_versions)
 
-            self.lineage_tracker.log_transformation(
-                source_table="staging.orders + staging.customers",
-                target_table="transformed.fact_orders",
-                transformation_type="join_and_enrich",
-                records_in=len(raw_data["orders"]),
-                records_out=len(df_orders)
-            )
+        self.lineage_tracker.log_transformation(
+            source_table="staging.customer_data_history",
+            target_table="transformed.dim_customers",
+            transformation_type="scd2_versioning",
+            records_in=len(df_customers),
+            records_out=len(new_versions)
+        )
+        return new_versions
+
+    def build_customer_lookup(self, raw_data, db_target=None, new_versions=None):
+        """
+        Dimensi customer untuk join orders, dibuat sekali per run:
+        snapshot terbaru per customer_id, atau history lengkap untuk join as-of.
+        Mode scd2: versi current di warehouse untuk customer yang ada di orders,
+        ditimpa versi is_current dari new_versions (output transform_customers,
+        sudah di-clean). Customer batch yang tidak berubah sudah sama dengan
+        versi current di warehouse.
+        """
+        if "customer_data_history" not in raw_data:
+            return None
+        if self.customer_join == "as_of":
+            return raw_data["customer_data_history"]
+        if self.dim_mode != "scd2":
+            return build_customer_snapshot(raw_data["customer_data_history"])
+
+        customer_ids = raw_data["orders"]["customer_id"].unique() if "orders" in raw_data else []
+        current = read_scd2_current(
+            "dim_customers", str(db_target), "customer_id",
+            keys=customer_ids, columns=CUSTOMER_JOIN_COLUMNS
+        ).set_index("customer_id")
+        if new_versions is None or new_versions.empty:
+            return current
+        batch = new_versions[new_versions["is_current"] == 1].set_index("customer_id")
+        lookup = pd.concat([current, batch[[c for c in current.columns if c in batch.columns]]])
+        return lookup[~lookup.index.duplicated(keep="last")]
+
+    def transform_orders(self, raw_data, customer_lookup):
+        """Transform orders (join customers) dengan quality checks"""
+        if "orders" not in raw_data or customer_lookup is None:
+            return None
+        logging.info("🔄 Transformation fact_orders Started")
+        as_of_column = "order_date" if self.customer_join == "as_of" else None
+        with self.profiler.stage("transform.transform_orders", rows_in=len(raw_data["orders"])) as stage:
+            df_orders = transform_orders(raw_data["orders"], customer_lookup, as_of_column=as_of_column)
+            stage.rows_out = len(df_orders)
+
+        self.run_quality_check(df_orders, "fact_orders")
 
-        return transformed_data
-
-    def load_phase(self, transformed_data, db_target):
-        """Load ke warehouse + final QC"""
-        logging.info("📤 Load Phase Started")
-        for table, df in transformed_data.items():
-            final_qc = self.quality_checker.run_all_checks(df, f"final_{table}")
-            self.quality_results.append(final_qc)
-
-            if final_qc["overall_status"] in ["PASS", "WARNING"]:
-                load_to_sqlite(df, table, str(db_target))
-                load_to_parquet(df, f"{table}.parquet")
-                self.data_catalog.update_catalog(df, table, "ETL Pipeline")
-
-                self.lineage_tracker.log_transformation(
-                    source_table=f"transformed.{table}",
-                    target_table=f"warehouse.{table}",
-                    transformation_type="loading",
-                    records_in=len(df),
-                    records_out=len(df)
-                )
-            else:
-                logging.error(f"❌ QC failed for {table}, skipping load")
+        self.lineage_tracker.log_transformation(
+            source_table="staging.orders + staging.customer_data_history",
+            target_table="transformed.fact_orders",
+            transformation_type="join_and_enrich",
+            records_in=len(raw_data["orders"]),
+            records_out=len(df_orders)
+        )
+        return df_orders
+
+    def quality_gate(self, df, table):
+        """Final QC sebelum load; return df kalau lolos, None kalau tidak ada/gagal"""
+        if df is None:
+            return None
+        logging.info(f"📤 Load {table} Started")
+        final_qc = self.run_quality_check(df, f"final_{table}")
+
+        if final_qc["overall_status"] in ["PASS", "WARNING"]:
+            return df
+        logging.error(f"❌ QC failed for {table}, skipping load")
+        return None
+
+    def load_table_sqlite(self, df, table, db_target):
+        if df is None:
+            return
+        if self.dim_mode == "scd2" and table == "dim_customers":
+            if load_scd2_dimension(df, self._scd2_expirations, table, str(db_target), "customer_id"):
+                commit_watermarks([self._scd2_batch])
+            return
+        if self.load_mode == "merge" and table in self.merge_keys:
+            load_to_sqlite(df, table, str(db_target), if_exists="merge",
+                           primary_key=self.merge_keys[table])
+        else:
+            load_to_sqlite(df, table, str(db_target))
+
+    def load_table_parquet(self, df, table):
+        if df is None:
+            return
+        if self.dim_mode == "scd2" and table == "dim_customers":
+            # Append versi baru saja, partisi per valid_from
+            if len(df) > 0:
+                load_to_parquet(df, f"{table}_changes.parquet", partition_by_date="valid_from")
+            return
+        date_column = self.PARQUET_DATE_PARTITIONS.get(table)
+        if date_column is None:
+            load_to_parquet(df, f"{table}.parquet")
+            return
+        # Extract selalu membawa semua order, jadi tulis ulang hanya hari
+        # yang baru atau masih terbuka (>= hari terakhir di dataset)
+        load_to_parquet(df, f"{table}.parquet", partition_by_date=date_column,
+                        existing_partitions="incremental")
+
+    def update_table_catalog(self, df, table):
+        if df is None:
+            return
+        if self.dim_mode == "scd2" and table == "dim_customers":
+            # df hanya berisi perubahan, bukan seluruh dimensi
+            if len(df) > 0:
+                self.data_catalog.update_catalog(df, f"{table}_changes", "ETL Pipeline")
+            return
+        self.data_catalog.update_catalog(df, table, "ETL Pipeline")
+
+    def log_table_load(self, df, table):
+        if df is None:
+            return
+        self.lineage_tracker.log_transformation(
+            source_table=f"transformed.{table}",
+            target_table=f"warehouse.{table}",
+            transformation_type="loading",
+            records_in=len(df),
+            records_out=len(df)
+        )
 
     def reporting_phase(self):
         """Generate quality dashboard & summary"""
@@ -208,6 +535,7 @@ class GovernedETLPipeline:
         dashboard.create_quality_visualization()
 
         summary = dashboard.generate_quality_report()
+        logging.info(f"Quality result cache: {self.quality_checker.cache_stats()}")
         print("\n" + "=" * 60)
         print("DATA QUALITY SUMMARY")
         print("=" * 60)
@@ -223,5 +551,25 @@ class GovernedETLPipeline:
 
 
 if __name__ == "__main__":
-    pipeline = GovernedETLPipeline()
+    import argparse
+    parser = argparse.ArgumentParser(description="Governed ETL Pipeline rakamin_kalbe")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Jumlah task DAG yang boleh jalan paralel (1 = sequential)")
+    parser.add_argument("--checkpoint", action="store_true",
+                        help="Simpan output stage & skip stage yang input-nya tidak berubah saat rerun")
+    parser.add_argument("--profile", action="store_true",
+                        help="Simpan dump cProfile stage paling lambat ke logs/")
+    parser.add_argument("--prometheus", action="store_true",
+                        help="Tulis juga metrics stage ke logs/pipeline_metrics.prom")
+    parser.add_argument("--customer-join", choices=["latest", "as_of"], default="latest",
+                        help="latest: snapshot customer terbaru; as_of: versi customer saat order_date")
+    parser.add_argument("--load-mode", choices=["replace", "merge"], default="replace",
+                        help="replace: tulis ulang tabel warehouse; merge: upsert per primary key (MERGE_KEYS)")
+    parser.add_argument("--dim-mode", choices=["replace", "scd2"], default="replace",
+                        help="replace: tulis ulang dim_customers; scd2: incremental SCD Type 2")
+    args = parser.parse_args()
+    pipeline = GovernedETLPipeline(max_workers=args.workers, checkpoint=args.checkpoint,
+                                   cprofile=args.profile, prometheus=args.prometheus,
+                                   customer_join=args.customer_join, dim_mode=args.dim_mode,
+                                   load_mode=args.load_mode)
     pipeline.run_pipeline()
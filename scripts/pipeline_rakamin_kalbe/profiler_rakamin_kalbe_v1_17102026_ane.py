@@ -0,0 +1,194 @@
+import cProfile
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+try:
+    import resource
+except ImportError:  # Windows: peak RSS tidak tersedia
+    resource = None
+
+# Base path configuration
+BASE_DIR = Path(__file__).parent.parent.parent
+LOGS_DIR = BASE_DIR / "logs"
+
+
+def peak_rss_mb():
+    """Peak RSS proses sejauh ini (MB), None kalau platform tidak mendukung"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux: KB, macOS: byte
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 2)
+
+
+def count_rows(obj):
+    """Jumlah rows DataFrame / dict / list of DataFrame; None kalau tidak ada DataFrame"""
+    if isinstance(obj, pd.DataFrame):
+        return len(obj)
+    if isinstance(obj, dict):
+        obj = list(obj.values())
+    if isinstance(obj, (list, tuple)):
+        counts = [c for c in (count_rows(item) for item in obj) if c is not None]
+        return sum(counts) if counts else None
+    return None
+
+
+class StageMetrics:
+    """Metrics satu stage; rows_out diisi oleh pemanggil di dalam blok stage()"""
+    def __init__(self, run_id, name, rows_in=None):
+        self.run_id = run_id
+        self.name = name
+        self.rows_in = rows_in
+        self.rows_out = None
+        self.status = "success"
+        self.started_at = datetime.now().isoformat()
+        self.wall_seconds = 0.0
+        # thread_cpu_seconds hanya CPU thread yang membuka stage; kerja di
+        # worker thread (read pool, pyarrow) hanya terlihat di process_cpu_seconds
+        self.thread_cpu_seconds = 0.0
+        self.process_cpu_seconds = 0.0
+        self.peak_rss_mb = None
+        self.rss_growth_mb = None
+        self.profile = None
+
+    @property
+    def rows_per_sec(self):
+        rows = self.rows_out if self.rows_out is not None else self.rows_in
+        if not rows or self.wall_seconds <= 0:
+            return None
+        return round(rows / self.wall_seconds, 1)
+
+    def to_dict(self):
+        return {
+            "run_id": self.run_id,
+            "stage": self.name,
+            "status": self.status,
+            "started_at": self.started_at,
+            "wall_seconds": round(self.wall_seconds, 6),
+            "process_cpu_seconds": round(self.process_cpu_seconds, 6),
+            "thread_cpu_seconds": round(self.thread_cpu_seconds, 6),
+            "peak_rss_mb": self.peak_rss_mb,
+            "rss_growth_mb": self.rss_growth_mb,
+            "rows_in": self.rows_in,
+            "rows_out": self.rows_out,
+            "rows_per_sec": self.rows_per_sec
+        }
+
+
+class StageProfiler:
+    """
+    Ukur wall time, CPU time (thread & proses), peak RSS dan rows in/out
+    per stage pipeline, lalu tulis ke JSONL (dan opsional Prometheus text)
+    di logs/. Aman dipakai dari beberapa thread (DAGScheduler).
+    cprofile=True: stage di-profile dengan cProfile dan dump stage paling
+    lambat disimpan ke logs/. Hanya satu stage yang di-profile dalam satu
+    waktu (cProfile tidak bisa aktif paralel), stage lain tetap diukur.
+    """
+    def __init__(self, run_id=None, metrics_file=LOGS_DIR / "pipeline_metrics.jsonl",
+                 prometheus_file=None, cprofile=False):
+        self.run_id = run_id or f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:6]}"
+        self.metrics_file = Path(metrics_file)
+        self.prometheus_file = Path(prometheus_file) if prometheus_file else None
+        self.cprofile = cprofile
+        self.stages = []
+        self._lock = threading.Lock()
+        self._profile_lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name, rows_in=None, profile=True):
+        """profile=False untuk stage pembungkus (mis. seluruh run) yang tidak perlu di-cProfile"""
+        metrics = StageMetrics(self.run_id, name, rows_in)
+        profiler = None
+        if self.cprofile and profile and self._profile_lock.acquire(blocking=False):
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+            except ValueError:
+                # Profiler lain (mis. debugger) sudah aktif
+                profiler = None
+                self._profile_lock.release()
+
+        rss_before = peak_rss_mb()
+        wall_start, cpu_start, process_start = time.perf_counter(), time.thread_time(), time.process_time()
+        try:
+            yield metrics
+        except BaseException:
+            metrics.status = "failed"
+            raise
+        finally:
+            metrics.wall_seconds = time.perf_counter() - wall_start
+            metrics.thread_cpu_seconds = time.thread_time() - cpu_start
+            metrics.process_cpu_seconds = time.process_time() - process_start
+            metrics.peak_rss_mb = peak_rss_mb()
+            if rss_before is not None:
+                metrics.rss_growth_mb = round(metrics.peak_rss_mb - rss_before, 2)
+            if profiler is not None:
+                profiler.disable()
+                metrics.profile = profiler
+                self._profile_lock.release()
+            with self._lock:
+                self.stages.append(metrics)
+
+    def slowest(self, n=5):
+        with self._lock:
+            return sorted(self.stages, key=lambda m: m.wall_seconds, reverse=True)[:n]
+
+    def write(self):
+        """Append metrics run ini ke JSONL, tulis Prometheus text & dump cProfile"""
+        with self._lock:
+            stages = list(self.stages)
+        if not stages:
+            return
+
+        self.metrics_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.metrics_file, "a") as f:
+            f.writelines(json.dumps(m.to_dict()) + "\n" for m in stages)
+
+        if self.prometheus_file:
+            self.write_prometheus(stages)
+
+        profiled = [m for m in stages if m.profile is not None]
+        if profiled:
+            slowest = max(profiled, key=lambda m: m.wall_seconds)
+            dump_file = self.metrics_file.parent / f"profile_{self.run_id}_{slowest.name}.prof"
+            slowest.profile.dump_stats(dump_file)
+            logging.info(f"cProfile stage {slowest.name} ({slowest.wall_seconds:.2f}s) disimpan ke {dump_file}")
+
+    def write_prometheus(self, stages):
+        """Format text exposition Prometheus (node_exporter textfile collector)"""
+        gauges = [
+            ("etl_stage_wall_seconds", "Wall time per stage", lambda m: m.wall_seconds),
+            ("etl_stage_process_cpu_seconds",
+             "CPU time proses selama stage (termasuk worker thread dan stage lain yang jalan paralel)",
+             lambda m: m.process_cpu_seconds),
+            ("etl_stage_thread_cpu_seconds", "CPU time thread pemanggil stage saja",
+             lambda m: m.thread_cpu_seconds),
+            ("etl_stage_peak_rss_mb", "Peak RSS proses di akhir stage", lambda m: m.peak_rss_mb),
+            ("etl_stage_rows_in", "Rows masuk per stage", lambda m: m.rows_in),
+            ("etl_stage_rows_out", "Rows keluar per stage", lambda m: m.rows_out),
+            ("etl_stage_rows_per_second", "Throughput per stage", lambda m: m.rows_per_sec),
+        ]
+        lines = []
+        for metric, help_text, getter in gauges:
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} gauge")
+            for m in stages:
+                value = getter(m)
+                if value is not None:
+                    lines.append(f'{metric}{{run_id="{self.run_id}",stage="{m.name}",status="{m.status}"}} {value}')
+
+        self.prometheus_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = self.prometheus_file.with_suffix(self.prometheus_file.suffix + ".tmp")
+        with open(tmp_file, "w") as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(tmp_file, self.prometheus_file)
@@ -0,0 +1,103 @@
+import logging
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+
+class Task:
+    """
+    Satu unit kerja di DAG pipeline.
+    func dipanggil dengan satu argumen: dict nama dependency -> hasilnya.
+    """
+    def __init__(self, name, func, deps=()):
+        self.name = name
+        self.func = func
+        self.deps = tuple(deps)
+
+    def __repr__(self):
+        return f"Task({self.name!r}, deps={list(self.deps)})"
+
+
+class TaskDAG:
+    """Kumpulan Task dengan dependency; urutan add_task jadi prioritas eksekusi"""
+    def __init__(self):
+        self.tasks = {}
+
+    def add_task(self, name, func, deps=()):
+        if name in self.tasks:
+            raise ValueError(f"Task {name} sudah ada di DAG")
+        missing = [d for d in deps if d not in self.tasks]
+        if missing:
+            # Dependency harus didaftarkan dulu, jadi DAG otomatis bebas siklus
+            raise ValueError(f"Task {name} bergantung pada task yang belum ada: {missing}")
+        self.tasks[name] = Task(name, func, deps)
+        return self.tasks[name]
+
+    def topological_order(self):
+        """Urutan eksekusi sequential (sama dengan urutan add_task)"""
+        return list(self.tasks)
+
+
+class DAGScheduler:
+    """
+    Jalankan TaskDAG di thread pool terbatas.
+    Task yang dependency-nya sudah selesai disubmit sesuai urutan add_task.
+    max_workers=1 menjalankan semua task berurutan di thread pemanggil,
+    persis seperti pipeline sequential.
+    Kalau satu task gagal, task baru tidak disubmit lagi, task yang sedang
+    jalan ditunggu selesai, lalu exception pertama di-raise ulang.
+    """
+    def __init__(self, max_workers=1):
+        if max_workers < 1:
+            raise ValueError(f"max_workers minimal 1, bukan {max_workers}")
+        self.max_workers = max_workers
+        self.durations = {}
+
+    def _run_task(self, task, results):
+        inputs = {dep: results[dep] for dep in task.deps}
+        start = time.perf_counter()
+        try:
+            return task.func(inputs)
+        finally:
+            self.durations[task.name] = time.perf_counter() - start
+            logging.info(f"Task {task.name} selesai dalam {self.durations[task.name]:.2f}s")
+
+    def run(self, dag):
+        """Return dict nama task -> hasil"""
+        results = {}
+        if self.max_workers == 1:
+            for name in dag.topological_order():
+                results[name] = self._run_task(dag.tasks[name], results)
+            return results
+
+        pending = list(dag.topological_order())
+        running = {}
+        error = None
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="etl-task") as executor:
+            while pending or running:
+                if error is None:
+                    for name in list(pending):
+                        if len(running) >= self.max_workers:
+                            break
+                        task = dag.tasks[name]
+                        if all(dep in results for dep in task.deps):
+                            pending.remove(name)
+                            running[executor.submit(self._run_task, task, dict(results))] = name
+                elif not running:
+                    break
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    try:
+                        results[name] = future.result()
+                    except Exception as e:
+                        logging.error(f"Task {name} gagal: {e}")
+                        if error is None:
+                            error = e
+
+        if error is not None:
+            skipped = [name for name in pending if name not in results]
+            if skipped:
+                logging.error(f"Task dilewati karena ada task yang gagal: {skipped}")
+            raise error
+        return results
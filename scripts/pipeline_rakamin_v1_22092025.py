@@ -2,9 +2,16 @@ from scripts.extract import extract_from_folder
 #from scripts.transform import clean_retail_data
 #from scripts.load import load_to_sql
 
-def main():
-    # Extract
-    df = extract_from_folder("../data/raw/rakamin", recursive=True)
+MANIFEST_PATH = "../logs/extract_manifest_rakamin.json"
+
+def main(full_rescan=False):
+    # Extract (only files that are new or changed since the last run)
+    df = extract_from_folder(
+        "../data/raw/rakamin",
+        recursive=True,
+        manifest_path=MANIFEST_PATH,
+        full_rescan=full_rescan,
+    )
 
     # Transform
     #df_clean = clean_retail_data(df)
@@ -13,4 +20,5 @@ def main():
     #load_to_sql(df_clean, table_name="retail_sales")
 
 if __name__ == "__main__":
-    main()
+    import sys
+    main(full_rescan="--full-rescan" in sys.argv)
@@ -1,7 +1,12 @@
 import pandas as pd
 import numpy as np
+import copy
+import hashlib
 import json
 import logging
+import re
+import threading
+from collections import OrderedDict
 from datetime import datetime
 from pathlib import Path
 
@@ -9,20 +14,249 @@ from pathlib import Path
 BASE_DIR = Path(__file__).parent.parent.parent
 CONFIG_DIR = BASE_DIR / "config"
 
+# Cache rules per file config: path -> (mtime_ns, rules)
+_RULES_CACHE = {}
+
+# Pattern untuk format_rules di quality_rules.json (di-compile sekali saat import)
+FORMAT_PATTERNS = {
+    "email_format": re.compile(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9-]+(\.[A-Za-z0-9-]+)*\.[A-Za-z]{2,}"),
+    "phone_format": re.compile(r"\+?[0-9][0-9 ()-]{6,19}"),
+    "date_format": re.compile(r"\d{4}-\d{2}-\d{2}"),
+    "alphanumeric": re.compile(r"[A-Za-z0-9]+")
+}
+
+def fingerprint_dataframe(df):
+    """
+    Fingerprint isi DataFrame: shape, nama kolom + dtype, dan hash semua row
+    (pd.util.hash_pandas_object, vectorized). Return None kalau ada kolom
+    yang tidak bisa di-hash (mis. berisi list).
+    """
+    try:
+        row_hashes = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    except TypeError:
+        return None
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr((df.shape, [str(c) for c in df.columns], [str(t) for t in df.dtypes])).encode())
+    digest.update(row_hashes.tobytes())
+    return digest.hexdigest()
+
+def count_format_matches(series, rule):
+    """
+    Hitung (checked_count, valid_count) untuk satu format rule.
+    Regex dijalankan sekali per nilai distinct (pd.factorize), lalu hasilnya
+    dipetakan balik lewat jumlah kemunculan tiap nilai. NULL tidak dihitung.
+    """
+    pattern = FORMAT_PATTERNS[rule]
+    if rule == 'date_format' and pd.api.types.is_datetime64_any_dtype(series):
+        # Sudah bertipe tanggal, semua nilai non-null otomatis valid
+        checked_count = int(series.notna().sum())
+        return checked_count, checked_count
+
+    codes, uniques = pd.factorize(series)
+    value_counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+    unique_values = pd.Series(uniques, dtype=object).astype(str)
+    unique_valid = unique_values.str.fullmatch(pattern).to_numpy(dtype=bool)
+    if rule == 'date_format':
+        # Regex lolos tapi tanggal tidak ada (mis. 2025-02-30) tetap invalid
+        parsed = pd.to_datetime(unique_values, format="%Y-%m-%d", errors="coerce")
+        unique_valid = unique_valid & parsed.notna().to_numpy()
+    return int(value_counts.sum()), int(value_counts[unique_valid].sum())
+
+class QualityRulePlan:
+    """
+    Rules satu tabel yang sudah di-compile: daftar kolom per check dan
+    batas range sebagai Series, supaya tiap family check cukup satu
+    operasi vectorized atas semua kolomnya.
+    """
+    def __init__(self, table_rules, completeness_threshold, accuracy_threshold):
+        # Identitas isi rules, dipakai sebagai bagian key result cache
+        self.signature = json.dumps(
+            [table_rules, completeness_threshold, accuracy_threshold], sort_keys=True, default=str
+        )
+        self.completeness_threshold = completeness_threshold
+        self.accuracy_threshold = accuracy_threshold
+        self.not_null_columns = list(table_rules.get('not_null_columns', []))
+        self.unique_columns = list(table_rules.get('unique_columns', []))
+        value_ranges = table_rules.get('value_ranges', {})
+        self.range_columns = list(value_ranges.keys())
+        self.range_min = pd.Series({c: r['min'] for c, r in value_ranges.items()})
+        self.range_max = pd.Series({c: r['max'] for c, r in value_ranges.items()})
+        self.format_rules = dict(table_rules.get('format_rules', {}))
+
+    def is_empty(self):
+        """True kalau tabel ini tidak punya check sama sekali"""
+        return not (self.not_null_columns or self.unique_columns or self.range_columns or self.format_rules)
+
+    def completeness_result(self, column, null_count, total):
+        completeness = 1 - (null_count / total) if total > 0 else 1
+        return {
+            'metric': 'completeness',
+            'column': column,
+            'null_count': null_count,
+            'completeness_rate': completeness,
+            'threshold': self.completeness_threshold,
+            'passed': completeness >= self.completeness_threshold
+        }
+
+    def uniqueness_result(self, column, unique_count, total):
+        duplicate_count = total - unique_count
+        uniqueness = unique_count / total if total > 0 else 1
+        return {
+            'metric': 'uniqueness',
+            'column': column,
+            'unique_count': unique_count,
+            'duplicate_count': duplicate_count,
+            'uniqueness_rate': uniqueness,
+            'passed': duplicate_count == 0
+        }
+
+    def accuracy_result(self, column, valid_count, total):
+        accuracy = valid_count / total if total > 0 else 1
+        return {
+            'metric': 'accuracy',
+            'column': column,
+            'valid_count': valid_count,
+            'invalid_count': total - valid_count,
+            'accuracy_rate': accuracy,
+            'threshold': self.accuracy_threshold,
+            'passed': accuracy >= self.accuracy_threshold
+        }
+
+    def format_result(self, column, rule, checked_count, valid_count):
+        format_rate = valid_count / checked_count if checked_count > 0 else 1
+        return {
+            'metric': 'format',
+            'column': column,
+            'rule': rule,
+            'valid_count': valid_count,
+            'invalid_count': checked_count - valid_count,
+            'format_rate': format_rate,
+            'threshold': self.accuracy_threshold,
+            'passed': format_rate >= self.accuracy_threshold
+        }
+
+    def evaluate_completeness(self, df):
+        columns = [c for c in self.not_null_columns if c in df.columns]
+        if not columns:
+            return {}
+        null_counts = df[columns].isnull().sum()
+        return {
+            f'completeness_{column}': self.completeness_result(column, null_counts[column], len(df))
+            for column in columns
+        }
+
+    def evaluate_uniqueness(self, df):
+        columns = [c for c in self.unique_columns if c in df.columns]
+        if not columns:
+            return {}
+        unique_counts = df[columns].nunique(dropna=True)
+        return {
+            f'uniqueness_{column}': self.uniqueness_result(column, int(unique_counts[column]), len(df))
+            for column in columns
+        }
+
+    def evaluate_accuracy(self, df):
+        columns = [c for c in self.range_columns if c in df.columns]
+        if not columns:
+            return {}
+        values = df[columns]
+        in_range = values.ge(self.range_min[columns], axis=1) & values.le(self.range_max[columns], axis=1)
+        valid_counts = in_range.sum()
+        return {
+            f'accuracy_{column}': self.accuracy_result(column, valid_counts[column], len(df))
+            for column in columns
+        }
+
+    def format_columns(self, columns):
+        """(kolom, rule) dari format_rules yang ada di columns dan rule-nya dikenal"""
+        pairs = []
+        for column, rule in self.format_rules.items():
+            if column not in columns:
+                continue
+            if rule not in FORMAT_PATTERNS:
+                logging.warning(f"Unknown format rule '{rule}' for column {column}, skipped")
+                continue
+            pairs.append((column, rule))
+        return pairs
+
+    def evaluate_format(self, df):
+        """
+        Validasi format_rules per nilai distinct (lihat count_format_matches).
+        NULL tidak dihitung karena sudah dicek completeness.
+        """
+        results = {}
+        for column, rule in self.format_columns(df.columns):
+            checked_count, valid_count = count_format_matches(df[column], rule)
+            results[f'format_{column}'] = self.format_result(column, rule, checked_count, valid_count)
+        return results
+
+    def evaluate(self, df):
+        """Jalankan semua check; urutan key sama dengan run_all_checks versi lama"""
+        checks = {}
+        checks.update(self.evaluate_completeness(df))
+        checks.update(self.evaluate_uniqueness(df))
+        checks.update(self.evaluate_accuracy(df))
+        checks.update(self.evaluate_format(df))
+        return checks
+
+
 class DataQualityFramework:
-    def __init__(self, rules_config="quality_rules.json"):
+    def __init__(self, rules_config="quality_rules.json", cache_results=True, cache_size=128):
         self.rules_config = CONFIG_DIR / rules_config
         self.quality_results = []
+        self._plans = {}
+        # Result cache: (fingerprint data, versi rules, signature plan) -> checks
+        self.cache_results = cache_results
+        self.cache_size = cache_size
+        self._result_cache = OrderedDict()
+        self.cache_hits = 0
+        self.cache_misses = 0
+        # Checker bisa dipakai beberapa task pipeline sekaligus (DAGScheduler)
+        self._cache_lock = threading.Lock()
 
     def load_quality_rules(self):
-        """Load quality rules from JSON config"""
+        """
+        Load quality rules from JSON config.
+        Hasil parse di-cache dan hanya dibaca ulang kalau mtime file berubah.
+        """
         try:
-            with open(self.rules_config, 'r') as f:
-                return json.load(f)
+            mtime = self.rules_config.stat().st_mtime_ns
         except FileNotFoundError:
             logging.warning(f"Rules config not found at {self.rules_config}, using default rules.")
             return self.get_default_rules()
 
+        cached = _RULES_CACHE.get(self.rules_config)
+        if cached and cached[0] == mtime:
+            return cached[1]
+
+        with open(self.rules_config, 'r') as f:
+            rules = json.load(f)
+        _RULES_CACHE[self.rules_config] = (mtime, rules)
+        return rules
+
+    def rules_version(self):
+        """Versi rule set: mtime file config, atau 'default' kalau pakai default rules"""
+        try:
+            return self.rules_config.stat().st_mtime_ns
+        except FileNotFoundError:
+            return "default"
+
+    def compile_rules(self, table_name):
+        """Compile rules satu tabel jadi QualityRulePlan (cached per versi rules)"""
+        version = self.rules_version()
+        cached = self._plans.get(table_name)
+        if cached and cached[0] == version:
+            return cached[1]
+
+        rules = self.load_quality_rules()
+        plan = QualityRulePlan(
+            rules['table_specific_rules'].get(table_name, {}),
+            rules['completeness_threshold'],
+            rules['accuracy_threshold']
+        )
+        self._plans[table_name] = (version, plan)
+        return plan
+
     def get_default_rules(self):
         """Default quality rules untuk project rakamin"""
         return {
@@ -57,74 +291,66 @@ class DataQualityFramework:
 class DataQualityChecker(DataQualityFramework):
     def check_completeness(self, df, table_name):
         """Check data completeness"""
-        rules = self.load_quality_rules()
-        table_rules = rules['table_specific_rules'].get(table_name, {})
-
-        results = {}
-        for column in table_rules.get('not_null_columns', []):
-            if column in df.columns:
-                null_count = df[column].isnull().sum()
-                completeness = 1 - (null_count / len(df)) if len(df) > 0 else 1
-                results[f'completeness_{column}'] = {
-                    'metric': 'completeness',
-                    'column': column,
-                    'null_count': null_count,
-                    'completeness_rate': completeness,
-                    'threshold': rules['completeness_threshold'],
-                    'passed': completeness >= rules['completeness_threshold']
-                }
-        return results
+        return self.compile_rules(table_name).evaluate_completeness(df)
 
     def check_uniqueness(self, df, table_name):
         """Check data uniqueness"""
-        rules = self.load_quality_rules()
-        table_rules = rules['table_specific_rules'].get(table_name, {})
-
-        results = {}
-        for column in table_rules.get('unique_columns', []):
-            if column in df.columns:
-                unique_count = df[column].nunique(dropna=True)
-                duplicate_count = len(df) - unique_count
-                uniqueness = unique_count / len(df) if len(df) > 0 else 1
-                results[f'uniqueness_{column}'] = {
-                    'metric': 'uniqueness',
-                    'column': column,
-                    'unique_count': unique_count,
-                    'duplicate_count': duplicate_count,
-                    'uniqueness_rate': uniqueness,
-                    'passed': duplicate_count == 0
-                }
-        return results
+        return self.compile_rules(table_name).evaluate_uniqueness(df)
 
     def check_accuracy(self, df, table_name):
         """Check data accuracy berdasarkan business rules"""
-        rules = self.load_quality_rules()
-        table_rules = rules['table_specific_rules'].get(table_name, {})
+        return self.compile_rules(table_name).evaluate_accuracy(df)
 
-        results = {}
-        value_ranges = table_rules.get('value_ranges', {})
-        for column, range_config in value_ranges.items():
-            if column in df.columns:
-                valid_count = df[column].between(range_config['min'], range_config['max'], inclusive="both").sum()
-                accuracy = valid_count / len(df) if len(df) > 0 else 1
-                results[f'accuracy_{column}'] = {
-                    'metric': 'accuracy',
-                    'column': column,
-                    'valid_count': valid_count,
-                    'invalid_count': len(df) - valid_count,
-                    'accuracy_rate': accuracy,
-                    'threshold': rules['accuracy_threshold'],
-                    'passed': accuracy >= rules['accuracy_threshold']
-                }
-        return results
+    def check_format(self, df, table_name):
+        """Check format_rules (email, phone, date, alphanumeric)"""
+        return self.compile_rules(table_name).evaluate_format(df)
 
-    def run_all_checks(self, df, table_name):
-        """Run semua quality checks"""
-        checks = {}
-        checks.update(self.check_completeness(df, table_name))
-        checks.update(self.check_uniqueness(df, table_name))
-        checks.update(self.check_accuracy(df, table_name))
+    def run_all_checks(self, df, table_name, rules_table=None):
+        """
+        Run semua quality checks.
+        table_name adalah label di laporan; rules_table (default table_name)
+        adalah key di table_specific_rules, mis. customers_clean -> customers.
+        Frame yang isinya identik dan rules-nya sama (mis. customers_clean lalu
+        final_dim_customers) memakai hasil cache, tidak dievaluasi ulang.
+        """
+        plan = self.compile_rules(rules_table or table_name)
+        cache_key = None
+        # Tanpa rules tidak ada yang perlu di-cache, fingerprint cuma buang waktu
+        if self.cache_results and not plan.is_empty():
+            fingerprint = fingerprint_dataframe(df)
+            if fingerprint is not None:
+                cache_key = (fingerprint, self.rules_version(), plan.signature)
 
+        checks = None
+        if cache_key is not None:
+            with self._cache_lock:
+                if cache_key in self._result_cache:
+                    self._result_cache.move_to_end(cache_key)
+                    checks = copy.deepcopy(self._result_cache[cache_key])
+                    self.cache_hits += 1
+            if checks is not None:
+                logging.info(f"Quality cache hit untuk {table_name} (hits={self.cache_hits}, misses={self.cache_misses})")
+
+        if checks is None:
+            checks = plan.evaluate(df)
+            if cache_key is not None:
+                with self._cache_lock:
+                    self.cache_misses += 1
+                    self._result_cache[cache_key] = copy.deepcopy(checks)
+                    if len(self._result_cache) > self.cache_size:
+                        self._result_cache.popitem(last=False)
+                logging.info(f"Quality cache miss untuk {table_name} (hits={self.cache_hits}, misses={self.cache_misses})")
+
+        result = self.summarize_checks(table_name, len(df), checks)
+        self.quality_results.append(result)
+        return result
+
+    def cache_stats(self):
+        """Jumlah hit/miss result cache"""
+        return {"hits": self.cache_hits, "misses": self.cache_misses, "entries": len(self._result_cache)}
+
+    def summarize_checks(self, table_name, total_records, checks):
+        """Hitung quality score & status dari hasil checks"""
         passed_checks = sum(1 for check in checks.values() if check['passed'])
         total_checks = len(checks)
         quality_score = (passed_checks / total_checks) * 100 if total_checks > 0 else 100
@@ -132,11 +358,9 @@ class DataQualityChecker(DataQualityFramework):
         result = {
             'table_name': table_name,
             'timestamp': datetime.now().isoformat(),
-            'total_records': len(df),
+            'total_records': total_records,
             'quality_score': quality_score,
             'checks': checks,
             'overall_status': 'PASS' if quality_score >= 95 else 'WARNING' if quality_score >= 80 else 'FAIL'
         }
-
-        self.quality_results.append(result)
         return result
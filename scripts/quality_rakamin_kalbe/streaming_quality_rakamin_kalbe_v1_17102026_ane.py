@@ -0,0 +1,276 @@
+import numpy as np
+import pandas as pd
+from functools import reduce
+
+from scripts.quality_rakamin_kalbe.data_quality_rakamin_kalbe_v1_24092025_ane import (
+    DataQualityChecker,
+    count_format_matches
+)
+
+
+def _hash_array(values):
+    return pd.util.hash_pandas_object(pd.Series(values), index=False).to_numpy(dtype=np.uint64)
+
+
+def hash_values(series):
+    """
+    Hash 64-bit untuk setiap nilai non-null.
+    Integer di-hash sebagai int64 (tanpa lewat float, jadi ID di atas 2**53
+    tetap berbeda). Float yang nilainya bulat juga di-hash sebagai int64,
+    supaya kolom integer yang jadi float64 di chunk lain karena ada NaN
+    tetap menghasilkan hash yang sama. Sisanya dinormalisasi ke object.
+    """
+    values = series.dropna()
+    if pd.api.types.is_bool_dtype(values) or pd.api.types.is_integer_dtype(values):
+        # uint64 di atas 2**63 ikut wrap; bit pattern tetap unik
+        return _hash_array(values.to_numpy().astype(np.int64))
+    if pd.api.types.is_float_dtype(values):
+        floats = values.to_numpy(dtype=np.float64)
+        hashes = _hash_array(floats).copy()
+        integral = np.isfinite(floats) & (np.floor(floats) == floats) & (np.abs(floats) < 2.0 ** 63)
+        if integral.any():
+            hashes[integral] = _hash_array(floats[integral].astype(np.int64))
+        return hashes
+    if not pd.api.types.is_datetime64_any_dtype(values):
+        values = values.astype(object)
+    return pd.util.hash_pandas_object(values, index=False).to_numpy(dtype=np.uint64)
+
+
+def _bit_length(values):
+    """bit_length per elemen uint64 lewat binary search shift (tanpa float, exact)."""
+    length = np.zeros(len(values), dtype=np.int64)
+    for shift in (32, 16, 8, 4, 2, 1):
+        high = values >> np.uint64(shift)
+        has_high = high > 0
+        length += shift * has_high
+        values = np.where(has_high, high, values)
+    return length + (values > 0)
+
+
+class HyperLogLog:
+    """HyperLogLog sederhana di atas hash 64-bit, register uint8"""
+    def __init__(self, precision=14):
+        if not 4 <= precision <= 18:
+            raise ValueError(f"precision harus 4..18, bukan {precision}")
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    def add_hashes(self, hashes):
+        if len(hashes) == 0:
+            return
+        bits = 64 - self.precision
+        index = (hashes >> np.uint64(bits)).astype(np.int64)
+        rest = hashes & np.uint64((1 << bits) - 1)
+        # rank = posisi bit 1 pertama dari kiri di sisa bit (leading zero + 1)
+        rank = (bits + 1 - _bit_length(rest)).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+
+    def merge(self, other):
+        if other.precision != self.precision:
+            raise ValueError("Tidak bisa merge HyperLogLog dengan precision berbeda")
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def estimate(self):
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(np.int64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * m and zeros > 0:
+            # Small-range correction (linear counting)
+            raw = m * np.log(m / zeros)
+        return int(round(raw))
+
+
+class CompletenessAccumulator:
+    def __init__(self, column):
+        self.column = column
+        self.seen = False
+        self.null_count = 0
+
+    def update(self, chunk):
+        if self.column in chunk.columns:
+            self.seen = True
+            self.null_count += int(chunk[self.column].isnull().sum())
+        else:
+            # Kolom tidak ada di chunk ini = NULL kalau chunk-chunk digabung
+            self.null_count += len(chunk)
+
+    def merge(self, other):
+        self.seen = self.seen or other.seen
+        self.null_count += other.null_count
+        return self
+
+
+class UniquenessAccumulator:
+    """
+    Distinct count per kolom.
+    mode="exact": set hash 64-bit (sorted unique uint64, di-compact berkala).
+    mode="hll": HyperLogLog, memory tetap 2**precision byte per kolom.
+    """
+    def __init__(self, column, mode="exact", precision=14):
+        if mode not in ("exact", "hll"):
+            raise ValueError(f"mode harus 'exact' atau 'hll', bukan {mode}")
+        self.column = column
+        self.mode = mode
+        self.seen = False
+        self.hll = HyperLogLog(precision) if mode == "hll" else None
+        self.hashes = np.empty(0, dtype=np.uint64)
+        self._pending = []
+        self._pending_size = 0
+
+    def _add(self, hashes):
+        if self.mode == "hll":
+            self.hll.add_hashes(hashes)
+            return
+        self._pending.append(np.unique(hashes))
+        self._pending_size += len(self._pending[-1])
+        if self._pending_size > max(len(self.hashes), 1_000_000):
+            self._compact()
+
+    def _compact(self):
+        if self._pending:
+            self.hashes = np.unique(np.concatenate([self.hashes] + self._pending))
+            self._pending = []
+            self._pending_size = 0
+
+    def update(self, chunk):
+        if self.column in chunk.columns:
+            self.seen = True
+            self._add(hash_values(chunk[self.column]))
+
+    def merge(self, other):
+        self.seen = self.seen or other.seen
+        if self.mode == "hll":
+            self.hll.merge(other.hll)
+        else:
+            other._compact()
+            self._add(other.hashes)
+        return self
+
+    def unique_count(self):
+        if self.mode == "hll":
+            return self.hll.estimate()
+        self._compact()
+        return len(self.hashes)
+
+
+class RangeAccumulator:
+    def __init__(self, column, min_value, max_value):
+        self.column = column
+        self.min_value = min_value
+        self.max_value = max_value
+        self.seen = False
+        self.valid_count = 0
+
+    def update(self, chunk):
+        if self.column in chunk.columns:
+            self.seen = True
+            self.valid_count += int(
+                chunk[self.column].between(self.min_value, self.max_value, inclusive="both").sum()
+            )
+
+    def merge(self, other):
+        self.seen = self.seen or other.seen
+        self.valid_count += other.valid_count
+        return self
+
+
+class FormatAccumulator:
+    def __init__(self, column, rule):
+        self.column = column
+        self.rule = rule
+        self.seen = False
+        self.checked_count = 0
+        self.valid_count = 0
+
+    def update(self, chunk):
+        if self.column in chunk.columns:
+            self.seen = True
+            checked_count, valid_count = count_format_matches(chunk[self.column], self.rule)
+            self.checked_count += checked_count
+            self.valid_count += valid_count
+
+    def merge(self, other):
+        self.seen = self.seen or other.seen
+        self.checked_count += other.checked_count
+        self.valid_count += other.valid_count
+        return self
+
+
+class TableQualityAccumulator:
+    """
+    State quality check satu tabel yang bisa di-update per chunk dan
+    di-merge dengan accumulator lain (mis. hasil worker process lain).
+    """
+    def __init__(self, plan, uniqueness_mode="exact", hll_precision=14):
+        self.plan = plan
+        self.total_records = 0
+        self.completeness = [CompletenessAccumulator(c) for c in plan.not_null_columns]
+        self.uniqueness = [UniquenessAccumulator(c, uniqueness_mode, hll_precision) for c in plan.unique_columns]
+        self.accuracy = [
+            RangeAccumulator(c, plan.range_min[c], plan.range_max[c]) for c in plan.range_columns
+        ]
+        self.formats = [FormatAccumulator(c, r) for c, r in plan.format_columns(plan.format_rules)]
+
+    def _accumulators(self):
+        return self.completeness + self.uniqueness + self.accuracy + self.formats
+
+    def update(self, chunk):
+        self.total_records += len(chunk)
+        for accumulator in self._accumulators():
+            accumulator.update(chunk)
+        return self
+
+    def merge(self, other):
+        self.total_records += other.total_records
+        for mine, theirs in zip(self._accumulators(), other._accumulators()):
+            mine.merge(theirs)
+        return self
+
+    def checks(self):
+        """Dict checks dengan bentuk & urutan yang sama seperti QualityRulePlan.evaluate"""
+        total = self.total_records
+        checks = {}
+        for acc in self.completeness:
+            if acc.seen:
+                checks[f'completeness_{acc.column}'] = self.plan.completeness_result(acc.column, acc.null_count, total)
+        for acc in self.uniqueness:
+            if acc.seen:
+                checks[f'uniqueness_{acc.column}'] = self.plan.uniqueness_result(acc.column, acc.unique_count(), total)
+        for acc in self.accuracy:
+            if acc.seen:
+                checks[f'accuracy_{acc.column}'] = self.plan.accuracy_result(acc.column, acc.valid_count, total)
+        for acc in self.formats:
+            if acc.seen:
+                checks[f'format_{acc.column}'] = self.plan.format_result(
+                    acc.column, acc.rule, acc.checked_count, acc.valid_count
+                )
+        return checks
+
+
+class StreamingQualityChecker(DataQualityChecker):
+    """
+    DataQualityChecker untuk data yang tidak muat di memory: data masuk
+    per chunk (mis. dari iter_extract), hasil akhirnya sama dengan
+    run_all_checks atas DataFrame gabungan.
+    """
+    def create_accumulator(self, table_name, uniqueness_mode="exact", hll_precision=14):
+        return TableQualityAccumulator(self.compile_rules(table_name), uniqueness_mode, hll_precision)
+
+    def finalize(self, accumulator, table_name):
+        """Ubah accumulator (sudah di-merge) jadi result dict seperti run_all_checks"""
+        result = self.summarize_checks(table_name, accumulator.total_records, accumulator.checks())
+        self.quality_results.append(result)
+        return result
+
+    def run_chunked_checks(self, chunks, table_name, uniqueness_mode="exact", hll_precision=14):
+        """Run semua quality checks atas iterable of DataFrame"""
+        accumulator = self.create_accumulator(table_name, uniqueness_mode, hll_precision)
+        for chunk in chunks:
+            accumulator.update(chunk)
+        return self.finalize(accumulator, table_name)
+
+    def merge_accumulators(self, accumulators):
+        """Gabungkan accumulator dari beberapa worker"""
+        return reduce(lambda left, right: left.merge(right), accumulators)
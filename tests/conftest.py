@@ -0,0 +1,6 @@
+import sys
+from pathlib import Path
+
+# Modul di-import sebagai scripts.<paket>.<modul>, sama seperti di pipeline
+ROOT_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT_DIR))
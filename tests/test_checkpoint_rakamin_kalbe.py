@@ -0,0 +1,111 @@
+import os
+from types import SimpleNamespace
+
+import pandas as pd
+
+from scripts.pipeline_rakamin_kalbe.checkpoint_rakamin_kalbe_v1_17102026_ane import (
+    StageCheckpointStore,
+    code_version,
+    file_fingerprint,
+    stage_key
+)
+from scripts.pipeline_rakamin_kalbe.pipeline_rakamin_kalbe_v1_24092025_2155_ane import GovernedETLPipeline
+
+
+def pipeline_keys(db_source, rules_config, customer_join="latest"):
+    """GovernedETLPipeline.checkpoint_keys tanpa membuat pipeline (tanpa folder/db)"""
+    pipeline = SimpleNamespace(
+        EXTRACT_TABLES=GovernedETLPipeline.EXTRACT_TABLES,
+        dtype_optimization=False,
+        customer_join=customer_join,
+        quality_checker=SimpleNamespace(rules_config=str(rules_config))
+    )
+    return GovernedETLPipeline.checkpoint_keys(pipeline, db_source)
+
+
+def test_save_and_load_round_trip(tmp_path):
+    store = StageCheckpointStore(tmp_path)
+    orders = pd.DataFrame({"amount": [1.5, 2.0]}, index=pd.Index([10, 20], name="order_id"))
+
+    assert store.save("extract", "k1", {"orders": orders, "sales": None}, meta={"rows": 2})
+    frames, meta = store.load("extract", "k1")
+
+    pd.testing.assert_frame_equal(frames["orders"], orders)
+    assert frames["sales"] is None
+    assert meta == {"rows": 2}
+    assert store.load("extract", "other") is None
+
+
+def test_corrupted_manifest_is_recomputed(tmp_path):
+    store = StageCheckpointStore(tmp_path)
+    store.save("extract", "k1", {"orders": pd.DataFrame({"a": [1]})})
+    (tmp_path / "extract" / "k1" / "manifest.json").write_text("{not json")
+
+    assert store.load("extract", "k1") is None
+
+
+def test_prune_keeps_newest_checkpoints(tmp_path):
+    store = StageCheckpointStore(tmp_path, keep=2)
+    frames = {"output": pd.DataFrame({"a": [1]})}
+    for age, key in [(300, "k1"), (200, "k2"), (0, "k3")]:
+        store.save("transform", key, frames)
+        stamp = (tmp_path / "transform" / key).stat().st_mtime - age
+        os.utime(tmp_path / "transform" / key, (stamp, stamp))
+
+    assert sorted(p.name for p in (tmp_path / "transform").iterdir()) == ["k2", "k3"]
+
+
+def test_stage_key_is_stable_for_same_inputs():
+    assert stage_key("extract", [["a.db", 1, 2]], "v1") == stage_key("extract", [["a.db", 1, 2]], "v1")
+    assert stage_key("extract", [["a.db", 1, 2]], "v1") != stage_key("transform", [["a.db", 1, 2]], "v1")
+
+
+def test_source_change_invalidates_every_stage(tmp_path):
+    db_source = tmp_path / "source.db"
+    rules = tmp_path / "rules.json"
+    db_source.write_bytes(b"v1")
+    rules.write_text("{}")
+    before = pipeline_keys(db_source, rules)
+
+    db_source.write_bytes(b"v2 longer")
+    after = pipeline_keys(db_source, rules)
+
+    assert all(before[stage] != after[stage] for stage in before)
+
+
+def test_wal_file_is_part_of_fingerprint(tmp_path):
+    db_source = tmp_path / "source.db"
+    db_source.write_bytes(b"v1")
+    before = file_fingerprint(db_source)
+
+    (tmp_path / "source.db-wal").write_bytes(b"pending")
+
+    assert file_fingerprint(db_source) != before
+
+
+def test_rules_or_code_change_invalidates_keys(tmp_path):
+    db_source = tmp_path / "source.db"
+    rules = tmp_path / "rules.json"
+    db_source.write_bytes(b"v1")
+    rules.write_text("{}")
+    before = pipeline_keys(db_source, rules)
+    version = code_version([rules])
+
+    rules.write_text('{"tables": {}}')
+
+    assert code_version([rules]) != version
+    assert all(before[stage] != key for stage, key in pipeline_keys(db_source, rules).items())
+
+
+def test_join_mode_only_invalidates_transform_stages(tmp_path):
+    db_source = tmp_path / "source.db"
+    rules = tmp_path / "rules.json"
+    db_source.write_bytes(b"v1")
+    rules.write_text("{}")
+
+    latest = pipeline_keys(db_source, rules, customer_join="latest")
+    as_of = pipeline_keys(db_source, rules, customer_join="as_of")
+
+    assert latest["extract"] == as_of["extract"]
+    assert latest["transform_fact_orders"] != as_of["transform_fact_orders"]
+    assert latest["qc_fact_orders"] != as_of["qc_fact_orders"]
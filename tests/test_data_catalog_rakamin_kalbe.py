@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+
+from scripts.governance_rakamin_kalbe.data_catalog_rakamin_kalbe_v1_24092025_ane import DataCatalog, profile_columns
+
+
+def make_orders(n_rows=20000):
+    rng = np.random.default_rng(3)
+    return pd.DataFrame({
+        "order_id": np.arange(n_rows),
+        "customer_id": rng.integers(0, 5000, n_rows),
+        "status": rng.choice(["new", "paid", "shipped"], n_rows)
+    })
+
+
+def make_catalog(tmp_path):
+    catalog = DataCatalog(str(tmp_path / "catalog.db"))
+    catalog.docs_dir = tmp_path
+    return catalog
+
+
+def test_sampled_profile_marks_non_key_columns():
+    profile = profile_columns(make_orders(), sample_rows=1000)
+
+    assert profile.attrs["method"] == "sample"
+    assert set(profile.attrs["sampled_columns"]) == {"customer_id", "status"}
+    assert profile.set_index("column_name").loc["order_id", "unique_count"] == 20000
+
+
+def test_sampled_distinct_counts_do_not_trigger_change(tmp_path):
+    catalog = make_catalog(tmp_path)
+    df = make_orders()
+
+    assert catalog.update_catalog(df, "fact_orders", "test")
+    # customer_id: ~5000 distinct full-table vs <1000 di sample
+    assert not catalog.update_catalog(df, "fact_orders", "test", sample_rows=1000)
+    assert not catalog.update_catalog(df, "fact_orders", "test")
+
+
+def test_exact_distinct_drift_still_triggers_change(tmp_path):
+    catalog = make_catalog(tmp_path)
+    df = make_orders()
+    catalog.update_catalog(df, "fact_orders", "test")
+
+    assert catalog.update_catalog(df.assign(customer_id=df["customer_id"] % 100), "fact_orders", "test")
@@ -0,0 +1,39 @@
+import pandas as pd
+
+from scripts.quality_rakamin_kalbe.data_quality_rakamin_kalbe_v1_24092025_ane import DataQualityChecker
+
+
+def make_customers():
+    return pd.DataFrame({
+        "customer_id": [1, 2, 3],
+        "customer_name": ["Ani", "Budi", None],
+        "email": ["ani@mail.com", "budi@mail.com", "unknown@email.com"],
+        "phone": ["08123456789", "0000000000", "+62 812 3456"]
+    })
+
+
+def test_same_frame_twice_hits_cache(caplog):
+    checker = DataQualityChecker()
+    df = make_customers()
+    caplog.set_level("INFO")
+
+    first = checker.run_all_checks(df, "customers")
+    second = checker.run_all_checks(df.copy(), "customers")
+
+    assert checker.cache_stats() == {"hits": 1, "misses": 1, "entries": 1}
+    assert second["checks"] == first["checks"]
+    assert "Quality cache hit untuk customers" in caplog.text
+
+
+def test_stage_labels_use_rules_table():
+    checker = DataQualityChecker()
+    df = make_customers()
+
+    # Label pipeline tidak ada di config; rules diambil dari rules_table
+    clean = checker.run_all_checks(df, "customers_clean", rules_table="customers")
+    final = checker.run_all_checks(df, "final_dim_customers", rules_table="customers")
+
+    assert clean["checks"], "rules customers harus dievaluasi"
+    assert final["table_name"] == "final_dim_customers"
+    assert final["checks"] == clean["checks"]
+    assert checker.cache_stats()["hits"] == 1
@@ -0,0 +1,68 @@
+import os
+
+import pandas as pd
+
+from scripts.extract import extract_from_folder, load_manifest
+
+
+def write_csv(path, rows):
+    pd.DataFrame({"order_id": rows, "amount": [r * 10 for r in rows]}).to_csv(path, index=False)
+
+
+def test_manifest_reads_only_new_or_changed_files(tmp_path):
+    raw_dir = tmp_path / "raw"
+    raw_dir.mkdir()
+    manifest = tmp_path / "manifest.json"
+    write_csv(raw_dir / "a.csv", [1, 2])
+    write_csv(raw_dir / "b.csv", [3])
+
+    first = extract_from_folder(raw_dir, manifest_path=manifest)
+    assert sorted(first["order_id"]) == [1, 2, 3]
+    assert set(load_manifest(manifest)["files"]) == {"a.csv", "b.csv"}
+
+    # Tidak ada perubahan: tidak ada file yang dibaca
+    assert extract_from_folder(raw_dir, manifest_path=manifest).empty
+
+    write_csv(raw_dir / "b.csv", [3, 4])
+    write_csv(raw_dir / "c.csv", [5])
+    delta = extract_from_folder(raw_dir, manifest_path=manifest)
+    assert sorted(delta["order_id"]) == [3, 4, 5]
+    assert set(delta["source_file"]) == {"b.csv", "c.csv"}
+
+    assert len(extract_from_folder(raw_dir, manifest_path=manifest, full_rescan=True)) == 5
+
+
+def test_manifest_touch_without_content_change_is_skipped(tmp_path):
+    raw_dir = tmp_path / "raw"
+    raw_dir.mkdir()
+    manifest = tmp_path / "manifest.json"
+    write_csv(raw_dir / "a.csv", [1])
+    extract_from_folder(raw_dir, manifest_path=manifest)
+
+    # mtime berubah tapi isi sama: hash dicek dan file tidak dibaca ulang
+    stat = (raw_dir / "a.csv").stat()
+    os.utime(raw_dir / "a.csv", ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    assert extract_from_folder(raw_dir, manifest_path=manifest).empty
+
+
+def test_unreadable_file_is_retried_next_run(tmp_path):
+    raw_dir = tmp_path / "raw"
+    raw_dir.mkdir()
+    manifest = tmp_path / "manifest.json"
+    write_csv(raw_dir / "a.csv", [1])
+    (raw_dir / "broken.parquet").write_bytes(b"not parquet")
+
+    extract_from_folder(raw_dir, manifest_path=manifest)
+    assert set(load_manifest(manifest)["files"]) == {"a.csv"}
+
+    pd.DataFrame({"order_id": [9], "amount": [90]}).to_parquet(raw_dir / "broken.parquet")
+    retried = extract_from_folder(raw_dir, manifest_path=manifest)
+    assert retried["order_id"].tolist() == [9]
+
+
+def test_ndjson_is_opt_in(tmp_path):
+    write_csv(tmp_path / "a.csv", [1])
+    pd.DataFrame({"order_id": [2], "amount": [20]}).to_json(tmp_path / "b.jsonl", orient="records", lines=True)
+
+    assert extract_from_folder(tmp_path)["order_id"].tolist() == [1]
+    assert extract_from_folder(tmp_path, include_ndjson=True)["order_id"].tolist() == [1, 2]
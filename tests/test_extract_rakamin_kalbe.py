@@ -0,0 +1,90 @@
+import sqlite3
+
+import pandas as pd
+
+from scripts.etl_rakamin_kalbe.extract_rakamin_kalbe_v1_24092025_2035_ane import (
+    commit_watermarks,
+    extract_incremental,
+    extract_multiple_tables,
+    load_watermarks
+)
+
+
+def make_source(db_path, n_orders=3):
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("CREATE TABLE orders (order_id INTEGER, amount REAL)")
+        conn.execute("CREATE TABLE category_db (category_id INTEGER, name TEXT)")
+        conn.executemany("INSERT INTO orders VALUES (?, ?)", [(i, i * 10.0) for i in range(1, n_orders + 1)])
+        conn.execute("INSERT INTO category_db VALUES (1, 'Food')")
+
+
+def append_orders(db_path, order_ids):
+    with sqlite3.connect(db_path) as conn:
+        conn.executemany("INSERT INTO orders VALUES (?, ?)", [(i, i * 10.0) for i in order_ids])
+
+
+def test_watermark_is_pending_until_committed(tmp_path):
+    db_path = str(tmp_path / "source.db")
+    watermark_file = tmp_path / "watermarks.json"
+    make_source(db_path)
+
+    first = extract_incremental(db_path, "orders", watermark_file=watermark_file)
+    assert first["order_id"].tolist() == [1, 2, 3]
+    assert first.attrs["watermark"]["value"] == 3
+    # Load "gagal": watermark belum disimpan, run berikutnya mengambil rows yang sama
+    assert load_watermarks(watermark_file) == {}
+    assert len(extract_incremental(db_path, "orders", watermark_file=watermark_file)) == 3
+
+    commit_watermarks([first], watermark_file)
+    append_orders(db_path, [4, 5])
+    second = extract_incremental(db_path, "orders", watermark_file=watermark_file)
+    assert second["order_id"].tolist() == [4, 5]
+    assert "_etl_rowid" not in second.columns
+
+
+def test_multiple_tables_do_not_commit_watermarks(tmp_path):
+    db_path = str(tmp_path / "source.db")
+    watermark_file = tmp_path / "watermarks.json"
+    make_source(db_path)
+
+    tables = extract_multiple_tables(db_path, ["orders", "category_db"], incremental=True,
+                                     watermark_file=watermark_file, max_workers=2)
+    assert load_watermarks(watermark_file) == {}
+
+    commit_watermarks(tables.values(), watermark_file)
+    append_orders(db_path, [4])
+    again = extract_multiple_tables(db_path, ["orders", "category_db"], incremental=True,
+                                    watermark_file=watermark_file)
+    assert again["orders"]["order_id"].tolist() == [4]
+    assert again["category_db"].empty
+
+
+def test_custom_watermark_column(tmp_path):
+    db_path = str(tmp_path / "source.db")
+    watermark_file = tmp_path / "watermarks.json"
+    make_source(db_path)
+
+    first = extract_incremental(db_path, "orders", watermark_column="order_id",
+                                watermark_file=watermark_file, columns=["amount"])
+    assert list(first.columns) == ["amount"]
+    commit_watermarks([first], watermark_file)
+
+    append_orders(db_path, [10])
+    assert extract_incremental(db_path, "orders", watermark_column="order_id",
+                               watermark_file=watermark_file)["order_id"].tolist() == [10]
+
+
+def test_parallel_extract_skips_only_failing_table(tmp_path):
+    db_path = str(tmp_path / "source.db")
+    make_source(db_path)
+
+    tables = extract_multiple_tables(db_path, ["orders", "missing_table", "category_db"], max_workers=3)
+
+    assert list(tables) == ["orders", "category_db"]
+    assert len(tables["orders"]) == 3
+
+
+def test_parallel_extract_falls_back_when_pool_cannot_open(tmp_path):
+    # Database tidak ada: mode=ro gagal, jalur sequential tetap dipakai
+    tables = extract_multiple_tables(str(tmp_path / "missing.db"), ["orders", "category_db"], max_workers=2)
+    assert tables == {}
@@ -0,0 +1,118 @@
+import sqlite3
+from datetime import datetime
+
+import pandas as pd
+
+from scripts.etl_rakamin_kalbe.load_rakamin_kalbe_v1_24092025_2037_ane import (
+    load_to_parquet,
+    load_to_sqlite,
+)
+
+
+def read_table(db_path, table):
+    with sqlite3.connect(db_path) as conn:
+        return pd.read_sql_query(f"SELECT * FROM {table} ORDER BY customer_id", conn)
+
+
+def customers(processed_at, segment_2="Corporate"):
+    return pd.DataFrame({
+        "customer_id": [1, 2],
+        "segment": ["Consumer", segment_2],
+        "processed_at": [processed_at, processed_at]
+    })
+
+
+def test_merge_ignores_audit_columns(tmp_path, caplog):
+    db_path = str(tmp_path / "warehouse.db")
+    assert load_to_sqlite(customers(datetime(2026, 1, 1)), "dim_customers", db_path,
+                          if_exists="merge", primary_key=["customer_id"])
+
+    # processed_at selalu baru tiap run, tapi bukan perubahan data
+    caplog.set_level("INFO")
+    assert load_to_sqlite(customers(datetime(2026, 1, 2)), "dim_customers", db_path,
+                          if_exists="merge", primary_key=["customer_id"])
+    assert "0 rows inserted/updated, 2 unchanged" in caplog.text
+
+    caplog.clear()
+    assert load_to_sqlite(customers(datetime(2026, 1, 3), segment_2="Home Office"), "dim_customers",
+                          db_path, if_exists="merge", primary_key=["customer_id"])
+    assert "1 rows inserted/updated, 1 unchanged" in caplog.text
+    result = read_table(db_path, "dim_customers")
+    assert result["segment"].tolist() == ["Consumer", "Home Office"]
+    # Row yang berubah ikut membawa processed_at baru
+    assert result["processed_at"].tolist() == ["2026-01-01 00:00:00", "2026-01-03 00:00:00"]
+
+
+def test_merge_keeps_latest_version_per_key(tmp_path):
+    db_path = str(tmp_path / "warehouse.db")
+    history = pd.DataFrame({
+        "customer_id": [1, 1, 2],
+        "segment": ["Corporate", "Consumer", "Consumer"],
+        "updated_at": ["2024-05-01", "2024-01-01", "2024-02-01"]
+    })
+    assert load_to_sqlite(history, "dim_customers", db_path, if_exists="merge",
+                          primary_key=["customer_id"], order_by="updated_at")
+    assert read_table(db_path, "dim_customers")["segment"].tolist() == ["Corporate", "Consumer"]
+
+
+def test_merge_fails_on_table_with_duplicate_keys(tmp_path, caplog):
+    db_path = str(tmp_path / "warehouse.db")
+    history = pd.DataFrame({"customer_id": [1, 1], "segment": ["Consumer", "Corporate"]})
+    assert load_to_sqlite(history, "dim_customers", db_path)
+
+    assert not load_to_sqlite(history.tail(1), "dim_customers", db_path, if_exists="merge",
+                              primary_key=["customer_id"])
+    assert "sudah berisi duplicate" in caplog.text
+    assert len(read_table(db_path, "dim_customers")) == 2
+
+
+def orders(dates):
+    return pd.DataFrame({
+        "order_id": range(1, len(dates) + 1),
+        "order_date": pd.to_datetime(dates),
+        "amount": [10.0] * len(dates)
+    })
+
+
+def partition_files(dataset_dir):
+    return {p.parent.name: p.name for p in dataset_dir.rglob("*.parquet")}
+
+
+def test_incremental_parquet_rewrites_only_open_days(tmp_path):
+    target = tmp_path / "fact_orders.parquet"
+    dataset_dir = tmp_path / "fact_orders"
+    assert load_to_parquet(orders(["2026-01-01", "2026-01-02"]), str(target),
+                           partition_by_date="order_date", existing_partitions="incremental")
+    first = partition_files(dataset_dir)
+
+    rerun = orders(["2026-01-01", "2026-01-02", "2026-01-02", "2026-01-03"])
+    assert load_to_parquet(rerun, str(target), partition_by_date="order_date",
+                           existing_partitions="incremental")
+    second = partition_files(dataset_dir)
+
+    assert second["order_date_day=2026-01-01"] == first["order_date_day=2026-01-01"]
+    assert second["order_date_day=2026-01-02"] != first["order_date_day=2026-01-02"]
+    assert set(second) == {f"order_date_day=2026-01-0{d}" for d in (1, 2, 3)}
+    assert len(pd.read_parquet(dataset_dir)) == 4
+
+
+def test_overwrite_parquet_replaces_every_partition_in_batch(tmp_path):
+    target = tmp_path / "fact_orders.parquet"
+    dataset_dir = tmp_path / "fact_orders"
+    batch = orders(["2026-01-01", "2026-01-02"])
+    load_to_parquet(batch, str(target), partition_by_date="order_date", existing_partitions="overwrite")
+    first = partition_files(dataset_dir)
+    load_to_parquet(batch, str(target), partition_by_date="order_date", existing_partitions="overwrite")
+
+    assert all(partition_files(dataset_dir)[day] != name for day, name in first.items())
+    assert len(pd.read_parquet(dataset_dir)) == 2
+
+
+def test_partitioned_parquet_retires_legacy_single_file(tmp_path):
+    target = tmp_path / "fact_orders.parquet"
+    orders(["2026-01-01"]).to_parquet(target)
+
+    assert load_to_parquet(orders(["2026-01-01"]), str(target), partition_by_date="order_date")
+    assert not target.exists()
+    assert (tmp_path / "fact_orders.parquet.migrated").is_file()
+    assert (tmp_path / "fact_orders").is_dir()
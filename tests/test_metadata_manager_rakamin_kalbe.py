@@ -0,0 +1,171 @@
+import sqlite3
+from datetime import datetime
+
+import pytest
+
+from scripts.governance_rakamin_kalbe import metadata_manager_rakamin_kalbe_v1_24092025_2104_ane as metadata_module
+from scripts.governance_rakamin_kalbe.linear_tracker_rakamin_kalbe_v1_24092025_ane import LineageTracker
+from scripts.governance_rakamin_kalbe.metadata_manager_rakamin_kalbe_v1_24092025_2104_ane import (
+    RAKAMIN_LINEAGE_ASSETS,
+    MetadataManager,
+    register_rakamin_assets
+)
+
+
+def entry(source, target, transformation_type):
+    return {"source": source, "target": target, "transformation_type": transformation_type,
+            "records_output": 10, "timestamp": "2026-10-17T00:00:00"}
+
+
+# Label sama persis dengan yang ditulis GovernedETLPipeline ke LineageTracker
+PIPELINE_ENTRIES = [
+    entry("rakamin_kalbe.db.orders", "staging.orders", "extraction"),
+    entry("rakamin_kalbe.db.customer_data_history", "staging.customer_data_history", "extraction"),
+    entry("staging.customer_data_history", "transformed.dim_customers", "cleaning"),
+    entry("staging.orders + staging.customer_data_history", "transformed.fact_orders", "join_and_enrich"),
+    entry("transformed.dim_customers", "warehouse.dim_customers", "loading"),
+    entry("transformed.fact_orders", "warehouse.fact_orders", "loading"),
+]
+
+
+def make_manager(tmp_path):
+    manager = MetadataManager(str(tmp_path / "metadata.db"), asset_aliases=RAKAMIN_LINEAGE_ASSETS)
+    register_rakamin_assets(manager=manager)
+    manager.record_lineage(PIPELINE_ENTRIES)
+    return manager
+
+
+def test_downstream_of_registered_source(tmp_path):
+    manager = make_manager(tmp_path)
+
+    downstream = manager.get_downstream("rakamin_orders_raw")
+
+    assert set(downstream["asset_id"]) == {"staging.orders", "transformed.fact_orders", "fact_orders"}
+    fact = downstream.set_index("asset_id").loc["fact_orders"]
+    assert fact["depth"] == 3
+    assert fact["asset_name"] == "Orders Fact"
+
+
+def test_upstream_resolves_labels_and_compound_sources(tmp_path):
+    manager = make_manager(tmp_path)
+
+    upstream = manager.get_upstream("warehouse.fact_orders")
+
+    assert "rakamin_orders_raw" in set(upstream["asset_id"])
+    assert "rakamin_kalbe.db.customer_data_history" in set(upstream["asset_id"])
+    assert set(manager.get_upstream("dim_customers_clean")["asset_id"]) == {
+        "transformed.dim_customers", "staging.customer_data_history", "rakamin_kalbe.db.customer_data_history"
+    }
+
+
+class FailingManager:
+    def __init__(self):
+        self.calls = []
+        self.fail = True
+
+    def record_lineage(self, entries):
+        self.calls.append([e["target"] for e in entries])
+        if self.fail:
+            raise RuntimeError("database is locked")
+
+
+def test_tracker_close_does_not_raise_when_metadata_db_fails(tmp_path, caplog):
+    manager = FailingManager()
+    tracker = LineageTracker(lineage_file=str(tmp_path / "lineage.jsonl"),
+                             legacy_file=str(tmp_path / "lineage.json"), metadata_manager=manager)
+    tracker.log_transformation("staging.orders", "transformed.fact_orders", "join", 10, 10)
+
+    tracker.close()
+
+    assert "Error simpan 1 entry lineage ke metadata DB" in caplog.text
+    assert len(list(tracker.read_entries())) == 1
+
+    # Entry yang gagal dicoba lagi bersama entry baru
+    manager.fail = False
+    tracker.log_transformation("transformed.fact_orders", "warehouse.fact_orders", "loading", 10, 10)
+    tracker.close()
+    assert manager.calls[-1] == ["transformed.fact_orders", "warehouse.fact_orders"]
+
+
+def read_edge(manager, source, target):
+    with sqlite3.connect(manager.db_path) as conn:
+        return conn.execute(
+            "SELECT first_seen, last_seen, run_count FROM lineage_edges "
+            "WHERE source_asset_id = ? AND target_asset_id = ?", (source, target)
+        ).fetchone()
+
+
+def test_lineage_edge_keeps_earliest_first_seen(tmp_path):
+    manager = MetadataManager(str(tmp_path / "metadata.db"))
+    late = dict(entry("staging.orders", "transformed.fact_orders", "join"), timestamp="2026-10-17T10:00:00")
+    early = dict(late, timestamp="2026-10-16T10:00:00")
+
+    manager.record_lineage([late])
+    manager.record_lineage([early])
+
+    assert read_edge(manager, "staging.orders", "transformed.fact_orders") == (
+        "2026-10-16T10:00:00", "2026-10-17T10:00:00", 2
+    )
+
+
+class TrackingConnection(sqlite3.Connection):
+    opened = []
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.closed = False
+        TrackingConnection.opened.append(self)
+
+    def close(self):
+        self.closed = True
+        super().close()
+
+
+def test_record_lineage_closes_connection_when_insert_fails(tmp_path, monkeypatch):
+    manager = MetadataManager(str(tmp_path / "metadata.db"))
+    with sqlite3.connect(manager.db_path) as conn:
+        conn.execute("DROP TABLE lineage_edges")
+    connect = sqlite3.connect
+    monkeypatch.setattr(metadata_module.sqlite3, "connect",
+                        lambda *args, **kwargs: connect(*args, factory=TrackingConnection, **kwargs))
+    TrackingConnection.opened.clear()
+
+    with pytest.raises(sqlite3.OperationalError):
+        manager.record_lineage([entry("staging.orders", "transformed.fact_orders", "join")])
+
+    assert TrackingConnection.opened and all(conn.closed for conn in TrackingConnection.opened)
+
+
+ASSET = {"asset_id": "orders_raw", "asset_name": "Orders Raw Data", "asset_type": "table",
+         "source_system": "rakamin_kalbe.db", "owner": "data_team"}
+
+
+def read_asset_dates(manager, asset_id):
+    with sqlite3.connect(manager.db_path) as conn:
+        return conn.execute(
+            "SELECT created_date, last_updated FROM data_assets WHERE asset_id = ?", (asset_id,)
+        ).fetchone()
+
+
+def test_register_assets_honors_caller_timestamps(tmp_path):
+    manager = MetadataManager(str(tmp_path / "metadata.db"))
+    created = datetime(2025, 1, 1, 8, 0)
+
+    manager.register_assets([dict(ASSET, created_date=created, last_updated="2025-02-01 09:00:00")])
+    assert read_asset_dates(manager, "orders_raw") == ("2025-01-01 08:00:00", "2025-02-01 09:00:00")
+
+    # Tanpa timestamp: created_date tetap, last_updated jadi waktu update
+    manager.register_assets([dict(ASSET, owner="platform_team")])
+    created_date, last_updated = read_asset_dates(manager, "orders_raw")
+    assert created_date == "2025-01-01 08:00:00"
+    assert last_updated > "2025-02-01 09:00:00"
+
+    manager.register_assets([dict(ASSET, owner="platform_team", created_date="2024-12-31 00:00:00")])
+    assert read_asset_dates(manager, "orders_raw")[0] == "2024-12-31 00:00:00"
+
+
+def test_register_assets_rejects_unknown_keys(tmp_path):
+    manager = MetadataManager(str(tmp_path / "metadata.db"))
+
+    with pytest.raises(ValueError, match="updated_by"):
+        manager.register_assets([dict(ASSET, updated_by="etl")])
@@ -0,0 +1,30 @@
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from scripts.pipeline_rakamin_kalbe.profiler_rakamin_kalbe_v1_17102026_ane import StageProfiler
+
+
+def burn_cpu(seconds=0.2):
+    end = time.process_time() + seconds
+    while time.process_time() < end:
+        pass
+
+
+def test_worker_thread_cpu_is_reported_as_process_cpu(tmp_path):
+    profiler = StageProfiler(metrics_file=tmp_path / "metrics.jsonl", prometheus_file=tmp_path / "metrics.prom")
+
+    with profiler.stage("extract", rows_in=10):
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            executor.submit(burn_cpu).result()
+    profiler.write()
+
+    metrics = json.loads((tmp_path / "metrics.jsonl").read_text())
+    assert metrics["process_cpu_seconds"] >= 0.15
+    assert metrics["thread_cpu_seconds"] < 0.1
+    assert "cpu_seconds" not in metrics
+
+    prometheus = (tmp_path / "metrics.prom").read_text()
+    assert 'etl_stage_process_cpu_seconds{run_id="' in prometheus
+    assert 'etl_stage_thread_cpu_seconds{run_id="' in prometheus
+    assert "etl_stage_cpu_seconds" not in prometheus
@@ -0,0 +1,107 @@
+import sqlite3
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+
+from scripts.etl_rakamin_kalbe.transform_rakamin_kalbe_v1_24092025_2036_ane import build_scd2_changes
+from scripts.etl_rakamin_kalbe.load_rakamin_kalbe_v1_24092025_2037_ane import (
+    load_scd2_dimension,
+    read_scd2_current
+)
+from scripts.pipeline_rakamin_kalbe import pipeline_rakamin_kalbe_v1_24092025_2155_ane as pipeline_module
+
+BATCH_1 = pd.DataFrame({
+    "customer_id": [1, 2, 2, 3],
+    "customer_name": ["Ani", "Budi", "Budi S", "Citra"],
+    "email": ["ani@mail.com", None, None, "citra@mail.com"],
+    "segment": ["Consumer", "Corporate", "Corporate", "Home Office"],
+    "updated_at": ["2024-01-01", "2024-01-01", "2024-02-01", "2024-01-05"]
+})
+
+BATCH_2 = pd.DataFrame({
+    "customer_id": [2, 3, 4],
+    "customer_name": ["Budi S", "Citra", "Dewi"],
+    "email": [None, "citra@work.com", "dewi@mail.com"],
+    "segment": ["Corporate", "Home Office", "Consumer"],
+    "updated_at": ["2024-03-01", "2024-03-02", "2024-03-03"]
+})
+
+
+def load_batch(batch, db_path, index_current=True):
+    current = read_scd2_current("dim_customers", db_path, "customer_id",
+                                keys=batch["customer_id"].unique())
+    if index_current:
+        current = current.set_index("customer_id")
+    new_versions, expirations = build_scd2_changes(batch, current)
+    assert load_scd2_dimension(new_versions, expirations, "dim_customers", db_path, "customer_id")
+    return new_versions, expirations
+
+
+def read_dimension(db_path):
+    with sqlite3.connect(db_path) as conn:
+        return pd.read_sql_query(
+            "SELECT customer_id, customer_name, email, valid_from, valid_to, is_current "
+            "FROM dim_customers ORDER BY customer_id, valid_from", conn
+        )
+
+
+@pytest.mark.parametrize("index_current", [True, False])
+def test_reload_is_idempotent(tmp_path, index_current):
+    db_path = str(tmp_path / "warehouse.db")
+    new_versions, _ = load_batch(BATCH_1, db_path, index_current)
+    assert len(new_versions) == 4
+
+    new_versions, expirations = load_batch(BATCH_1, db_path, index_current)
+    assert new_versions.empty and expirations.empty
+    assert len(read_dimension(db_path)) == 4
+
+
+@pytest.mark.parametrize("index_current", [True, False])
+def test_change_expires_current_version(tmp_path, index_current):
+    db_path = str(tmp_path / "warehouse.db")
+    load_batch(BATCH_1, db_path, index_current)
+
+    new_versions, expirations = load_batch(BATCH_2, db_path, index_current)
+
+    # Customer 2 tidak berubah (hash sama), customer 3 ganti email, customer 4 baru
+    assert sorted(new_versions["customer_id"]) == [3, 4]
+    assert expirations["customer_id"].tolist() == [3]
+
+    dim = read_dimension(db_path)
+    assert dim.groupby("customer_id")["is_current"].sum().eq(1).all()
+    citra = dim[dim["customer_id"] == 3]
+    assert citra["email"].tolist() == ["citra@mail.com", "citra@work.com"]
+    assert citra["valid_to"].tolist()[0] == citra["valid_from"].tolist()[1]
+    assert citra["is_current"].tolist() == [0, 1]
+
+    # Reload batch yang sama tidak menambah versi
+    new_versions, expirations = load_batch(pd.concat([BATCH_1, BATCH_2]), db_path, index_current)
+    assert new_versions.empty and expirations.empty
+    assert len(read_dimension(db_path)) == 6
+
+
+def test_current_without_key_is_rejected():
+    with pytest.raises(ValueError):
+        build_scd2_changes(BATCH_1, pd.DataFrame({"row_hash": [1], "valid_from": ["2024-01-01"]}))
+
+
+def test_customer_lookup_reuses_transformed_versions(tmp_path, monkeypatch):
+    db_path = str(tmp_path / "warehouse.db")
+    load_batch(BATCH_1, db_path)
+    new_versions, _ = build_scd2_changes(BATCH_2, read_scd2_current(
+        "dim_customers", db_path, "customer_id", keys=BATCH_2["customer_id"].unique()))
+
+    def fail_clean(df):
+        raise AssertionError("batch sudah di-clean oleh transform_customers")
+    monkeypatch.setattr(pipeline_module, "clean_customer_data", fail_clean)
+    pipeline = SimpleNamespace(customer_join="latest", dim_mode="scd2")
+    raw_data = {"customer_data_history": BATCH_2, "orders": pd.DataFrame({"customer_id": [1, 2, 3, 4]})}
+
+    lookup = pipeline_module.GovernedETLPipeline.build_customer_lookup(
+        pipeline, raw_data, db_path, new_versions=new_versions
+    )
+
+    assert lookup.index.is_unique
+    assert lookup.sort_index()["customer_name"].tolist() == ["Ani", "Budi S", "Citra", "Dewi"]
+    assert lookup.loc[4, "segment"] == "Consumer"
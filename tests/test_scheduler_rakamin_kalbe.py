@@ -0,0 +1,85 @@
+import threading
+
+import pytest
+
+from scripts.pipeline_rakamin_kalbe.scheduler_rakamin_kalbe_v1_17102026_ane import DAGScheduler, TaskDAG
+
+
+def make_dag(calls):
+    """extract_a, extract_b -> join -> load, dengan input tiap task dicatat di calls"""
+    def step(name, compute):
+        def run(inputs):
+            calls.append((name, dict(inputs)))
+            return compute(inputs)
+        return run
+
+    dag = TaskDAG()
+    dag.add_task("extract_a", step("extract_a", lambda inputs: 1))
+    dag.add_task("extract_b", step("extract_b", lambda inputs: 2))
+    dag.add_task("join", step("join", lambda inputs: sum(inputs.values())), deps=["extract_a", "extract_b"])
+    dag.add_task("load", step("load", lambda inputs: "loaded"), deps=["join"])
+    return dag
+
+
+def test_add_task_rejects_duplicate_and_unknown_deps():
+    dag = TaskDAG()
+    dag.add_task("extract", lambda inputs: None)
+
+    with pytest.raises(ValueError, match="sudah ada"):
+        dag.add_task("extract", lambda inputs: None)
+    with pytest.raises(ValueError, match="belum ada"):
+        dag.add_task("load", lambda inputs: None, deps=["transform"])
+
+
+@pytest.mark.parametrize("max_workers", [1, 4])
+def test_tasks_run_after_deps_and_receive_their_results(max_workers):
+    calls = []
+
+    results = DAGScheduler(max_workers).run(make_dag(calls))
+
+    assert results == {"extract_a": 1, "extract_b": 2, "join": 3, "load": "loaded"}
+    order = [name for name, _ in calls]
+    assert order.index("join") > max(order.index("extract_a"), order.index("extract_b"))
+    assert order[-1] == "load"
+    assert dict(calls)["join"] == {"extract_a": 1, "extract_b": 2}
+    assert dict(calls)["load"] == {"join": 3}
+
+
+def test_sequential_mode_runs_in_caller_thread_in_add_order():
+    threads, calls = set(), []
+    dag = make_dag(calls)
+    for task in dag.tasks.values():
+        func = task.func
+        task.func = lambda inputs, func=func: threads.add(threading.get_ident()) or func(inputs)
+
+    DAGScheduler(1).run(dag)
+
+    assert threads == {threading.get_ident()}
+    assert [name for name, _ in calls] == ["extract_a", "extract_b", "join", "load"]
+
+
+def test_parallel_mode_runs_independent_tasks_concurrently():
+    # Barrier hanya lolos kalau kedua extract jalan bersamaan
+    barrier = threading.Barrier(2, timeout=5)
+    dag = TaskDAG()
+    dag.add_task("extract_a", lambda inputs: barrier.wait() is not None)
+    dag.add_task("extract_b", lambda inputs: barrier.wait() is not None)
+
+    assert DAGScheduler(2).run(dag) == {"extract_a": True, "extract_b": True}
+
+
+@pytest.mark.parametrize("max_workers", [1, 4])
+def test_first_failure_is_raised_and_dependents_are_skipped(max_workers, caplog):
+    ran = []
+    dag = TaskDAG()
+    dag.add_task("extract", lambda inputs: ran.append("extract"))
+    dag.add_task("transform", lambda inputs: 1 / 0, deps=["extract"])
+    dag.add_task("load", lambda inputs: ran.append("load"), deps=["transform"])
+
+    with pytest.raises(ZeroDivisionError):
+        DAGScheduler(max_workers).run(dag)
+
+    assert ran == ["extract"]
+    if max_workers > 1:
+        assert "Task transform gagal" in caplog.text
+        assert "'load'" in caplog.text
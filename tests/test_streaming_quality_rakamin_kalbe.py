@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+
+from scripts.quality_rakamin_kalbe.data_quality_rakamin_kalbe_v1_24092025_ane import DataQualityChecker
+from scripts.quality_rakamin_kalbe.streaming_quality_rakamin_kalbe_v1_17102026_ane import (
+    HyperLogLog,
+    StreamingQualityChecker,
+    hash_values
+)
+
+BIG_ID = 2 ** 53
+
+
+def make_orders(n_rows=1000, seed=7):
+    rng = np.random.default_rng(seed)
+    # order_id di atas 2**53 dengan duplicate dan NULL: beda 1 hilang kalau di-hash lewat float64
+    order_id = pd.Series(BIG_ID + rng.integers(0, n_rows // 2, n_rows), dtype="Int64")
+    order_id[rng.random(n_rows) < 0.05] = pd.NA
+    order_date = pd.Series(pd.date_range("2025-01-01", periods=n_rows, freq="h").strftime("%Y-%m-%d"))
+    order_date[rng.random(n_rows) < 0.02] = "2025-02-30"
+    return pd.DataFrame({
+        "order_id": order_id,
+        "customer_id": rng.integers(1000, 1100, n_rows).astype(str),
+        "order_date": order_date,
+        "amount": rng.uniform(-10, 1000, n_rows).round(2),
+        "quantity": rng.integers(0, 20, n_rows)
+    })
+
+
+def test_hash_values_keeps_large_integer_ids_distinct():
+    ids = pd.Series([BIG_ID, BIG_ID + 1, BIG_ID + 2], dtype="int64")
+    assert len(np.unique(hash_values(ids))) == 3
+
+
+def test_hash_values_same_for_int_and_float_chunks():
+    # Chunk dengan NaN dibaca sebagai float64, chunk lain int64
+    as_int = hash_values(pd.Series([3, 5, 7]))
+    as_float = hash_values(pd.Series([3.0, np.nan, 5.0, 7.0]))
+    as_nullable = hash_values(pd.Series([3, pd.NA, 5, 7], dtype="Int64"))
+    assert (as_int == as_float).all()
+    assert (as_int == as_nullable).all()
+
+
+def test_chunked_checks_equal_in_memory_checks():
+    df = make_orders()
+    expected = DataQualityChecker(cache_results=False).run_all_checks(df, "orders")
+
+    # Chunk tanpa NULL jadi int64, chunk dengan NULL tetap nullable Int64
+    chunks = [
+        chunk if chunk["order_id"].isna().any() else chunk.astype({"order_id": "int64"})
+        for chunk in (df.iloc[start:start + 97] for start in range(0, len(df), 97))
+    ]
+    chunked = StreamingQualityChecker().run_chunked_checks(chunks, "orders")
+
+    assert chunked["total_records"] == expected["total_records"]
+    assert chunked["checks"] == expected["checks"]
+    assert chunked["overall_status"] == expected["overall_status"]
+
+
+def test_hyperloglog_rank_matches_exact_bit_length():
+    precision = 4
+    bits = 64 - precision
+    # 2**k - 1 dibulatkan ke 2**k oleh float64 untuk k >= 54, jadi rank via log2 off-by-one
+    for k in range(bits + 1):
+        for rest in {2 ** k - 1, min(2 ** k, 2 ** bits - 1)}:
+            hll = HyperLogLog(precision=precision)
+            hll.add_hashes(np.array([rest], dtype=np.uint64))
+            assert hll.registers[0] == bits + 1 - rest.bit_length()